@@ -1,6 +1,8 @@
 from django.utils import timezone
 import pytz
 
+from . import presence
+
 class TimezoneMiddleware:
     """
     Middleware qui active le fuseau horaire de l'utilisateur pour chaque requête.
@@ -40,8 +42,8 @@ class TimezoneMiddleware:
 
 class UpdateLastActivityMiddleware:
     """
-    Middleware pour mettre à jour le champ `last_activity` de l'utilisateur.
-    Utilise la nouvelle syntaxe de middleware de Django.
+    Middleware qui enregistre l'activité de l'utilisateur dans le service de présence.
+    `last_activity` n'est écrit en base que périodiquement (voir accounts.presence).
     """
     def __init__(self, get_response):
         self.get_response = get_response
@@ -50,9 +52,7 @@ class UpdateLastActivityMiddleware:
         response = self.get_response(request)
         
         # Ce code s'exécute après la vue.
-        # Le fuseau horaire de l'utilisateur est toujours actif ici grâce au TimezoneMiddleware.
-        if request.user.is_authenticated and hasattr(request.user, 'userprofile'):
-            request.user.userprofile.last_activity = timezone.now()
-            request.user.userprofile.save(update_fields=['last_activity'])
+        if request.user.is_authenticated:
+            presence.record_activity(request.user)
             
         return response
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_userprofile_timezone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['last_activity'], name='accounts_profile_activity_idx'),
+        ),
+    ]
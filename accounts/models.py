@@ -48,6 +48,9 @@ class UserProfile(models.Model):
     class Meta:
         verbose_name = "Profil utilisateur"
         verbose_name_plural = "Profils utilisateurs"
+        indexes = [
+            models.Index(fields=['last_activity'], name='accounts_profile_activity_idx'),
+        ]
 
     def __str__(self):
         return f"Profil de {self.user.get_full_name() or self.user.username}"
@@ -116,6 +119,10 @@ def save_user_profile(sender, instance, **kwargs):
 
 @receiver(user_logged_out)
 def on_user_logged_out(sender, request, user, **kwargs):
+    if user is None:
+        return
+    from .presence import mark_offline
+    mark_offline(user)
     if hasattr(user, 'userprofile'):
         user.userprofile.last_activity = django_timezone.now() - timedelta(minutes=6)
         user.userprofile.save(update_fields=['last_activity'])
@@ -0,0 +1,138 @@
+"""
+Service de présence : qui est en ligne, sans écrire en base à chaque requête.
+
+L'activité est enregistrée :
+- dans un ensemble trié Redis (score = horodatage) quand REDIS_URL est
+  défini (partagé par tous les processus) ;
+- dans le cache Django sinon, par tranches d'une minute (partagé si le
+  cache l'est).
+
+`UserProfile.last_activity` n'est écrit qu'au plus une fois toutes les
+`PRESENCE_FLUSH_INTERVAL` secondes par utilisateur ; il sert aux statistiques
+longues (membres actifs sur 30 jours), pas à la présence en temps réel.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+PRESENCE_TTL = getattr(settings, 'PRESENCE_TTL', 5 * 60)
+FLUSH_INTERVAL = getattr(settings, 'PRESENCE_FLUSH_INTERVAL', 5 * 60)
+
+ONLINE_KEY = 'presence:online'
+
+
+class CachePresence:
+    """
+    Présence dans le cache Django, partagée par les processus dès que le cache
+    l'est. Chaque tranche de BUCKET_SECONDS garde la liste des utilisateurs
+    vus pendant la tranche ; la précision est donc celle de la tranche.
+    """
+    BUCKET_SECONDS = 60
+
+    def _bucket(self, timestamp):
+        return int(timestamp // self.BUCKET_SECONDS)
+
+    def _roster_key(self, bucket):
+        return f'{ONLINE_KEY}:{bucket}'
+
+    def _timeout(self):
+        return PRESENCE_TTL + self.BUCKET_SECONDS
+
+    def touch(self, user_id, now):
+        bucket = self._bucket(now)
+        # Une seule écriture de la liste par utilisateur et par tranche
+        if not cache.add(f'{ONLINE_KEY}:{bucket}:{user_id}', True, self._timeout()):
+            return
+        key = self._roster_key(bucket)
+        # Lecture puis écriture, non atomiques : un utilisateur perdu dans une
+        # course réapparaît à la tranche suivante
+        roster = cache.get(key, [])
+        if user_id not in roster:
+            cache.set(key, roster + [user_id], self._timeout())
+
+    def remove(self, user_id):
+        now = time.time()
+        for bucket in range(self._bucket(now - PRESENCE_TTL), self._bucket(now) + 1):
+            key = self._roster_key(bucket)
+            roster = cache.get(key)
+            if roster and user_id in roster:
+                cache.set(key, [uid for uid in roster if uid != user_id], self._timeout())
+            cache.delete(f'{ONLINE_KEY}:{bucket}:{user_id}')
+
+    def online(self, since):
+        buckets = range(self._bucket(time.time()), self._bucket(since) - 1, -1)
+        rosters = cache.get_many([self._roster_key(bucket) for bucket in buckets])
+        user_ids = {}
+        # Tranches de la plus récente à la plus ancienne, derniers arrivés d'abord
+        for bucket in buckets:
+            for user_id in reversed(rosters.get(self._roster_key(bucket), [])):
+                user_ids.setdefault(user_id, None)
+        return list(user_ids)
+
+    def count(self, since):
+        return len(self.online(since))
+
+
+class RedisPresence:
+    """Présence partagée dans un ensemble trié Redis"""
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def touch(self, user_id, now):
+        pipe = self.client.pipeline()
+        pipe.zadd(ONLINE_KEY, {user_id: now})
+        pipe.zremrangebyscore(ONLINE_KEY, '-inf', now - PRESENCE_TTL)
+        pipe.expire(ONLINE_KEY, PRESENCE_TTL)
+        pipe.execute()
+
+    def remove(self, user_id):
+        self.client.zrem(ONLINE_KEY, user_id)
+
+    def online(self, since):
+        return [int(uid) for uid in self.client.zrevrangebyscore(ONLINE_KEY, '+inf', since)]
+
+    def count(self, since):
+        return self.client.zcount(ONLINE_KEY, since, '+inf')
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        redis_url = getattr(settings, 'REDIS_URL', '')
+        _backend = RedisPresence(redis_url) if redis_url else CachePresence()
+    return _backend
+
+
+def record_activity(user):
+    """Note l'activité d'un utilisateur ; `last_activity` n'est écrit que périodiquement"""
+    get_backend().touch(user.pk, time.time())
+
+    if cache.add(f'presence:flushed:{user.pk}', True, FLUSH_INTERVAL):
+        from .models import UserProfile
+        UserProfile.objects.filter(user_id=user.pk).update(last_activity=timezone.now())
+
+
+def mark_offline(user):
+    get_backend().remove(user.pk)
+    cache.delete(f'presence:flushed:{user.pk}')
+
+
+def online_user_ids(seconds, exclude=None):
+    """Identifiants des utilisateurs actifs depuis `seconds` secondes, du plus récent au plus ancien"""
+    user_ids = get_backend().online(time.time() - seconds)
+    if exclude is not None:
+        user_ids = [user_id for user_id in user_ids if user_id != exclude]
+    return user_ids
+
+
+def online_count(seconds, exclude=None):
+    if exclude is None:
+        return get_backend().count(time.time() - seconds)
+    return len(online_user_ids(seconds, exclude))
@@ -14,6 +14,7 @@ from .forms import UserRegistrationForm, UserProfileForm, UserUpdateForm
 from core.models import SiteSettings
 from courses.models import Enrollment
 from certificates.models import Certificate
+from forum import leaderboard
 
 def register(request):
     """Inscription d'un nouvel utilisateur"""
@@ -106,6 +107,7 @@ def profile(request, username=None):
         'total_courses': Enrollment.objects.filter(user=user).count(),
         'completed_courses': Enrollment.objects.filter(user=user, is_completed=True).count(),
         'certificates': Certificate.objects.filter(user=user).count(),
+        'forum_contributions': leaderboard.contributions_of(user),
         'join_date': user.date_joined,
     }
     
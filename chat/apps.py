@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat'
-    verbose_name = 'Chat'
\ No newline at end of file
+    verbose_name = 'Chat'
+
+    def ready(self):
+        import chat.signals
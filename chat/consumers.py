@@ -1,61 +1,73 @@
-import json
-from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
 from .models import ChatRoom, Message
+from .persistence import get_writer
+from .realtime import author_payload, room_group_name, serialize_message
+
+MAX_MESSAGE_LENGTH = getattr(settings, 'CHAT_MAX_MESSAGE_LENGTH', 5000)
+
 
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Salon de chat en temps réel.
+    L'auteur provient de la session (`scope['user']`) ; le salon, l'adhésion
+    et le profil de l'auteur sont chargés une seule fois, à la connexion.
+    """
 
-class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        from django.contrib.auth.models import User
-        self.room_name = self.scope['url_route']['kwargs']['room_name']
-        self.room_group_name = f'chat_{self.room_name}'
-
-        # Rejoindre le groupe de la room
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
+        self.user = self.scope.get('user')
+        if self.user is None or not self.user.is_authenticated:
+            await self.close()
+            return
+
+        self.room_id = self.scope['url_route']['kwargs']['room_name']
+        self.room = await self.join_room()
+        if self.room is None:
+            await self.close()
+            return
+
+        self.author = await database_sync_to_async(author_payload)(self.user)
+        self.room_group_name = room_group_name(self.room.pk)
 
+        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
 
     async def disconnect(self, close_code):
-        # Quitter le groupe de la room
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        if getattr(self, 'room_group_name', None):
+            await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        contenu = str(content.get('message', '')).strip()
+        if not contenu:
+            return
+        if len(contenu) > MAX_MESSAGE_LENGTH:
+            await self.send_json({'type': 'error', 'error': 'Message trop long.'})
+            return
 
-    async def receive(self, text_data):
-        text_data_json = json.loads(text_data)
-        message = text_data_json['message']
-        username = text_data_json['username']
-
-        # Sauvegarder le message en base
-        await self.save_message(username, message)
-
-        # Envoyer le message au groupe
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'chat_message',
-                'message': message,
-                'username': username
-            }
+        message = await get_writer().save(
+            Message(salon_id=self.room.pk, auteur_id=self.user.pk, contenu=contenu)
         )
 
-    async def chat_message(self, event):
-        message = event['message']
-        username = event['username']
+        await self.channel_layer.group_send(self.room_group_name, {
+            'type': 'chat.message',
+            'message': serialize_message(message, self.author),
+        })
 
-        # Envoyer le message au WebSocket
-        await self.send(text_data=json.dumps({
-            'message': message,
-            'username': username
-        }))
+    async def chat_message(self, event):
+        await self.send_json({'type': 'message', 'message': event['message']})
 
     @database_sync_to_async
-    def save_message(self, username, message):
-        from django.contrib.auth.models import User
-        user = User.objects.get(username=username)
-        room = ChatRoom.objects.get(id=self.room_name)
-        Message.objects.create(auteur=user, salon=room, contenu=message)
\ No newline at end of file
+    def join_room(self):
+        """Salon accessible à l'utilisateur (il rejoint un salon public, comme dans la vue)"""
+        try:
+            room = ChatRoom.objects.get(pk=self.room_id)
+        except (ChatRoom.DoesNotExist, ValueError):
+            return None
+
+        if not room.participants.filter(pk=self.user.pk).exists():
+            if room.est_prive:
+                return None
+            room.participants.add(self.user)
+        return room
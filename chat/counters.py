@@ -0,0 +1,26 @@
+"""
+Nombre de messages de chaque salon (`ChatRoom.messages_count`), affiché sur
+la page du salon sans compter tout l'historique.
+
+Les lots écrits par le WebSocket (`chat.persistence`, un `bulk_create` sans
+signaux) l'incrémentent directement ; les autres créations et les
+suppressions passent par `chat.signals`. Une requête UPDATE par salon touché.
+"""
+from collections import Counter
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import ChatRoom
+
+
+def adjust(salon_id, delta):
+    # Borné à 0 : un écart du compteur ne doit pas violer la contrainte du PositiveIntegerField
+    ChatRoom.objects.filter(pk=salon_id).update(messages_count=Greatest(F('messages_count') + delta, 0))
+
+
+def record_messages(messages):
+    """Ajoute des messages enregistrés au compteur de leur salon"""
+    for salon_id, count in Counter(message.salon_id for message in messages).items():
+        adjust(salon_id, count)
+
@@ -0,0 +1,60 @@
+"""
+Historique des salons paginé par curseur (keyset).
+
+Les messages sont ordonnés par (timestamp, id) et les curseurs `before` /
+`after` sont des identifiants de message : chaque page est une lecture de
+l'index (salon, timestamp), quel que soit le nombre de messages du salon.
+"""
+from django.conf import settings
+from django.db.models import Q
+
+PAGE_SIZE = getattr(settings, 'CHAT_HISTORY_PAGE_SIZE', 50)
+MAX_PAGE_SIZE = getattr(settings, 'CHAT_HISTORY_MAX_PAGE_SIZE', 100)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def clamp_limit(value):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _cursor_filter(messages, cursor_id, direction):
+    timestamp = messages.filter(pk=cursor_id).values_list('timestamp', flat=True).first()
+    if timestamp is None:
+        raise InvalidCursor(cursor_id)
+    if direction == 'before':
+        return messages.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, pk__lt=cursor_id))
+    return messages.filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, pk__gt=cursor_id))
+
+
+def message_history(salon, before=None, after=None, since=None, limit=PAGE_SIZE):
+    """
+    Retourne `(messages, has_more)` ; les messages sont toujours dans l'ordre chronologique.
+
+    - sans curseur : les `limit` derniers messages (`has_more` : messages plus anciens) ;
+    - `before` : les `limit` messages précédant ce message ;
+    - `after` ou `since` (datetime) : les `limit` messages suivants (`has_more` : messages plus récents).
+    """
+    messages = salon.messages.select_related('auteur__userprofile')
+
+    if after is not None or since is not None:
+        if after is not None:
+            messages = _cursor_filter(messages, after, 'after')
+        else:
+            messages = messages.filter(timestamp__gt=since)
+        page = list(messages.order_by('timestamp', 'pk')[:limit + 1])
+        return page[:limit], len(page) > limit
+
+    if before is not None:
+        messages = _cursor_filter(messages, before, 'before')
+    page = list(messages.order_by('-timestamp', '-pk')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    page.reverse()
+    return page, has_more
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['salon', 'timestamp'], name='chat_message_salon_ts_idx'),
+        ),
+    ]
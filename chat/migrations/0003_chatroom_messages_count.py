@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_messages_count(apps, schema_editor):
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    Message = apps.get_model('chat', 'Message')
+    ChatRoom.objects.update(messages_count=Coalesce(Subquery(
+        Message.objects.filter(salon=OuterRef('pk')).order_by().values('salon')
+        .annotate(total=Count('pk')).values('total')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_message_salon_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='messages_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de messages'),
+        ),
+        migrations.RunPython(populate_messages_count, migrations.RunPython.noop),
+    ]
@@ -2,14 +2,19 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from core.models import CounterFieldsMixin
 
-class ChatRoom(models.Model):
+
+class ChatRoom(CounterFieldsMixin, models.Model):
     """Salon de chat"""
     nom = models.CharField(max_length=100, verbose_name="Nom")
     description = models.TextField(blank=True, verbose_name="Description")
     participants = models.ManyToManyField(User, related_name='chat_rooms', verbose_name="Participants")
     est_prive = models.BooleanField(default=False, verbose_name="Privé")
     cree_le = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+    # Tenu à jour par chat.counters
+    messages_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de messages")
+    counter_fields = ('messages_count',)
     
     class Meta:
         verbose_name = "Salon de Chat"
@@ -32,6 +37,9 @@ class Message(models.Model):
         verbose_name = "Message"
         verbose_name_plural = "Messages"
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['salon', 'timestamp'], name='chat_message_salon_ts_idx'),
+        ]
     
     def __str__(self):
         return f"{self.auteur.username}: {self.contenu[:50]}..."
\ No newline at end of file
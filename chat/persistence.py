@@ -0,0 +1,85 @@
+"""
+Écriture groupée des messages reçus par WebSocket.
+
+Les messages arrivant dans une même fenêtre de quelques millisecondes
+(ou jusqu'à `CHAT_WRITE_BATCH_SIZE` messages) sont insérés en un seul
+`bulk_create`. Chaque émetteur attend l'écriture de son lot avant la
+diffusion, ce qui garantit qu'un message diffusé est toujours persisté.
+"""
+import asyncio
+import weakref
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from .models import Message
+from . import counters
+
+BATCH_SIZE = getattr(settings, 'CHAT_WRITE_BATCH_SIZE', 50)
+BATCH_DELAY = getattr(settings, 'CHAT_WRITE_BATCH_DELAY', 0.05)
+
+
+class MessageWriter:
+    """Tampon d'écriture propre à une boucle asyncio (un par processus ASGI)"""
+
+    def __init__(self, batch_size=BATCH_SIZE, delay=BATCH_DELAY):
+        self.batch_size = batch_size
+        self.delay = delay
+        self.pending = []
+        self.flush_task = None
+
+    async def save(self, message):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((message, future))
+
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self._flush_later())
+
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.delay)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        if self.flush_task is not None and self.flush_task is not asyncio.current_task():
+            self.flush_task.cancel()
+            self.flush_task = None
+
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+
+        try:
+            saved = await database_sync_to_async(self._write)([message for message, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for message, (_, future) in zip(saved, batch):
+            if not future.done():
+                future.set_result(message)
+
+    @staticmethod
+    def _write(messages):
+        with transaction.atomic():
+            saved = Message.objects.bulk_create(messages)
+            counters.record_messages(saved)
+        return saved
+
+
+_writers = weakref.WeakKeyDictionary()
+
+
+def get_writer():
+    loop = asyncio.get_running_loop()
+    writer = _writers.get(loop)
+    if writer is None:
+        writer = _writers[loop] = MessageWriter()
+    return writer
@@ -0,0 +1,48 @@
+"""
+Transport temps réel du chat : nom des groupes Channels et sérialisation
+des messages, partagés par le consumer WebSocket et les vues HTTP de secours.
+"""
+import logging
+from datetime import timezone
+
+from asgiref.sync import async_to_sync
+
+logger = logging.getLogger(__name__)
+
+
+def room_group_name(salon_id):
+    return f'chat_{salon_id}'
+
+
+def author_payload(user):
+    profile = getattr(user, 'userprofile', None)
+    return {
+        'auteur_username': user.username,
+        'auteur_avatar_url': profile.get_avatar_url() if profile else '',
+    }
+
+
+def serialize_message(message, author=None):
+    """Représentation JSON d'un message (identique pour l'API et le WebSocket)"""
+    data = dict(author or author_payload(message.auteur))
+    data.update({
+        'id': message.id,
+        'contenu': message.contenu,
+        'timestamp': message.timestamp.astimezone(timezone.utc).isoformat(timespec='microseconds'),
+    })
+    return data
+
+
+def broadcast_message(salon_id, message_data):
+    """Diffuse un message enregistré hors WebSocket (vue HTTP) aux membres connectés"""
+    try:
+        from channels.layers import get_channel_layer
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(room_group_name(salon_id), {
+            'type': 'chat.message',
+            'message': message_data,
+        })
+    except Exception:
+        logger.exception("Impossible de diffuser le message au salon %s", salon_id)
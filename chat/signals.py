@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import ChatRoom, Message
+from . import counters
+
+
+# --- Nombre de messages des salons ---
+
+@receiver(post_save, sender=Message)
+def count_saved_message(sender, instance, created, **kwargs):
+    # Les lots du WebSocket (bulk_create) sont comptés par chat.persistence
+    if created:
+        counters.adjust(instance.salon_id, 1)
+
+
+@receiver(post_delete, sender=Message)
+def count_deleted_message(sender, instance, origin=None, **kwargs):
+    # Suppression en cascade d'un salon : la ligne à décrémenter disparaît aussi
+    if isinstance(origin, ChatRoom) or getattr(origin, 'model', None) is ChatRoom:
+        return
+    counters.adjust(instance.salon_id, -1)
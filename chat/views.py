@@ -4,17 +4,23 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.utils import timezone as django_timezone # Renommé pour éviter les conflits
-from datetime import datetime, timedelta, timezone # Importation de datetime, timedelta et timezone de la bibliothèque standard
+from datetime import datetime, timedelta # Importation de datetime et timedelta de la bibliothèque standard
 import logging
+from django.db import transaction
 from django.db.models import Q # Importation de Q pour les requêtes complexes
 from django.contrib.auth.models import User # Importation du modèle User
 # from django.views.decorators.csrf import csrf_exempt # Plus nécessaire avec un formulaire HTML standard
 from .models import ChatRoom, Message
 from accounts.models import UserProfile # Importation du UserProfile
+from accounts import presence
 from .forms import ChatRoomForm, InviteMembersForm # Importation du nouveau formulaire
+from .realtime import serialize_message, broadcast_message
+from .history import message_history, clamp_limit, InvalidCursor, PAGE_SIZE
 
 logger = logging.getLogger(__name__) # Initialisation du logger
 
+ONLINE_WINDOW_SECONDS = 90
+
 @login_required
 def liste_salons(request):
     """Affiche la liste des salons de chat"""
@@ -26,14 +32,14 @@ def liste_salons(request):
     # --- Calcul des statistiques dynamiques ---
     
     # Fenêtre de 90 secondes pour considérer un utilisateur comme "en ligne"
-    ninety_seconds_ago = django_timezone.now() - timedelta(seconds=90)
+    online_ids = presence.online_user_ids(ONLINE_WINDOW_SECONDS, exclude=request.user.id)
     
     # Récupérer les profils des utilisateurs en ligne (en excluant l'utilisateur actuel)
     online_users_profiles = UserProfile.objects.filter(
-        last_activity__gte=ninety_seconds_ago
-    ).exclude(user=request.user).select_related('user')
+        user_id__in=online_ids
+    ).select_related('user')
     
-    online_users_count = online_users_profiles.count()
+    online_users_count = len(online_ids)
     
     # Messages (total des messages dans tous les salons accessibles)
     total_messages_count = Message.objects.filter(
@@ -69,7 +75,9 @@ def salon_chat(request, salon_id):
         # Optionnel: Rediriger pour rafraîchir le contexte, ou continuer
         # return redirect('chat:salon_chat', salon_id=salon_id)
 
-    messages_chat = salon.messages.all().order_by('timestamp') # Assurez-vous que les messages sont triés
+    # Seule la dernière page de l'historique est rendue ; les messages plus anciens
+    # sont chargés à la demande par messages_api (?before=<id>)
+    messages_chat, has_older_messages = message_history(salon, limit=PAGE_SIZE)
     
     # Instancier le formulaire d'invitation pour le contexte
     invite_form = InviteMembersForm(chatroom=salon)
@@ -77,6 +85,8 @@ def salon_chat(request, salon_id):
     context = {
         'salon': salon,
         'messages': messages_chat,
+        'messages_count': salon.messages_count,
+        'has_older_messages': has_older_messages,
         'salon_id_json': salon_id,
         'invite_form': invite_form, # Ajouter le formulaire au contexte
     }
@@ -121,17 +131,13 @@ def envoyer_message(request, salon_id):
             auteur=request.user,
             contenu=contenu
         )
+        message_data = serialize_message(message)
+        # Envoi de secours (WebSocket indisponible) : les membres connectés le reçoivent quand même
+        transaction.on_commit(lambda: broadcast_message(salon.id, message_data))
         # Retourner les données du message créé pour l'affichage côté client
         return JsonResponse({
             'status': 'success',
-            'message': {
-                'id': message.id,
-                'auteur_username': message.auteur.username,
-                'auteur_avatar_url': message.auteur.userprofile.get_avatar_url() if hasattr(message.auteur, 'userprofile') else '', # Assurez-vous que UserProfile existe
-                'contenu': message.contenu,
-                'timestamp': message.timestamp.astimezone(timezone.utc).isoformat(timespec='microseconds'), # MODIFIÉ ICI
-                'is_own': True # Indique que c'est le message de l'utilisateur actuel
-            }
+            'message': dict(message_data, is_own=True)
         })
     return JsonResponse({'error': 'Contenu du message vide.'}, status=400)
 
@@ -167,51 +173,56 @@ def invite_members(request, salon_id):
 @login_required
 @require_http_methods(["GET"])
 def messages_api(request, salon_id):
-    """API pour récupérer les messages d'un salon, éventuellement filtrés par timestamp"""
+    """
+    API paginée par curseur des messages d'un salon.
+    Paramètres : `before` ou `after` (id de message), `since` (timestamp ISO), `limit`.
+    """
     salon = get_object_or_404(ChatRoom, id=salon_id, participants=request.user)
-    
+    limit = clamp_limit(request.GET.get('limit'))
+
+    try:
+        before = int(request.GET['before']) if request.GET.get('before') else None
+        after = int(request.GET['after']) if request.GET.get('after') else None
+    except ValueError:
+        return JsonResponse({'error': 'Curseur invalide.'}, status=400)
+
     # Récupérer le timestamp 'since' si fourni
+    since = None
     since_timestamp_str = request.GET.get('since')
-    
-    messages_query = salon.messages.all()
-
-    if since_timestamp_str:
+    if since_timestamp_str and after is None:
         try:
             # Utiliser `fromisoformat` qui est plus robuste
-            since_datetime = datetime.fromisoformat(since_timestamp_str.replace('Z', '+00:00'))
-            
-            messages_query = messages_query.filter(timestamp__gt=since_datetime)
+            since = datetime.fromisoformat(since_timestamp_str.replace('Z', '+00:00'))
         except ValueError as e:
             logger.error(f"Invalid 'since' timestamp format: '{since_timestamp_str}' - Error: {e}")
             return JsonResponse({'error': f'Format de timestamp "since" invalide: {e}'}, status=400)
-            
-    messages_query = messages_query.order_by('timestamp')
-    
+
+    try:
+        page, has_more = message_history(salon, before=before, after=after, since=since, limit=limit)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Curseur invalide.'}, status=400)
+
     messages_data = []
-    for message in messages_query:
-        messages_data.append({
-            'id': message.id,
-            'auteur_username': message.auteur.username,
-            'auteur_avatar_url': message.auteur.userprofile.get_avatar_url() if hasattr(message.auteur, 'userprofile') else '',
-            'contenu': message.contenu,
-            'timestamp': message.timestamp.astimezone(timezone.utc).isoformat(timespec='microseconds'), # MODIFIÉ ICI
-            'is_own': (message.auteur == request.user) # Indique si le message vient de l'utilisateur actuel
-        })
-    
-    return JsonResponse({'messages': messages_data})
+    for message in page:
+        messages_data.append(dict(
+            serialize_message(message),
+            is_own=(message.auteur_id == request.user.id) # Indique si le message vient de l'utilisateur actuel
+        ))
+
+    return JsonResponse({
+        'messages': messages_data,
+        'has_more': has_more,
+    })
 
 @login_required
 @require_http_methods(["GET"])
 def online_users_api(request):
     """API pour récupérer les utilisateurs en ligne."""
-    ninety_seconds_ago = django_timezone.now() - timedelta(seconds=90)
-    
-    online_users_profiles = UserProfile.objects.filter(
-        last_activity__gte=ninety_seconds_ago
-    ).exclude(user=request.user).select_related('user')
+    online_ids = presence.online_user_ids(ONLINE_WINDOW_SECONDS, exclude=request.user.id)
     
     online_users_data = [
-        {'username': profile.user.username} for profile in online_users_profiles
+        {'username': username}
+        for username in User.objects.filter(pk__in=online_ids).values_list('username', flat=True)
     ]
     
     return JsonResponse({
@@ -0,0 +1,159 @@
+"""
+Compteurs tamponnés, écrits en base par lots.
+
+Les incréments sont cumulés hors de la base :
+- dans un hachage Redis quand REDIS_URL est défini (partagé par tous les processus) ;
+- dans la mémoire du processus sinon.
+
+Un thread de fond (un par processus et par tampon) vide le tampon toutes les
+`flush_interval` secondes et passe les valeurs cumulées à `write`, qui les
+écrit en quelques requêtes. Si l'écriture échoue, tout repart dans le tampon
+pour le passage suivant ; le tampon est aussi vidé à l'arrêt du processus.
+Sert aux vues des sujets du forum et aux battements des leçons.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Tampon local au processus"""
+
+    def __init__(self):
+        self.values = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def add(self, key, amount):
+        with self.lock:
+            self.values[key] += amount
+            return self.values[key]
+
+    def drain(self):
+        with self.lock:
+            pending, self.values = self.values, defaultdict(int)
+        return dict(pending)
+
+    def restore(self, pending):
+        with self.lock:
+            for key, amount in pending.items():
+                self.values[key] += amount
+
+
+class RedisBackend:
+    """Tampon partagé dans un hachage Redis ({clé encodée: valeur})"""
+
+    def __init__(self, url, name, encode, decode):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.name = name
+        self.encode = encode
+        self.decode = decode
+
+    def add(self, key, amount):
+        return self.client.hincrby(self.name, self.encode(key), amount)
+
+    def drain(self):
+        # Le renommage est atomique : les incréments suivants repartent d'un hachage vide
+        draining_key = f'{self.name}:draining:{threading.get_ident()}:{time.time()}'
+        try:
+            self.client.rename(self.name, draining_key)
+        except Exception:
+            return {}
+        pipe = self.client.pipeline()
+        pipe.hgetall(draining_key)
+        pipe.delete(draining_key)
+        values = pipe.execute()[0]
+        return {self.decode(field.decode()): int(amount) for field, amount in values.items()}
+
+    def restore(self, pending):
+        pipe = self.client.pipeline()
+        for key, amount in pending.items():
+            pipe.hincrby(self.name, self.encode(key), amount)
+        pipe.execute()
+
+
+class BufferedCounter:
+    """
+    Tampon de compteurs `{clé: valeur}`.
+
+    `name` sert de clé au hachage Redis et de nom au thread ; `encode` et
+    `decode` convertissent une clé en champ Redis et inversement ; `write`
+    reçoit les valeurs drainées et retourne le nombre d'entrées écrites.
+    """
+
+    def __init__(self, name, write, flush_interval, encode=str, decode=int, description=''):
+        self.name = name
+        self.write = write
+        self.flush_interval = flush_interval
+        self.encode = encode
+        self.decode = decode
+        self.description = description or name
+        self._backend = None
+        self._flusher = None
+        self._flusher_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            redis_url = getattr(settings, 'REDIS_URL', '')
+            self._backend = (
+                RedisBackend(redis_url, self.name, self.encode, self.decode) if redis_url else MemoryBackend()
+            )
+        return self._backend
+
+    def add(self, key, amount=1):
+        """Cumule `amount` pour `key` ; retourne la valeur en attente pour cette clé"""
+        pending = self.backend.add(key, amount)
+        self.start_flusher()
+        return pending
+
+    def restore(self, pending):
+        """Remet des valeurs dans le tampon (ex. : reliquat à reporter au passage suivant)"""
+        if pending:
+            self.backend.restore(pending)
+
+    def flush(self):
+        """Écrit les valeurs accumulées ; retourne le résultat de `write`"""
+        pending = self.backend.drain()
+        if not pending:
+            return 0
+        try:
+            return self.write(pending)
+        except Exception:
+            # Rien n'est perdu : tout repart dans le tampon pour le passage suivant
+            self.restore(pending)
+            raise
+
+    def start_flusher(self):
+        """Lance (une fois par processus) le thread qui vide périodiquement le tampon"""
+        if self._flusher is not None:
+            return
+        with self._flusher_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, name=f'{self.name}-flusher', daemon=True)
+                self._flusher.start()
+                atexit.register(self._flush_at_exit)
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Échec de l'écriture du tampon %s", self.description)
+            finally:
+                # Le thread ouvre sa propre connexion : on la libère entre deux passages
+                connection.close()
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Échec de l'écriture du tampon %s à l'arrêt", self.description)
@@ -4,4 +4,6 @@ def site_settings(request):
     """
     Rend les paramètres du site disponibles dans le contexte de tous les templates.
     """
-    return {'settings': SiteSettings.get_settings()}
\ No newline at end of file
+    # Réutilise l'instance chargée par SiteSettingsMiddleware
+    settings = getattr(request, 'settings', None) or SiteSettings.get_settings()
+    return {'settings': settings}
\ No newline at end of file
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        "Vérifie le plan d'exécution des requêtes fréquentes (SQLite) "
+        "et échoue si l'une d'elles parcourt une table entière"
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("L'analyse des plans n'est implémentée que pour SQLite")
+        results = query_plans.check()
+
+        failures = []
+        for name, plan, scans in results:
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"✗ {name} : parcours complet de {', '.join(scans)}"))
+            else:
+                self.stdout.write(f"✓ {name}")
+            if scans or options['verbosity'] > 1:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f"{len(failures)} requête(s) sans index utilisable : {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} plan(s) vérifié(s), aucun parcours complet."))
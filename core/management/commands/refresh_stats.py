@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.stats import REFRESH_INTERVAL, USER_CHUNK_SIZE, refresh_all
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de l'accueil, du forum et des tableaux de bord"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=USER_CHUNK_SIZE, help="Nombre d'utilisateurs traités par lot")
+        parser.add_argument('--loop', action='store_true', help="Recalculer en continu")
+        parser.add_argument('--interval', type=int, default=REFRESH_INTERVAL, help="Pause entre deux passages en mode --loop (secondes)")
+
+    def handle(self, *args, **options):
+        while True:
+            users = refresh_all(chunk_size=options['chunk_size'])
+            self.stdout.write(f"Statistiques recalculées ({users} utilisateur(s)).")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
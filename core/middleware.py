@@ -1,6 +1,7 @@
 from .models import SiteSettings
 
 class SiteSettingsMiddleware:
+    """Charge une seule fois par requête les paramètres du site (`request.settings`)"""
     def __init__(self, get_response):
         self.get_response = get_response
 
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0009_galleryimage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True, verbose_name='Clé')),
+                ('data', models.JSONField(default=dict, verbose_name='Valeurs')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Calculé le')),
+            ],
+            options={
+                'verbose_name': 'Instantané de statistiques',
+                'verbose_name_plural': 'Instantanés de statistiques',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_enrollments', models.PositiveIntegerField(default=0, verbose_name='Inscriptions')),
+                ('completed_courses', models.PositiveIntegerField(default=0, verbose_name='Cours terminés')),
+                ('certificates_earned', models.PositiveIntegerField(default=0, verbose_name='Certificats obtenus')),
+                ('forum_posts', models.PositiveIntegerField(default=0, verbose_name='Messages sur le forum')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Calculé le')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Statistiques utilisateur',
+                'verbose_name_plural': 'Statistiques utilisateurs',
+            },
+        ),
+    ]
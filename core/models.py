@@ -1,5 +1,9 @@
+import threading
+import time
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.utils import timezone
 from ckeditor.fields import RichTextField
 
@@ -145,12 +149,46 @@ class SiteSettings(models.Model):
     def __str__(self):
         return self.site_name
 
+    # Copie locale au processus, valable tant que la version partagée ne change pas
+    # et au plus LOCAL_TTL secondes : sans Redis, le cache (donc la version) est
+    # propre à chaque processus et une modification n'y serait jamais vue.
+    VERSION_CACHE_KEY = 'core:site_settings_version'
+    LOCAL_TTL = 30
+    _local = {'version': None, 'instance': None, 'expires': 0}
+    _lock = threading.Lock()
+
     @classmethod
     def get_settings(cls):
-        """Récupère les paramètres du site (singleton)"""
-        settings, created = cls.objects.get_or_create(pk=1)
+        """
+        Récupère les paramètres du site (singleton).
+        Une lecture du cache, et une requête au plus toutes les LOCAL_TTL secondes
+        tant que les paramètres ne changent pas ;
+        l'instance retournée est partagée et ne doit pas être modifiée.
+        """
+        version = cache.get(cls.VERSION_CACHE_KEY)
+        if version is None:
+            # Version horodatée : elle ne peut pas coïncider avec une copie antérieure
+            cache.add(cls.VERSION_CACHE_KEY, int(time.time() * 1000), None)
+            version = cache.get(cls.VERSION_CACHE_KEY)
+
+        local = cls._local
+        if local['instance'] is not None and local['version'] == version and time.monotonic() < local['expires']:
+            return local['instance']
+
+        with cls._lock:
+            settings, created = cls.objects.get_or_create(pk=1)
+            cls._local = {'version': version, 'instance': settings, 'expires': time.monotonic() + cls.LOCAL_TTL}
         return settings
 
+    @classmethod
+    def invalidate_cache(cls):
+        """Force le rechargement des paramètres dans tous les processus"""
+        try:
+            cache.incr(cls.VERSION_CACHE_KEY)
+        except ValueError:
+            cache.add(cls.VERSION_CACHE_KEY, int(time.time() * 1000), None)
+        cls._local = {'version': None, 'instance': None, 'expires': 0}
+
 
 class GalleryImage(models.Model):
     """Modèle pour la galerie d'images"""
@@ -211,4 +249,63 @@ class FAQ(models.Model):
         ordering = ['category', 'order', 'question']
 
     def __str__(self):
-        return self.question
\ No newline at end of file
+        return self.question
+
+class StatsSnapshot(models.Model):
+    """Compteurs globaux calculés périodiquement (voir `core.stats`)"""
+    key = models.CharField(max_length=50, unique=True, verbose_name="Clé")
+    data = models.JSONField(default=dict, verbose_name="Valeurs")
+    computed_at = models.DateTimeField(default=timezone.now, verbose_name="Calculé le")
+
+    class Meta:
+        verbose_name = "Instantané de statistiques"
+        verbose_name_plural = "Instantanés de statistiques"
+
+    def __str__(self):
+        return self.key
+
+
+class UserStats(models.Model):
+    """Compteurs du tableau de bord d'un utilisateur, calculés périodiquement"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='stats', verbose_name="Utilisateur")
+    total_enrollments = models.PositiveIntegerField(default=0, verbose_name="Inscriptions")
+    completed_courses = models.PositiveIntegerField(default=0, verbose_name="Cours terminés")
+    certificates_earned = models.PositiveIntegerField(default=0, verbose_name="Certificats obtenus")
+    forum_posts = models.PositiveIntegerField(default=0, verbose_name="Messages sur le forum")
+    computed_at = models.DateTimeField(default=timezone.now, verbose_name="Calculé le")
+
+    class Meta:
+        verbose_name = "Statistiques utilisateur"
+        verbose_name_plural = "Statistiques utilisateurs"
+
+    def __str__(self):
+        return f"Statistiques de {self.user.username}"
+
+    @property
+    def completion_rate(self):
+        if not self.total_enrollments:
+            return 0
+        return round(self.completed_courses / self.total_enrollments * 100, 1)
+
+
+class CounterFieldsMixin:
+    """
+    Exclut les compteurs dénormalisés (`counter_fields`) des sauvegardes complètes.
+
+    Ces colonnes ne sont écrites que par des UPDATE avec F() ; un `save()`
+    d'une instance chargée avant un incrément réécrirait l'ancienne valeur.
+    Une instance existante n'enregistre donc que ses autres champs, sauf si
+    `update_fields` est donné explicitement.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not args and not self._state.adding and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
@@ -0,0 +1,188 @@
+"""
+Pagination par clé (keyset / curseur) pour les longues listes.
+
+Au lieu de `OFFSET n`, chaque page reprend après (ou avant) la dernière
+ligne affichée : `WHERE (a, b, id) < (…)` dans l'ordre du tri. Le coût d'une
+page ne dépend donc que de sa taille, quelle que soit sa profondeur, et le
+`COUNT(*)` n'est fait que sur demande (`count='exact'`) ou plafonné
+(`count='approximate'` : on compte au plus `count_limit` lignes).
+
+Le dernier champ du tri doit être unique (en pratique `id`) et les champs
+du tri ne doivent pas être nuls. Le curseur est un jeton opaque passé dans
+le paramètre `cursor` de l'URL ; un curseur invalide ramène à la première page.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+CURSOR_PARAM = 'cursor'
+DEFAULT_COUNT_LIMIT = 1000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Garde les microsecondes des dates (DjangoJSONEncoder les tronque), sans quoi l'égalité du curseur échoue"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def parse_ordering(ordering):
+    """('-created_at', 'id') → [('created_at', True), ('id', False)] (True : décroissant)"""
+    return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps({'d': direction, 'v': values}, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Retourne `(direction, valeurs)` ; direction 'n' (page suivante) ou 'p' (précédente)"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        direction, values = payload['d'], payload['v']
+    except (ValueError, TypeError, KeyError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor(token)
+    if direction not in ('n', 'p') or not isinstance(values, list):
+        raise InvalidCursor(token)
+    return direction, values
+
+
+def keyset_filter(fields, values, backwards=False):
+    """
+    Condition « après `values` » dans l'ordre `fields` (ou « avant » si `backwards`) :
+    (a < va) OU (a = va ET b < vb) OU … selon le sens de chaque champ.
+    """
+    condition = Q()
+    for position, (name, descending) in enumerate(fields):
+        lookup = 'lt' if descending != backwards else 'gt'
+        clause = Q(**{f'{name}__{lookup}': values[position]})
+        for previous_position, (previous_name, _) in enumerate(fields[:position]):
+            clause &= Q(**{previous_name: values[previous_position]})
+        condition |= clause
+    return condition
+
+
+def cursor_values(obj, fields):
+    return [obj.pk if name == 'pk' else getattr(obj, name) for name, _ in fields]
+
+
+class KeysetPage:
+    """Page de résultats ; s'utilise dans les gabarits comme une `Page` de Django"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, count=None, count_is_exact=True):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_is_exact = count_is_exact
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Pagine un queryset selon `ordering` (ex. `('-created_at', '-id')`).
+
+    `count` : None (pas de comptage), 'exact' ou 'approximate'.
+    """
+
+    def __init__(self, queryset, ordering, per_page, count=None, count_limit=DEFAULT_COUNT_LIMIT):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.fields = parse_ordering(self.ordering)
+        self.per_page = per_page
+        self.count_mode = count
+        self.count_limit = count_limit
+
+    def _to_python(self, values):
+        if len(values) != len(self.fields):
+            raise InvalidCursor(values)
+        converted = []
+        for (name, _), value in zip(self.fields, values):
+            try:
+                field = self.queryset.model._meta.pk if name == 'pk' else self.queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Annotation (rang de pertinence…) : valeur JSON telle quelle
+                converted.append(value)
+                continue
+            try:
+                converted.append(field.to_python(value))
+            except ValidationError:
+                raise InvalidCursor(values)
+        return converted
+
+    def _count(self):
+        if self.count_mode == 'exact':
+            return self.queryset.count(), True
+        if self.count_mode == 'approximate':
+            # Sous-requête limitée : le coût est borné par `count_limit`
+            count = self.queryset.order_by()[:self.count_limit].count()
+            return count, count < self.count_limit
+        return None, True
+
+    def get_page(self, cursor=None):
+        direction, values = 'n', None
+        if cursor:
+            try:
+                direction, values = decode_cursor(cursor)
+                values = self._to_python(values)
+            except InvalidCursor:
+                direction, values = 'n', None
+
+        backwards = direction == 'p'
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(self.fields, values, backwards))
+        if backwards:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+        else:
+            ordering = self.ordering
+
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        if backwards and not rows:
+            return self.get_page()
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        has_next = has_more if not backwards else True
+        has_previous = values is not None if not backwards else has_more
+        count, count_is_exact = self._count()
+
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor('n', cursor_values(rows[-1], self.fields)) if rows and has_next else None,
+            previous_cursor=encode_cursor('p', cursor_values(rows[0], self.fields)) if rows and has_previous else None,
+            count=count,
+            count_is_exact=count_is_exact,
+        )
@@ -0,0 +1,84 @@
+"""
+Plans d'exécution des requêtes fréquentes du site.
+
+Chaque entrée de `HOT_QUERIES` reproduit la forme d'une requête chaude
+(filtres et tri des vues concernées) ; `check` demande son plan à la base
+(`EXPLAIN QUERY PLAN` sous SQLite) et signale les parcours complets de
+table, signe qu'un index manque ou n'est plus utilisable. Vérifié par
+`core.tests` et, à la demande, par `manage.py check_query_plans`.
+"""
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from chat.models import Message
+from courses.deadlines import expired_attempts
+from courses.models import Course, Lesson
+from forum.leaderboard import current_period_start
+from forum.models import ContributorScore, ForumPost, ForumTopic
+from live_sessions.models import LiveSession
+from notifications.models import Notification
+from payments.models import Payment
+
+User = get_user_model()
+
+# Identifiants quelconques : le plan ne dépend pas de l'existence des lignes
+SAMPLE_ID = 1
+
+# « SCAN table » sans index (« SCAN TABLE table » avant SQLite 3.36)
+FULL_SCAN = re.compile(r'\bSCAN (?:TABLE )?(?P<table>\w+)(?P<rest>.*)$')
+
+
+def _hot_queries():
+    now = timezone.now()
+    return [
+        ("Notifications non lues", Notification.objects.filter(
+            user_id=SAMPLE_ID, is_read=False).order_by('-created_at')),
+        ("Fil de notifications", Notification.objects.filter(
+            user_id=SAMPLE_ID).order_by('-created_at', '-id')[:21]),
+        ("Historique du chat", Message.objects.filter(
+            salon_id=SAMPLE_ID).order_by('-timestamp', '-pk')[:51]),
+        ("Membres actifs", UserProfile.objects.filter(
+            last_activity__gte=now - timedelta(days=30))),
+        ("Derniers cours (accueil)", Course.objects.filter(
+            is_published=True).order_by('-created_at')[:6]),
+        ("Catalogue par catégorie", Course.objects.filter(
+            category_id=SAMPLE_ID, is_published=True).order_by('-created_at', '-id')[:13]),
+        ("Plan d'un cours", Lesson.objects.filter(
+            course_id=SAMPLE_ID, is_published=True).order_by('order', 'pk')),
+        ("Sessions live à venir", LiveSession.objects.filter(
+            status='scheduled', start_time__gt=now).order_by('start_time')),
+        ("Historique des paiements", Payment.objects.filter(
+            user_id=SAMPLE_ID).order_by('-created_at', '-id')[:21]),
+        ("Sujets d'une catégorie", ForumTopic.objects.filter(
+            categorie_id=SAMPLE_ID).order_by('-est_epingle', '-derniere_activite', '-id')[:21]),
+        ("Derniers sujets actifs", ForumTopic.objects.order_by('-derniere_activite')[:5]),
+        ("Réponses d'un sujet", ForumPost.objects.filter(
+            sujet_id=SAMPLE_ID).order_by('cree_le', 'id')[:11]),
+        ("Top contributeurs", ContributorScore.objects.filter(
+            period='all', period_start=current_period_start('all'), contributions__gt=0
+        ).order_by('-contributions', 'user_id')[:3]),
+        ("Tentatives de quiz expirées", expired_attempts(now).order_by('pk')[:500]),
+    ]
+
+
+def full_scans(plan):
+    """Tables parcourues entièrement dans un plan SQLite"""
+    tables = []
+    for line in plan.splitlines():
+        match = FULL_SCAN.search(line)
+        if match and 'USING' not in match.group('rest') and match.group('table') != 'CONSTANT':
+            tables.append(match.group('table'))
+    return tables
+
+
+def check():
+    """Liste de `(nom, plan, tables parcourues entièrement)` pour chaque requête chaude (SQLite)"""
+    results = []
+    for name, queryset in _hot_queries():
+        plan = queryset.explain()
+        results.append((name, plan, full_scans(plan)))
+    return results
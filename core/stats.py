@@ -0,0 +1,151 @@
+"""
+Compteurs de l'accueil, du forum et du tableau de bord, calculés périodiquement.
+
+Les pages ne comptent plus rien à chaque affichage : elles lisent un
+instantané (`StatsSnapshot` pour les compteurs globaux, `UserStats` pour
+chaque utilisateur). `manage.py refresh_stats --loop` les recalcule toutes
+les STATS_REFRESH_INTERVAL secondes. Sans ce processus, un instantané absent
+ou trop ancien est recalculé par la première requête qui le lit (une seule à
+la fois grâce à un verrou `cache.add`).
+
+L'instantané global est aussi gardé dans le cache pour éviter la lecture en
+base ; il est stocké en table pour être partagé même avec un cache local au
+processus.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from certificates.models import Certificate
+from courses.models import Course, Enrollment
+from forum.models import ForumTopic, ForumPost
+
+from .models import StatsSnapshot, UserStats
+
+User = get_user_model()
+
+REFRESH_INTERVAL = getattr(settings, 'STATS_REFRESH_INTERVAL', 5 * 60)
+# Au-delà, l'instantané est recalculé à la lecture (l'agrégateur ne tourne pas)
+STALE_AFTER = timedelta(seconds=2 * REFRESH_INTERVAL)
+ACTIVE_MEMBER_DAYS = 30
+USER_CHUNK_SIZE = 1000
+
+GLOBAL_KEY = 'global'
+GLOBAL_CACHE_KEY = 'core:stats:global'
+LOCK_TIMEOUT = 60
+
+
+def compute_global():
+    """Compteurs globaux (accueil et forum) ; les top contributeurs viennent de `forum.leaderboard`"""
+    return {
+        'total_courses': Course.objects.filter(is_published=True).count(),
+        'total_students': User.objects.filter(is_active=True).count(),
+        'total_enrollments': Enrollment.objects.count(),
+        'total_topics': ForumTopic.objects.count(),
+        'total_posts': ForumPost.objects.count(),
+        'active_members': User.objects.filter(
+            userprofile__last_activity__gte=timezone.now() - timedelta(days=ACTIVE_MEMBER_DAYS)
+        ).count(),
+        'resolved_topics': ForumTopic.objects.filter(est_resolu=True).count(),
+    }
+
+
+def refresh_global():
+    data = compute_global()
+    StatsSnapshot.objects.update_or_create(
+        key=GLOBAL_KEY, defaults={'data': data, 'computed_at': timezone.now()}
+    )
+    cache.set(GLOBAL_CACHE_KEY, data, REFRESH_INTERVAL)
+    return data
+
+
+def global_stats():
+    """Dernier instantané des compteurs globaux"""
+    data = cache.get(GLOBAL_CACHE_KEY)
+    if data is not None:
+        return data
+
+    snapshot = StatsSnapshot.objects.filter(key=GLOBAL_KEY).first()
+    if snapshot is None or (_is_stale(snapshot.computed_at) and _acquire(GLOBAL_KEY)):
+        return refresh_global()
+    cache.set(GLOBAL_CACHE_KEY, snapshot.data, REFRESH_INTERVAL)
+    return snapshot.data
+
+
+def compute_user_stats(user_ids):
+    """{user_id: {compteur: valeur}} pour un lot d'utilisateurs, en trois requêtes groupées"""
+    rows = {
+        user_id: {'total_enrollments': 0, 'completed_courses': 0, 'certificates_earned': 0, 'forum_posts': 0}
+        for user_id in user_ids
+    }
+    enrollments = Enrollment.objects.filter(user_id__in=user_ids).values('user_id').annotate(
+        total=Count('pk'), completed=Count('pk', filter=Q(is_completed=True))
+    )
+    for row in enrollments:
+        rows[row['user_id']]['total_enrollments'] = row['total']
+        rows[row['user_id']]['completed_courses'] = row['completed']
+
+    certificates = Certificate.objects.filter(user_id__in=user_ids, is_valid=True).values('user_id').annotate(total=Count('pk'))
+    for row in certificates:
+        rows[row['user_id']]['certificates_earned'] = row['total']
+
+    # Messages du forum : sujets ouverts et réponses
+    for model in (ForumTopic, ForumPost):
+        for row in model.objects.filter(auteur_id__in=user_ids).values('auteur_id').annotate(total=Count('pk')):
+            rows[row['auteur_id']]['forum_posts'] += row['total']
+    return rows
+
+
+def refresh_user_stats(user_ids):
+    """Recalcule et enregistre les compteurs d'un lot d'utilisateurs"""
+    now = timezone.now()
+    objects = [
+        UserStats(user_id=user_id, computed_at=now, **values)
+        for user_id, values in compute_user_stats(list(user_ids)).items()
+    ]
+    UserStats.objects.bulk_create(
+        objects,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['total_enrollments', 'completed_courses', 'certificates_earned', 'forum_posts', 'computed_at'],
+    )
+    return objects
+
+
+def refresh_all_user_stats(chunk_size=USER_CHUNK_SIZE):
+    """Recalcule les compteurs de tous les utilisateurs, lot par lot ; retourne leur nombre"""
+    total = 0
+    last_pk = 0
+    while True:
+        user_ids = list(User.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not user_ids:
+            return total
+        refresh_user_stats(user_ids)
+        total += len(user_ids)
+        last_pk = user_ids[-1]
+
+
+def user_stats(user):
+    """Dernier instantané des compteurs d'un utilisateur"""
+    stats = UserStats.objects.filter(user=user).first()
+    if stats is None or (_is_stale(stats.computed_at) and _acquire(f'user:{user.pk}')):
+        stats = refresh_user_stats([user.pk])[0]
+    return stats
+
+
+def refresh_all(chunk_size=USER_CHUNK_SIZE):
+    refresh_global()
+    return refresh_all_user_stats(chunk_size)
+
+
+def _is_stale(computed_at):
+    return computed_at < timezone.now() - STALE_AFTER
+
+
+def _acquire(name):
+    """Un seul recalcul à la lecture à la fois ; les autres requêtes lisent l'ancien instantané"""
+    return cache.add(f'core:stats:lock:{name}', True, LOCK_TIMEOUT)
@@ -0,0 +1,22 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from . import query_plans
+
+
+@skipUnless(connection.vendor == 'sqlite', "Plans lus avec EXPLAIN QUERY PLAN (SQLite)")
+class HotQueryPlansTests(TestCase):
+    """Les requêtes fréquentes doivent rester servies par un index"""
+
+    def test_no_full_table_scan(self):
+        for name, plan, scans in query_plans.check():
+            with self.subTest(query=name):
+                self.assertEqual(scans, [], f"Parcours complet de {', '.join(scans)} :\n{plan}")
+
+    def test_full_scans_detection(self):
+        self.assertEqual(query_plans.full_scans('SCAN courses_course'), ['courses_course'])
+        self.assertEqual(query_plans.full_scans('SCAN TABLE courses_course'), ['courses_course'])
+        self.assertEqual(query_plans.full_scans('SCAN courses_course USING INDEX courses_published_recent_idx'), [])
+        self.assertEqual(query_plans.full_scans('SEARCH payments_payment USING INDEX payments_user_history_idx (user_id=?)'), [])
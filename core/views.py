@@ -9,8 +9,9 @@ from datetime import datetime
 from django.conf import settings
 
 from .models import SiteSettings, Testimonial, FAQ, GalleryImage
+from . import stats
 from courses.models import Course, Enrollment
-from notifications.models import Notification
+from notifications.feed import notification_feed
 
 User = get_user_model()
 
@@ -33,17 +34,11 @@ def home(request):
         is_active=True
     )[:3]
     
-    stats = {
-        'total_courses': Course.objects.filter(is_published=True).count(),
-        'total_students': User.objects.filter(is_active=True).count(),
-        'total_enrollments': Enrollment.objects.count(),
-    }
-    
     context = {
         'settings': settings,
         'latest_courses': latest_courses,
         'testimonials': featured_testimonials,
-        'stats': stats,
+        'stats': stats.global_stats(),
     }
     
     return render(request, 'core/home.html', context)
@@ -85,10 +80,7 @@ def dashboard(request):
         is_completed=True
     ).select_related('course')[:3]
     
-    recent_notifications = Notification.objects.filter(
-        user=user,
-        is_read=False
-    ).order_by('-created_at')[:5]
+    recent_notifications = notification_feed(user, 'unread')[:5]
     
     upcoming_sessions = []
     try:
@@ -100,19 +92,8 @@ def dashboard(request):
     except ImportError:
         pass
     
-    user_stats = {
-        'total_enrollments': Enrollment.objects.filter(user=user).count(),
-        'completed_courses': Enrollment.objects.filter(user=user, is_completed=True).count(),
-        'certificates_earned': 0,
-        'forum_posts': 0,
-    }
-    
-    if user_stats['total_enrollments'] > 0:
-        user_stats['completion_rate'] = round(
-            (user_stats['completed_courses'] / user_stats['total_enrollments']) * 100, 1
-        )
-    else:
-        user_stats['completion_rate'] = 0
+    # Compteurs recalculés périodiquement (voir core.stats)
+    user_stats = stats.user_stats(user)
     
     context = {
         'settings': settings,
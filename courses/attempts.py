@@ -0,0 +1,81 @@
+"""
+Numérotation des tentatives de quiz.
+
+Le numéro d'une nouvelle tentative et le contrôle de `max_attempts` passent
+par une seule mise à jour conditionnelle du `QuizAttemptCounter` de
+l'élève : la ligne reste verrouillée jusqu'à la fin de la transaction, si
+bien que deux démarrages simultanés ne peuvent ni obtenir le même numéro ni
+dépasser la limite. `last_number` ne redescend jamais (les numéros ne sont
+pas réutilisés) ; `attempts_count` est décrémenté quand une tentative est
+supprimée, ce qui rend une tentative à l'élève.
+"""
+from django.db import transaction
+from django.db.models import F, Max
+
+from .models import QuizAttempt, QuizAttemptCounter
+
+
+def _counter(user_id, quiz_id):
+    def last_number():
+        # Compteur absent : on repart des tentatives déjà enregistrées
+        return QuizAttempt.objects.filter(user_id=user_id, quiz_id=quiz_id).aggregate(
+            last=Max('attempt_number')
+        )['last'] or 0
+
+    def attempts_count():
+        return QuizAttempt.objects.filter(user_id=user_id, quiz_id=quiz_id).count()
+
+    counter, _ = QuizAttemptCounter.objects.get_or_create(
+        user_id=user_id,
+        quiz_id=quiz_id,
+        defaults={'last_number': last_number, 'attempts_count': attempts_count},
+    )
+    return counter
+
+
+def reserve_attempt_number(user_id, quiz_id, max_attempts=None):
+    """
+    Réserve le numéro de la prochaine tentative. Retourne None si l'élève a
+    déjà atteint `max_attempts`. À appeler dans la transaction qui crée la
+    tentative pour que la réservation soit annulée avec elle.
+    """
+    with transaction.atomic():
+        counter = _counter(user_id, quiz_id)
+        counters = QuizAttemptCounter.objects.filter(pk=counter.pk)
+        if max_attempts is not None:
+            counters = counters.filter(attempts_count__lt=max_attempts)
+
+        if not counters.update(last_number=F('last_number') + 1, attempts_count=F('attempts_count') + 1):
+            return None
+        # La ligne est verrouillée par la mise à jour : la valeur lue est la nôtre
+        return QuizAttemptCounter.objects.filter(pk=counter.pk).values_list('last_number', flat=True).get()
+
+
+def start_attempt(enrollment, snapshot, deadline_at):
+    """Crée une tentative numérotée, ou retourne None si la limite est atteinte"""
+    with transaction.atomic():
+        number = reserve_attempt_number(enrollment.user_id, snapshot['id'], snapshot['max_attempts'])
+        if number is None:
+            return None
+        return QuizAttempt.objects.create(
+            user_id=enrollment.user_id,
+            quiz_id=snapshot['id'],
+            enrollment=enrollment,
+            attempt_number=number,
+            total_points=snapshot['total_points'],
+            deadline_at=deadline_at,
+        )
+
+
+def attempts_count(user_id, quiz_id):
+    counter = QuizAttemptCounter.objects.filter(user_id=user_id, quiz_id=quiz_id).first()
+    if counter is None:
+        return QuizAttempt.objects.filter(user_id=user_id, quiz_id=quiz_id).count()
+    return counter.attempts_count
+
+
+def release(user_id, quiz_id):
+    """Une tentative a été supprimée : elle ne compte plus dans la limite"""
+    QuizAttemptCounter.objects.filter(
+        user_id=user_id, quiz_id=quiz_id, attempts_count__gt=0
+    ).update(attempts_count=F('attempts_count') - 1)
@@ -0,0 +1,127 @@
+"""
+Catalogue des cours (`course_list`, `category_courses`) servi depuis le cache.
+
+La liste rendue (grille de cours et pagination) est mise en cache pour
+chaque combinaison normalisée (catégorie, niveau, gratuit, recherche, tri,
+curseur de page), ainsi que la liste des catégories. Toutes les clés contiennent une
+génération : les signaux de `courses.signals` (cours, catégories, avis) la
+renouvellent, ce qui périme d'un coup toutes les pages du catalogue.
+Les compteurs mis à jour sans signal (inscriptions, leçons) sont rafraîchis
+au plus tard après CATALOG_CACHE_TIMEOUT secondes.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from core.pagination import CURSOR_PARAM, KeysetPaginator
+from search.engine import search_courses
+
+from .models import Course, Category
+
+CATALOG_TIMEOUT = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 5 * 60)
+PAGE_SIZE = 12
+MAX_SEARCH_LENGTH = 100
+MAX_CURSOR_LENGTH = 200
+
+GENERATION_KEY = 'courses:catalog_generation'
+
+# Tri → ordre de pagination par clé (le dernier champ départage les égalités)
+SORTS = {
+    'relevance': ('search_rank', 'id'),
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+    'popular': ('-enrollments_count', '-created_at', '-id'),
+    'rating': ('-rating_average', '-reviews_count', '-id'),
+    'price_low': ('price', 'id'),
+    'price_high': ('-price', '-id'),
+}
+
+
+def generation():
+    version = cache.get(GENERATION_KEY)
+    if version is None:
+        # Une génération horodatée ne peut pas coïncider avec une génération antérieure à une éviction
+        cache.add(GENERATION_KEY, int(time.time() * 1000), None)
+        version = cache.get(GENERATION_KEY)
+    return version
+
+
+def invalidate():
+    """Périme toutes les pages du catalogue, après le commit (sinon une page pourrait être recalculée sur les anciennes lignes)"""
+    transaction.on_commit(lambda: cache.delete(GENERATION_KEY))
+
+
+def normalize(params, category_slug=None):
+    """Filtres de la requête ramenés à une forme canonique (la clé du cache)"""
+    search = ' '.join((params.get('search') or '').split())[:MAX_SEARCH_LENGTH]
+    difficulty = params.get('difficulty') or ''
+    if difficulty not in dict(Course.DIFFICULTY_CHOICES):
+        difficulty = ''
+    sort = params.get('sort') or ('relevance' if search else 'newest')
+    if sort not in SORTS or (sort == 'relevance' and not search):
+        sort = 'newest'
+
+    return {
+        'category': category_slug or (params.get('category') or '').strip(),
+        'difficulty': difficulty,
+        'free': 'true' if params.get('free') == 'true' else '',
+        'search': search,
+        'sort': sort,
+        'cursor': (params.get(CURSOR_PARAM) or '')[:MAX_CURSOR_LENGTH],
+    }
+
+
+def _key(name, *parts):
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'courses:catalog:{generation()}:{name}:{digest}'
+
+
+def filtered_courses(query):
+    courses = Course.objects.filter(is_published=True).select_related('category', 'instructor')
+
+    if query['category']:
+        courses = courses.filter(category__slug=query['category'])
+    if query['difficulty']:
+        courses = courses.filter(difficulty=query['difficulty'])
+    if query['free']:
+        courses = courses.filter(is_free=True)
+    if query['search']:
+        # Rang de pertinence annoté (`search_rank`), utilisé par le tri 'relevance'
+        courses = search_courses(courses, query['search'])
+    return courses
+
+
+def query_string(query):
+    """Paramètres à reporter dans les liens de pagination (sans le curseur)"""
+    params = [(name, query[name]) for name in ['category', 'search', 'difficulty', 'free', 'sort'] if query[name]]
+    return '&' + urlencode(params) if params else ''
+
+
+def render_listing(query):
+    """Grille de cours et pagination rendues, depuis le cache si possible"""
+    key = _key('listing', *sorted(query.items()))
+    html = cache.get(key)
+    if html is None:
+        paginator = KeysetPaginator(filtered_courses(query), SORTS[query['sort']], PAGE_SIZE, count='approximate')
+        page_obj = paginator.get_page(query['cursor'])
+        html = render_to_string('courses/includes/course_grid.html', {
+            'page_obj': page_obj,
+            'current_search': query['search'],
+            'query_string': query_string(query),
+        })
+        cache.set(key, html, CATALOG_TIMEOUT)
+    return html
+
+
+def active_categories():
+    key = _key('categories')
+    categories = cache.get(key)
+    if categories is None:
+        categories = list(Category.objects.filter(is_active=True))
+        cache.set(key, categories, CATALOG_TIMEOUT)
+    return categories
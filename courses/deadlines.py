@@ -0,0 +1,132 @@
+"""
+Date limite des tentatives de quiz, tenue côté serveur.
+
+Chaque tentative reçoit à sa création une date limite : la durée du quiz
+s'il est chronométré, sinon QUIZ_ABANDON_AFTER_HOURS (une tentative
+abandonnée finit ainsi toujours par être close). Une réponse arrivée après
+la date limite (plus QUIZ_DEADLINE_GRACE_SECONDS pour la latence réseau)
+est refusée sans requête supplémentaire.
+
+`expire_attempts` clôt en masse les tentatives expirées : une mise à jour
+par lot calcule points, score et réussite en SQL. Elle est appelée par
+`manage.py expire_quiz_attempts` et, pour un seul élève, au démarrage d'un quiz.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, ExpressionWrapper, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from .models import Quiz, QuizAttempt, StudentAnswer
+from . import progress
+
+GRACE_SECONDS = getattr(settings, 'QUIZ_DEADLINE_GRACE_SECONDS', 15)
+ABANDON_AFTER_HOURS = getattr(settings, 'QUIZ_ABANDON_AFTER_HOURS', 24)
+BATCH_SIZE = 500
+
+
+def deadline_for(snapshot, started_at):
+    """Date limite d'une tentative commencée à `started_at`"""
+    if snapshot['time_limit_minutes']:
+        return started_at + timedelta(minutes=snapshot['time_limit_minutes'])
+    return started_at + timedelta(hours=ABANDON_AFTER_HOURS)
+
+
+def is_late(attempt, now=None):
+    """La tentative a dépassé sa date limite (délai de grâce compris)"""
+    if attempt.deadline_at is None:
+        return False
+    now = now or timezone.now()
+    return now > attempt.deadline_at + timedelta(seconds=GRACE_SECONDS)
+
+
+def remaining_seconds(attempt, now=None):
+    if attempt.deadline_at is None:
+        return None
+    now = now or timezone.now()
+    return max(0, int((attempt.deadline_at - now).total_seconds()))
+
+
+def elapsed_seconds(attempt, now=None):
+    """Temps passé mesuré par le serveur, borné par la date limite"""
+    now = now or timezone.now()
+    if attempt.deadline_at is not None:
+        now = min(now, attempt.deadline_at)
+    return max(0, int((now - attempt.started_at).total_seconds()))
+
+
+def expired_attempts(now=None):
+    now = now or timezone.now()
+    return QuizAttempt.objects.filter(
+        status='in_progress',
+        deadline_at__lt=now - timedelta(seconds=GRACE_SECONDS),
+    )
+
+
+def _final_values():
+    """Expressions SQL du résultat d'une tentative (points, score, réussite)"""
+    earned = Coalesce(Subquery(
+        StudentAnswer.objects.filter(attempt=OuterRef('pk'))
+        .order_by().values('attempt').annotate(total=Sum('points_earned')).values('total')
+    ), 0)
+    score = Case(
+        When(total_points=0, then=Value(0.0)),
+        default=Round(ExpressionWrapper(earned * 100.0 / F('total_points'), output_field=FloatField()), 2),
+        output_field=FloatField(),
+    )
+    passing_score = Subquery(Quiz.objects.filter(pk=OuterRef('quiz_id')).values('passing_score'))
+    is_passed = Case(
+        When(Q(total_points__gt=0) & GreaterThanOrEqual(score, passing_score), then=Value(True)),
+        default=Value(False),
+    )
+    return {'earned_points': earned, 'score': score, 'is_passed': is_passed}
+
+
+def expire_attempts(queryset=None, now=None, batch_size=BATCH_SIZE):
+    """
+    Clôt les tentatives expirées (`status='time_expired'`), lot par lot.
+    Retourne le nombre de tentatives clôturées.
+    """
+    now = now or timezone.now()
+    attempts = expired_attempts(now)
+    if queryset is not None:
+        attempts = attempts & queryset
+
+    total = 0
+    cursor = 0
+    while True:
+        rows = list(
+            attempts.filter(pk__gt=cursor).order_by('pk')
+            .values_list('pk', 'started_at', 'deadline_at')[:batch_size]
+        )
+        if not rows:
+            break
+        cursor = rows[-1][0]
+
+        # Le temps passé ne dépend que de la durée autorisée : une mise à jour par durée
+        by_duration = defaultdict(list)
+        for pk, started_at, deadline_at in rows:
+            by_duration[max(0, int((deadline_at - started_at).total_seconds()))].append(pk)
+
+        attempt_ids = [row[0] for row in rows]
+        with transaction.atomic():
+            for duration, ids in by_duration.items():
+                # La condition sur le statut laisse de côté les tentatives terminées entre-temps
+                total += QuizAttempt.objects.filter(pk__in=ids, status='in_progress').update(
+                    status='time_expired',
+                    completed_at=F('deadline_at'),
+                    time_spent_seconds=duration,
+                    **_final_values(),
+                )
+
+            passed = QuizAttempt.objects.filter(
+                pk__in=attempt_ids, status='time_expired', is_passed=True
+            ).select_related('enrollment', 'quiz__lesson')
+            for attempt in passed:
+                progress.complete_lesson(attempt.enrollment, attempt.quiz.lesson)
+
+    return total
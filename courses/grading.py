@@ -0,0 +1,196 @@
+"""
+Correction des tentatives de quiz.
+
+Les réponses sont corrigées en mémoire à partir de l'instantané du quiz
+(`quiz_cache`), qui contient déjà les bonnes réponses et les mots-clés de
+chaque question : aucune requête n'est faite pour relire les `Answer`.
+Une feuille de réponses (une ou plusieurs questions) est enregistrée avec
+deux `bulk_create` (réponses puis liens vers les réponses choisies), et la
+tentative est clôturée par une seule mise à jour conditionnelle.
+
+Format d'une feuille : `{question_id: {'answer_ids': [...], 'text_answer': '', 'time_spent': 0}}`
+ou une liste d'entrées portant chacune un `question_id`.
+"""
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Lesson, QuizAttempt, StudentAnswer
+from . import progress
+
+FINISHED_STATUSES = ('completed', 'time_expired')
+
+
+def grade(question, answer_ids=(), text_answer=''):
+    """
+    Corrige une question de l'instantané. Retourne `(is_correct, points_earned)`.
+    `answer_ids` doit être filtré et trié dans l'ordre des réponses proposées.
+    """
+    points = question['points']
+
+    if question['type'] == 'multiple_choice':
+        if set(answer_ids) == set(question['correct_ids']):
+            return True, points
+        return False, 0
+
+    if question['type'] == 'true_false':
+        correct_ids = question['correct_ids']
+        if correct_ids and answer_ids and answer_ids[0] == correct_ids[0]:
+            return True, points
+        return False, 0
+
+    # Texte libre
+    keywords = question['keywords']
+    if keywords and text_answer:
+        user_answer = text_answer.lower()
+        found = [keyword for keyword in keywords if keyword in user_answer]
+        if not found:
+            return False, 0
+        # Score partiel basé sur le nombre de mots-clés trouvés
+        ratio = len(found) / len(keywords)
+        return ratio >= 0.5, int(points * ratio)
+
+    # Pas de mots-clés définis : points accordés si la réponse n'est pas vide
+    if text_answer.strip():
+        return True, points
+    return False, 0
+
+
+def _entries(sheet):
+    if isinstance(sheet, dict):
+        return [dict(entry, question_id=question_id) for question_id, entry in sheet.items()]
+    return list(sheet)
+
+
+def _as_int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def read_sheet(snapshot, sheet):
+    """
+    Valide une feuille de réponses contre l'instantané : les questions et
+    réponses étrangères au quiz sont ignorées. Retourne une liste de
+    `(question, answer_ids, text_answer, time_spent)`.
+    """
+    questions = {question['id']: question for question in snapshot['questions']}
+    rows = {}
+    for entry in _entries(sheet):
+        question = questions.get(_as_int(entry.get('question_id'), None))
+        if question is None:
+            continue
+
+        if question['type'] == 'text':
+            answer_ids = []
+            text_answer = str(entry.get('text_answer') or '')
+        else:
+            selected = entry.get('answer_ids') or []
+            if not isinstance(selected, list):
+                selected = [selected]
+            selected = {_as_int(answer_id, None) for answer_id in selected}
+            answer_ids = [answer['id'] for answer in question['answers'] if answer['id'] in selected]
+            text_answer = ''
+
+        time_spent = max(0, _as_int(entry.get('time_spent')))
+        rows[question['id']] = (question, answer_ids, text_answer, time_spent)
+    return list(rows.values())
+
+
+def record_answers(attempt, snapshot, sheet):
+    """
+    Corrige et enregistre une feuille de réponses pour une tentative en cours.
+    Une question déjà répondue est remplacée. Retourne `{question_id: StudentAnswer}`.
+    """
+    rows = read_sheet(snapshot, sheet)
+    if not rows:
+        return {}
+
+    student_answers = []
+    for question, answer_ids, text_answer, time_spent in rows:
+        is_correct, points_earned = grade(question, answer_ids, text_answer)
+        student_answer = StudentAnswer(
+            attempt=attempt,
+            question_id=question['id'],
+            text_answer=text_answer,
+            is_correct=is_correct,
+            points_earned=points_earned,
+            time_spent_seconds=time_spent,
+        )
+        student_answer.answer_ids = answer_ids
+        student_answers.append(student_answer)
+
+    Link = StudentAnswer.selected_answers.through
+    with transaction.atomic():
+        StudentAnswer.objects.filter(
+            attempt=attempt, question_id__in=[sa.question_id for sa in student_answers]
+        ).delete()
+        StudentAnswer.objects.bulk_create(student_answers)
+        Link.objects.bulk_create([
+            Link(studentanswer_id=student_answer.pk, answer_id=answer_id)
+            for student_answer in student_answers
+            for answer_id in student_answer.answer_ids
+        ])
+
+    return {student_answer.question_id: student_answer for student_answer in student_answers}
+
+
+def finalize_attempt(attempt, snapshot, status='completed', time_spent=0, sheet=None):
+    """
+    Clôture une tentative : enregistre la feuille éventuelle, additionne les
+    points en base et écrit le score en une seule mise à jour, dans une même
+    transaction. Retourne False si la tentative était déjà terminée.
+    """
+    if status not in FINISHED_STATUSES:
+        status = 'completed'
+    now = timezone.now()
+
+    with transaction.atomic():
+        if sheet:
+            record_answers(attempt, snapshot, sheet)
+
+        earned = StudentAnswer.objects.filter(attempt=attempt).aggregate(
+            total=Sum('points_earned')
+        )['total'] or 0
+        total = attempt.total_points
+        score = round(earned / total * 100, 2) if total else 0
+        is_passed = bool(total) and score >= snapshot['passing_score']
+
+        # La condition sur le statut empêche une double clôture concurrente
+        finished = QuizAttempt.objects.filter(pk=attempt.pk, status='in_progress').update(
+            status=status,
+            earned_points=earned,
+            score=score,
+            is_passed=is_passed,
+            completed_at=now,
+            time_spent_seconds=max(0, _as_int(time_spent)),
+        )
+        if not finished:
+            return False
+
+        attempt.status = status
+        attempt.earned_points = earned
+        attempt.score = score
+        attempt.is_passed = is_passed
+        attempt.completed_at = now
+        attempt.time_spent_seconds = max(0, _as_int(time_spent))
+
+        if is_passed:
+            # Mettre à jour la progression du cours (compteurs atomiques)
+            lesson = Lesson.objects.only('pk', 'is_published').get(pk=snapshot['lesson_id'])
+            progress.complete_lesson(attempt.enrollment, lesson)
+
+    return True
+
+
+def correction(question):
+    """Données de correction renvoyées après une réponse"""
+    data = {'points_possible': question['points'], 'explanation': question['explanation']}
+    if question['type'] in ['multiple_choice', 'true_false']:
+        correct_ids = set(question['correct_ids'])
+        data['correct_answers'] = [
+            {'id': answer['id'], 'text': answer['text']}
+            for answer in question['answers'] if answer['id'] in correct_ids
+        ]
+    return data
@@ -0,0 +1,109 @@
+"""
+Temps passé par leçon, mesuré par des battements (heartbeats) de la page
+d'apprentissage.
+
+Un battement n'est compté qu'une fois par `LEARNING_HEARTBEAT_INTERVAL`
+secondes pour un même couple (inscription, leçon) : le verrou est un
+`cache.add`. Les secondes comptées sont cumulées dans un tampon
+`core.buffers` (hachage Redis quand REDIS_URL est défini, mémoire du
+processus sinon).
+
+Un thread de fond vide le tampon toutes les `LEARNING_HEARTBEAT_FLUSH_INTERVAL`
+secondes et ajoute les minutes entières à `LessonProgress.time_spent_minutes`
+en une insertion groupée et une mise à jour par lot ; les secondes restantes
+sont reportées au passage suivant. `manage.py flush_heartbeats` fait de même
+à la demande.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+
+from core.buffers import BufferedCounter
+
+from .models import Enrollment, Lesson, LessonProgress
+
+HEARTBEAT_INTERVAL = getattr(settings, 'LEARNING_HEARTBEAT_INTERVAL', 30)
+FLUSH_INTERVAL = getattr(settings, 'LEARNING_HEARTBEAT_FLUSH_INTERVAL', 60)
+# Marge pour qu'un battement légèrement en avance ne soit pas ignoré
+HEARTBEAT_TOLERANCE = 5
+UPDATE_CHUNK_SIZE = 200
+
+
+def _beat_key(enrollment_id, lesson_id):
+    return f'courses:heartbeat:{enrollment_id}:{lesson_id}'
+
+
+def record_heartbeat(enrollment_id, lesson_id):
+    """
+    Compte un battement pour une leçon. Retourne False si un battement a déjà
+    été compté pendant l'intervalle en cours.
+    """
+    if not cache.add(_beat_key(enrollment_id, lesson_id), True, max(1, HEARTBEAT_INTERVAL - HEARTBEAT_TOLERANCE)):
+        return False
+    buffer.add((enrollment_id, lesson_id), HEARTBEAT_INTERVAL)
+    return True
+
+
+def write_minutes(minutes):
+    """Ajoute des minutes à `LessonProgress.time_spent_minutes` ({(inscription, leçon): minutes})"""
+    # Inscriptions ou leçons supprimées depuis le battement : ignorées
+    enrollment_ids = Enrollment.objects.filter(
+        pk__in={enrollment_id for enrollment_id, _ in minutes}
+    ).values_list('pk', flat=True)
+    lesson_ids = Lesson.objects.filter(pk__in={lesson_id for _, lesson_id in minutes}).values_list('pk', flat=True)
+    enrollment_ids, lesson_ids = set(enrollment_ids), set(lesson_ids)
+    minutes = {
+        (enrollment_id, lesson_id): delta for (enrollment_id, lesson_id), delta in minutes.items()
+        if enrollment_id in enrollment_ids and lesson_id in lesson_ids
+    }
+    if not minutes:
+        return
+    with transaction.atomic():
+        # Première interaction avec la leçon : la progression est créée ici
+        LessonProgress.objects.bulk_create([
+            LessonProgress(enrollment_id=enrollment_id, lesson_id=lesson_id)
+            for enrollment_id, lesson_id in minutes
+        ], ignore_conflicts=True)
+
+        pairs = list(minutes.items())
+        for start in range(0, len(pairs), UPDATE_CHUNK_SIZE):
+            chunk = pairs[start:start + UPDATE_CHUNK_SIZE]
+            condition = Q()
+            whens = []
+            for (enrollment_id, lesson_id), delta in chunk:
+                condition |= Q(enrollment_id=enrollment_id, lesson_id=lesson_id)
+                whens.append(When(enrollment_id=enrollment_id, lesson_id=lesson_id, then=Value(delta)))
+            LessonProgress.objects.filter(condition).update(
+                time_spent_minutes=F('time_spent_minutes') + Case(*whens, default=Value(0))
+            )
+
+
+
+def write_seconds(pending):
+    """Écrit les minutes entières ({(inscription, leçon): secondes}) ; les secondes restantes sont reportées"""
+    minutes = {pair: seconds // 60 for pair, seconds in pending.items() if seconds >= 60}
+    remainders = {pair: seconds % 60 for pair, seconds in pending.items() if seconds % 60}
+    write_minutes(minutes)
+    buffer.restore(remainders)
+    return len(minutes)
+
+
+def _encode_pair(pair):
+    return '{}:{}'.format(*pair)
+
+
+def _decode_pair(field):
+    enrollment_id, lesson_id = field.split(':')
+    return int(enrollment_id), int(lesson_id)
+
+
+buffer = BufferedCounter(
+    'courses:heartbeats', write_seconds, FLUSH_INTERVAL,
+    encode=_encode_pair, decode=_decode_pair, description="des temps de lecture",
+)
+
+
+def flush():
+    """Écrit les minutes entières accumulées ; retourne le nombre de leçons mises à jour"""
+    return buffer.flush()
@@ -0,0 +1,105 @@
+"""
+Chargement de l'interface d'apprentissage (`learn_course`).
+
+Le plan d'un cours (leçons publiées : titre, slug, ordre, type, durée,
+présence d'un quiz) est construit en une requête puis gardé dans le cache ;
+les signaux de `courses.signals` l'invalident à chaque modification d'une
+leçon ou d'un quiz. Une page ne lit ensuite que les leçons terminées par
+l'élève et le contenu de la leçon affichée. Aucune `LessonProgress` n'est
+créée à l'affichage : elle l'est quand l'élève termine la leçon.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import Lesson, LessonProgress, Quiz
+
+# À incrémenter quand la structure du plan change
+OUTLINE_VERSION = 1
+OUTLINE_TIMEOUT = 60 * 60 * 24
+
+
+def _outline_key(course_id):
+    return f'courses:outline:v{OUTLINE_VERSION}:{course_id}'
+
+
+def build_outline(course_id):
+    lessons = Lesson.objects.filter(course_id=course_id, is_published=True).annotate(
+        has_quiz=Exists(Quiz.objects.filter(lesson=OuterRef('pk')))
+    ).order_by('order', 'pk')
+    return [
+        {
+            'id': lesson.id,
+            'title': lesson.title,
+            'slug': lesson.slug,
+            'order': lesson.order,
+            'lesson_type': lesson.lesson_type,
+            'lesson_type_display': lesson.get_lesson_type_display(),
+            'duration_minutes': lesson.duration_minutes,
+            'has_quiz': lesson.has_quiz,
+        } for lesson in lessons
+    ]
+
+
+def get_outline(course_id):
+    """Plan du cours (leçons publiées dans l'ordre), depuis le cache si possible"""
+    outline = cache.get(_outline_key(course_id))
+    if outline is None:
+        outline = build_outline(course_id)
+        cache.set(_outline_key(course_id), outline, OUTLINE_TIMEOUT)
+    return outline
+
+
+def invalidate(*course_ids):
+    """Oublie les plans après le commit, pour qu'ils ne soient pas reconstruits depuis les anciennes lignes"""
+    keys = [_outline_key(course_id) for course_id in course_ids if course_id]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class LearningSession:
+    """
+    Ce dont la page d'apprentissage a besoin pour une inscription : plan du
+    cours annoté de l'état de chaque leçon, leçon courante, leçons voisines.
+    """
+
+    def __init__(self, enrollment, lesson_slug=None):
+        self.enrollment = enrollment
+        outline = get_outline(enrollment.course_id)
+
+        completed_ids = set(
+            LessonProgress.objects.filter(enrollment=enrollment, is_completed=True)
+            .values_list('lesson_id', flat=True)
+        ) if outline else set()
+
+        self.lessons = [dict(entry, is_completed=entry['id'] in completed_ids) for entry in outline]
+        self.current_index = self._current_index(lesson_slug)
+
+    def _current_index(self, lesson_slug):
+        if not self.lessons:
+            return None
+        if lesson_slug:
+            return next((i for i, entry in enumerate(self.lessons) if entry['slug'] == lesson_slug), None)
+        # Première leçon non terminée ou première leçon
+        return next((i for i, entry in enumerate(self.lessons) if not entry['is_completed']), 0)
+
+    @property
+    def current(self):
+        return self.lessons[self.current_index] if self.current_index is not None else None
+
+    @property
+    def previous(self):
+        if self.current_index:
+            return self.lessons[self.current_index - 1]
+        return None
+
+    @property
+    def next(self):
+        if self.current_index is not None and self.current_index + 1 < len(self.lessons):
+            return self.lessons[self.current_index + 1]
+        return None
+
+    def load_current_lesson(self):
+        """Contenu complet de la leçon courante"""
+        lesson = Lesson.objects.get(pk=self.current['id'])
+        lesson.has_quiz = self.current['has_quiz']
+        return lesson
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.deadlines import BATCH_SIZE, expire_attempts
+
+
+class Command(BaseCommand):
+    help = "Clôt les tentatives de quiz dont la date limite est dépassée (statut « Temps expiré »)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Nombre de tentatives clôturées par lot")
+        parser.add_argument('--loop', action='store_true', help="Continuer à surveiller les tentatives")
+        parser.add_argument('--interval', type=int, default=60, help="Pause entre deux passages en mode --loop (secondes)")
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_attempts(batch_size=options['batch_size'])
+            if expired or not options['loop']:
+                self.stdout.write(f"{expired} tentative(s) expirée(s) clôturée(s).")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
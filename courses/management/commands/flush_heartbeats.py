@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from courses.heartbeats import flush
+
+
+class Command(BaseCommand):
+    help = "Écrit dans LessonProgress les temps de lecture accumulés par les battements de la page d'apprentissage"
+
+    def handle(self, *args, **options):
+        updated = flush()
+        self.stdout.write(self.style.SUCCESS(f"Temps de lecture mis à jour pour {updated} leçon(s)."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from courses import progress, stats
+from courses.models import Course, Enrollment
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les statistiques dénormalisées des cours (leçons, inscriptions, avis, note moyenne) "
+        "et la progression des inscriptions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='course_ids', help="Limiter à ce cours (répétable)")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Nombre de cours recalculés par requête")
+
+    def handle(self, *args, **options):
+        courses = Course.objects.order_by('pk')
+        if options['course_ids']:
+            courses = courses.filter(pk__in=options['course_ids'])
+
+        chunk_size = options['chunk_size']
+        cursor = 0
+        total = 0
+        while True:
+            course_ids = list(courses.filter(pk__gt=cursor).values_list('pk', flat=True)[:chunk_size])
+            if not course_ids:
+                break
+
+            total += stats.recompute(Course.objects.filter(pk__in=course_ids))
+            progress.recompute(Enrollment.objects.filter(course_id__in=course_ids))
+            cursor = course_ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Statistiques de {total} cours recalculées."))
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:44
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_course_stats(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    courses = Course.objects.annotate(
+        n_lessons=Count('lessons', distinct=True),
+        n_enrollments=Count('enrollments', distinct=True),
+    )
+    for course in courses.iterator():
+        reviews = course.reviews.filter(is_approved=True).aggregate(n=Count('pk'), total=Sum('rating'))
+        reviews_count = reviews['n'] or 0
+        rating_sum = reviews['total'] or 0
+        Course.objects.filter(pk=course.pk).update(
+            lessons_count=course.n_lessons,
+            enrollments_count=course.n_enrollments,
+            reviews_count=reviews_count,
+            rating_sum=rating_sum,
+            rating_average=rating_sum / reviews_count if reviews_count else 0,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_alter_lesson_is_published'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrollments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre d'inscriptions"),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lessons_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de leçons'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_average',
+            field=models.FloatField(default=0, editable=False, verbose_name='Note moyenne'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Somme des notes approuvées'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre d'avis approuvés"),
+        ),
+        migrations.RunPython(populate_course_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_progress_counters(apps, schema_editor):
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Lesson = apps.get_model('courses', 'Lesson')
+    LessonProgress = apps.get_model('courses', 'LessonProgress')
+
+    Enrollment.objects.update(
+        published_lessons=Coalesce(Subquery(
+            Lesson.objects.filter(course=OuterRef('course'), is_published=True)
+            .order_by().values('course').annotate(total=Count('pk')).values('total')
+        ), 0),
+        completed_lessons=Coalesce(Subquery(
+            LessonProgress.objects.filter(enrollment=OuterRef('pk'), is_completed=True, lesson__is_published=True)
+            .order_by().values('enrollment').annotate(total=Count('pk')).values('total')
+        ), 0),
+    )
+    for enrollment in Enrollment.objects.filter(published_lessons__gt=0).iterator():
+        percentage = min(100, enrollment.completed_lessons * 100 // enrollment.published_lessons)
+        if percentage != enrollment.progress_percentage:
+            Enrollment.objects.filter(pk=enrollment.pk).update(progress_percentage=percentage)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_course_denormalized_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Leçons terminées'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='published_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Leçons publiées'),
+        ),
+        migrations.RunPython(populate_progress_counters, migrations.RunPython.noop),
+    ]
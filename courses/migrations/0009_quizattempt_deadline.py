@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:52
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_deadlines(apps, schema_editor):
+    QuizAttempt = apps.get_model('courses', 'QuizAttempt')
+    abandon_after = timedelta(hours=getattr(settings, 'QUIZ_ABANDON_AFTER_HOURS', 24))
+
+    attempts = []
+    for attempt in QuizAttempt.objects.filter(status='in_progress').select_related('quiz').iterator():
+        limit = attempt.quiz.time_limit_minutes
+        attempt.deadline_at = attempt.started_at + (timedelta(minutes=limit) if limit else abandon_after)
+        attempts.append(attempt)
+    QuizAttempt.objects.bulk_update(attempts, ['deadline_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_enrollment_progress_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='deadline_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date limite'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['status', 'deadline_at'], name='courses_attempt_deadline_idx'),
+        ),
+        migrations.RunPython(populate_deadlines, migrations.RunPython.noop),
+    ]
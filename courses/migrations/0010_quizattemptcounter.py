@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Max
+
+
+def populate_counters(apps, schema_editor):
+    QuizAttempt = apps.get_model('courses', 'QuizAttempt')
+    QuizAttemptCounter = apps.get_model('courses', 'QuizAttemptCounter')
+
+    rows = QuizAttempt.objects.order_by().values('user_id', 'quiz_id').annotate(
+        last=Max('attempt_number'), total=Count('pk')
+    )
+    QuizAttemptCounter.objects.bulk_create([
+        QuizAttemptCounter(
+            user_id=row['user_id'], quiz_id=row['quiz_id'], last_number=row['last'], attempts_count=row['total']
+        ) for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('courses', '0009_quizattempt_deadline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizAttemptCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_number', models.PositiveIntegerField(default=0, verbose_name='Dernier numéro attribué')),
+                ('attempts_count', models.PositiveIntegerField(default=0, verbose_name='Nombre de tentatives')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_counters', to='courses.quiz', verbose_name='Quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Compteur de tentatives',
+                'verbose_name_plural': 'Compteurs de tentatives',
+                'unique_together': {('user', 'quiz')},
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,12 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils.text import slugify
 import uuid
 
+from core.models import CounterFieldsMixin
+
 
 class Category(models.Model):
     """Catégories de cours"""
@@ -30,7 +33,7 @@ class Category(models.Model):
         super().save(*args, **kwargs)
 
 
-class Course(models.Model):
+class Course(CounterFieldsMixin, models.Model):
     """Modèle de cours"""
     DIFFICULTY_CHOICES = [
         ('beginner', 'Débutant'),
@@ -77,6 +80,14 @@ class Course(models.Model):
     # Suivi de notification
     notification_sent = models.BooleanField(default=False, verbose_name="Notification envoyée")
     
+    # Statistiques dénormalisées (tenues à jour par courses.signals, voir courses.stats)
+    lessons_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de leçons")
+    enrollments_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre d'inscriptions")
+    reviews_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre d'avis approuvés")
+    rating_sum = models.PositiveIntegerField(default=0, editable=False, verbose_name="Somme des notes approuvées")
+    rating_average = models.FloatField(default=0, editable=False, verbose_name="Note moyenne")
+    counter_fields = ('lessons_count', 'enrollments_count', 'reviews_count', 'rating_sum', 'rating_average')
+    
     # Métadonnées
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -85,6 +96,13 @@ class Course(models.Model):
         verbose_name = "Cours"
         verbose_name_plural = "Cours"
         ordering = ['-created_at']
+        indexes = [
+            # Accueil et catalogue : cours publiés, récents d'abord, par catégorie.
+            # Index partiels : Django écrit `WHERE is_published` (sans `= 1`),
+            # forme qu'un index dont is_published est la première colonne ne sert pas.
+            models.Index(fields=['-created_at'], condition=Q(is_published=True), name='courses_published_recent_idx'),
+            models.Index(fields=['category', '-created_at'], condition=Q(is_published=True), name='courses_category_pub_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -99,22 +117,21 @@ class Course(models.Model):
 
     @property
     def total_lessons(self):
-        return self.lessons.count()
+        return self.lessons_count
 
     @property
     def total_enrollments(self):
-        return self.enrollments.count()
+        return self.enrollments_count
 
     @property
     def average_rating(self):
-        reviews = self.reviews.filter(is_approved=True)
-        if reviews.exists():
-            return round(reviews.aggregate(models.Avg('rating'))['rating__avg'], 1)
+        if self.reviews_count:
+            return round(self.rating_average, 1)
         return 0
 
     @property
     def total_reviews(self):
-        return self.reviews.filter(is_approved=True).count()
+        return self.reviews_count
 
 
 class Lesson(models.Model):
@@ -155,6 +172,10 @@ class Lesson(models.Model):
         verbose_name_plural = "Leçons"
         ordering = ['course', 'order']
         unique_together = ['course', 'slug']
+        indexes = [
+            # Plan du cours : leçons publiées dans l'ordre (index partiel, voir Course)
+            models.Index(fields=['course', 'order'], condition=Q(is_published=True), name='courses_lesson_outline_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
@@ -168,7 +189,7 @@ class Lesson(models.Model):
         return reverse('courses:lesson_detail', kwargs={'course_slug': self.course.slug, 'lesson_slug': self.slug})
 
 
-class Enrollment(models.Model):
+class Enrollment(CounterFieldsMixin, models.Model):
     """Inscriptions aux cours"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Utilisateur")
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments', verbose_name="Cours")
@@ -176,6 +197,10 @@ class Enrollment(models.Model):
     is_completed = models.BooleanField(default=False, verbose_name="Terminé")
     completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Date de fin")
     progress_percentage = models.PositiveIntegerField(default=0, verbose_name="Progression (%)")
+    # Compteurs de progression (tenus à jour par courses.progress)
+    completed_lessons = models.PositiveIntegerField(default=0, editable=False, verbose_name="Leçons terminées")
+    published_lessons = models.PositiveIntegerField(default=0, editable=False, verbose_name="Leçons publiées")
+    counter_fields = ('completed_lessons', 'published_lessons')
     
     class Meta:
         verbose_name = "Inscription"
@@ -186,22 +211,18 @@ class Enrollment(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.course.title}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.published_lessons:
+            self.published_lessons = self.course.lessons.filter(is_published=True).count()
+        super().save(*args, **kwargs)
+
     def update_progress(self):
-        """Mettre à jour la progression"""
-        total_lessons = self.course.lessons.count()
-        if total_lessons > 0:
-            completed_lessons = LessonProgress.objects.filter(
-                enrollment=self,
-                is_completed=True
-            ).count()
-            self.progress_percentage = int((completed_lessons / total_lessons) * 100)
-            
-            if self.progress_percentage == 100 and not self.is_completed:
-                self.is_completed = True
-                from django.utils import timezone
-                self.completed_at = timezone.now()
-            
-            self.save()
+        """Recalculer la progression depuis les leçons terminées"""
+        from .progress import recompute
+        recompute(Enrollment.objects.filter(pk=self.pk))
+        self.refresh_from_db(fields=[
+            'completed_lessons', 'published_lessons', 'progress_percentage', 'is_completed', 'completed_at',
+        ])
 
 
 class LessonProgress(models.Model):
@@ -331,6 +352,7 @@ class QuizAttempt(models.Model):
     # Temps
     started_at = models.DateTimeField(auto_now_add=True, verbose_name="Commencé à")
     completed_at = models.DateTimeField(null=True, blank=True, verbose_name="Terminé à")
+    deadline_at = models.DateTimeField(null=True, blank=True, verbose_name="Date limite")
     time_spent_seconds = models.PositiveIntegerField(default=0, verbose_name="Temps passé (secondes)")
     
     # Résultats
@@ -341,6 +363,10 @@ class QuizAttempt(models.Model):
         verbose_name_plural = "Tentatives de quiz"
         unique_together = ['user', 'quiz', 'attempt_number']
         ordering = ['-started_at']
+        indexes = [
+            # Recherche des tentatives expirées par `manage.py expire_quiz_attempts`
+            models.Index(fields=['status', 'deadline_at'], name='courses_attempt_deadline_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.quiz.title} - Tentative {self.attempt_number}"
@@ -353,12 +379,9 @@ class QuizAttempt(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.attempt_number:
-            # Calculer le numéro de tentative
-            last_attempt = QuizAttempt.objects.filter(
-                user=self.user, 
-                quiz=self.quiz
-            ).order_by('-attempt_number').first()
-            self.attempt_number = (last_attempt.attempt_number + 1) if last_attempt else 1
+            # Réserver le numéro de tentative (compteur verrouillé, sans limite)
+            from .attempts import reserve_attempt_number
+            self.attempt_number = reserve_attempt_number(self.user_id, self.quiz_id)
         
         # Calculer le score
         if self.total_points > 0:
@@ -368,6 +391,24 @@ class QuizAttempt(models.Model):
         super().save(*args, **kwargs)
 
 
+class QuizAttemptCounter(models.Model):
+    """Compteur de tentatives par élève et par quiz, réservé atomiquement"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Utilisateur")
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempt_counters', verbose_name="Quiz")
+    
+    # Dernier numéro attribué (jamais réutilisé) et nombre de tentatives existantes
+    last_number = models.PositiveIntegerField(default=0, verbose_name="Dernier numéro attribué")
+    attempts_count = models.PositiveIntegerField(default=0, verbose_name="Nombre de tentatives")
+    
+    class Meta:
+        verbose_name = "Compteur de tentatives"
+        verbose_name_plural = "Compteurs de tentatives"
+        unique_together = ['user', 'quiz']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.quiz.title} ({self.attempts_count})"
+
+
 class StudentAnswer(models.Model):
     """Réponses données par les étudiants"""
     attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name='student_answers', verbose_name="Tentative")
@@ -0,0 +1,92 @@
+"""
+Progression des inscriptions.
+
+Chaque `Enrollment` conserve le nombre de leçons publiées du cours et le
+nombre de ces leçons terminées par l'élève. Terminer une leçon incrémente
+le compteur avec `F()` dans la même transaction que la `LessonProgress`,
+et le pourcentage est recalculé par la même requête UPDATE : deux onglets
+qui terminent des leçons en même temps ne peuvent pas s'écraser.
+
+Publier, dépublier ou supprimer une leçon recalcule en masse les compteurs
+de toutes les inscriptions du cours (`recompute`).
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from .models import Enrollment, Lesson, LessonProgress
+
+
+def _percentage(completed, published):
+    return Case(
+        When(Q(published_lessons__gt=0), then=Least(Value(100), completed * 100 / published)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _completion_updates(completed, published, now):
+    """Expressions marquant le cours terminé quand toutes les leçons publiées le sont"""
+    done = Q(published_lessons__gt=0, is_completed=False, published_lessons__lte=completed)
+    return {
+        'is_completed': Case(When(done, then=Value(True)), default=F('is_completed')),
+        'completed_at': Case(When(done, then=Value(now)), default=F('completed_at')),
+    }
+
+
+def complete_lesson(enrollment, lesson):
+    """
+    Marque une leçon comme terminée pour une inscription.
+    Retourne True si elle vient d'être terminée (False si elle l'était déjà) ;
+    `enrollment` est alors rechargé avec sa nouvelle progression.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        progress, created = LessonProgress.objects.get_or_create(
+            enrollment=enrollment,
+            lesson=lesson,
+            defaults={'is_completed': True, 'completed_at': now},
+        )
+        newly_completed = created or LessonProgress.objects.filter(
+            pk=progress.pk, is_completed=False
+        ).update(is_completed=True, completed_at=now) == 1
+
+        if newly_completed and lesson.is_published:
+            completed = F('completed_lessons') + 1
+            Enrollment.objects.filter(pk=enrollment.pk).update(
+                completed_lessons=completed,
+                progress_percentage=_percentage(completed, F('published_lessons')),
+                # Les expressions d'un UPDATE lisent l'ancienne ligne : on compare à completed + 1
+                **_completion_updates(completed, F('published_lessons'), now),
+            )
+
+    if newly_completed:
+        enrollment.refresh_from_db(fields=[
+            'completed_lessons', 'published_lessons', 'progress_percentage', 'is_completed', 'completed_at',
+        ])
+    return newly_completed
+
+
+def recompute(enrollments):
+    """Recalcule en masse les compteurs et la progression des inscriptions données"""
+    published = Coalesce(Subquery(
+        Lesson.objects.filter(course=OuterRef('course'), is_published=True)
+        .order_by().values('course').annotate(total=Count('pk')).values('total')
+    ), 0)
+    completed = Coalesce(Subquery(
+        LessonProgress.objects.filter(enrollment=OuterRef('pk'), is_completed=True, lesson__is_published=True)
+        .order_by().values('enrollment').annotate(total=Count('pk')).values('total')
+    ), 0)
+
+    with transaction.atomic():
+        updated = enrollments.update(published_lessons=published, completed_lessons=completed)
+        enrollments.update(
+            progress_percentage=_percentage(F('completed_lessons'), F('published_lessons')),
+            **_completion_updates(F('completed_lessons'), F('published_lessons'), timezone.now()),
+        )
+    return updated
+
+
+def recompute_course(course_id):
+    return recompute(Enrollment.objects.filter(course_id=course_id))
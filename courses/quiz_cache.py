@@ -0,0 +1,127 @@
+"""
+Instantané compilé des quiz.
+
+Un quiz (questions, réponses proposées, total des points, ensembles de
+bonnes réponses) est construit une seule fois avec des prefetch puis gardé
+dans le cache sous forme de dictionnaire. Les signaux de `courses.signals`
+l'invalident à chaque modification d'un `Quiz`, d'une `Question` ou d'une
+`Answer`. Les bonnes réponses ne doivent jamais être envoyées au client :
+utiliser `public_questions`.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .models import Quiz, Question, Answer
+
+# À incrémenter quand la structure de l'instantané change
+SNAPSHOT_VERSION = 1
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+NO_QUIZ = 0
+
+
+def _quiz_key(quiz_id):
+    return f'courses:quiz_snapshot:v{SNAPSHOT_VERSION}:{quiz_id}'
+
+
+def _lesson_key(lesson_id):
+    return f'courses:lesson_quiz:{lesson_id}'
+
+
+def build_snapshot(quiz):
+    questions = []
+    for question in quiz.questions.all():
+        answers = list(question.answers.all())
+        questions.append({
+            'id': question.id,
+            'text': question.question_text,
+            'type': question.question_type,
+            'points': question.points,
+            'order': question.order,
+            'explanation': question.explanation,
+            'keywords': [kw.strip().lower() for kw in question.text_answer_keywords.split(',') if kw.strip()],
+            'answers': [
+                {'id': answer.id, 'text': answer.answer_text, 'order': answer.order}
+                for answer in answers
+            ],
+            'correct_ids': [answer.id for answer in answers if answer.is_correct],
+        })
+
+    return {
+        'id': quiz.id,
+        'lesson_id': quiz.lesson_id,
+        'title': quiz.title,
+        'description': quiz.description,
+        'passing_score': quiz.passing_score,
+        'time_limit_minutes': quiz.time_limit_minutes,
+        'max_attempts': quiz.max_attempts,
+        'is_active': quiz.is_active,
+        'questions': questions,
+        'questions_count': len(questions),
+        'total_points': sum(question['points'] for question in questions),
+    }
+
+
+def _load(quiz_filter):
+    quiz = Quiz.objects.filter(**quiz_filter).prefetch_related(
+        Prefetch('questions', queryset=Question.objects.order_by('order', 'pk')),
+        Prefetch('questions__answers', queryset=Answer.objects.order_by('order', 'pk')),
+    ).first()
+    if quiz is None:
+        return None
+    snapshot = build_snapshot(quiz)
+    cache.set_many({
+        _quiz_key(quiz.id): snapshot,
+        _lesson_key(quiz.lesson_id): quiz.id,
+    }, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def get_snapshot(quiz_id):
+    snapshot = cache.get(_quiz_key(quiz_id))
+    if snapshot is None:
+        snapshot = _load({'pk': quiz_id})
+    return snapshot
+
+
+def get_lesson_snapshot(lesson_id):
+    """Instantané du quiz d'une leçon, ou None si la leçon n'a pas de quiz"""
+    quiz_id = cache.get(_lesson_key(lesson_id))
+    if quiz_id == NO_QUIZ:
+        return None
+    if quiz_id is not None:
+        return get_snapshot(quiz_id)
+
+    snapshot = _load({'lesson_id': lesson_id})
+    if snapshot is None:
+        cache.set(_lesson_key(lesson_id), NO_QUIZ, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def public_questions(snapshot):
+    """Questions telles qu'envoyées à l'élève (sans les bonnes réponses)"""
+    return [
+        {
+            'id': question['id'],
+            'text': question['text'],
+            'type': question['type'],
+            'points': question['points'],
+            'order': question['order'],
+            'answers': question['answers'] if question['type'] in ['multiple_choice', 'true_false'] else [],
+        } for question in snapshot['questions']
+    ]
+
+
+def invalidate(quiz_id=None, lesson_id=None):
+    """
+    Oublie les instantanés après le commit : supprimés avant, ils pourraient
+    être reconstruits depuis les anciennes lignes (l'admin enregistre quiz,
+    questions et réponses dans une même transaction) et notés ainsi 24 h.
+    """
+    keys = []
+    if quiz_id is not None:
+        keys.append(_quiz_key(quiz_id))
+    if lesson_id is not None:
+        keys.append(_lesson_key(lesson_id))
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,19 +1,18 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.contrib.auth.models import User
 from django.urls import reverse
 
-from .models import Course, Lesson, Enrollment
-from notifications.models import Notification
+from .models import Category, Course, Lesson, Enrollment, Review, Quiz, Question, Answer, QuizAttempt
+from . import attempts, catalog, learning, progress, quiz_cache, stats
+from notifications.fanout import enqueue_broadcast
 
 @receiver(post_save, sender=Course)
 def create_course_notification(sender, instance, **kwargs):
     """
-    Crée une notification pour tous les utilisateurs lorsqu'un cours est publié
-    pour la première fois.
+    Diffuse une notification à tous les utilisateurs lorsqu'un cours est publié
+    pour la première fois. Les notifications sont créées hors de la requête.
     """
     if instance.is_published and not instance.notification_sent:
-        users = User.objects.all()
         title = "Nouveau cours disponible !"
         message = f"Le cours '{instance.title}' vient d'être ajouté. Inscrivez-vous dès maintenant !"
         
@@ -22,8 +21,7 @@ def create_course_notification(sender, instance, **kwargs):
         except Exception:
             action_url = reverse('courses:list')
 
-        Notification.create_bulk_notification(
-            users=users,
+        enqueue_broadcast(
             title=title,
             message=message,
             notification_type='course_new',
@@ -36,15 +34,9 @@ def create_course_notification(sender, instance, **kwargs):
 @receiver(post_save, sender=Lesson)
 def create_lesson_notification(sender, instance, **kwargs):
     """
-    Crée une notification pour tous les utilisateurs lorsqu'une nouvelle leçon est publiée.
+    Diffuse une notification à tous les utilisateurs lorsqu'une nouvelle leçon est publiée.
     """
     if instance.is_published and not instance.notification_sent:
-        # Récupérer tous les utilisateurs de la plateforme
-        users = User.objects.all()
-
-        if not users:
-            return # Pas d'utilisateurs, pas de notification à envoyer
-
         title = f"Nouvelle leçon dans '{instance.course.title}'"
         message = f"La leçon '{instance.title}' est maintenant disponible. Plongez-vous dedans !"
         
@@ -53,8 +45,7 @@ def create_lesson_notification(sender, instance, **kwargs):
         except Exception:
             action_url = instance.course.get_absolute_url()
 
-        Notification.create_bulk_notification(
-            users=users,
+        enqueue_broadcast(
             title=title,
             message=message,
             notification_type='lesson_new',
@@ -62,3 +53,163 @@ def create_lesson_notification(sender, instance, **kwargs):
         )
         
         Lesson.objects.filter(pk=instance.pk).update(notification_sent=True)
+
+
+# --- Statistiques dénormalisées des cours ---
+
+@receiver(pre_save, sender=Lesson)
+@receiver(pre_save, sender=Review)
+def remember_previous_state(sender, instance, **kwargs):
+    """Mémorise l'état enregistré pour calculer la variation après la sauvegarde"""
+    instance._stats_previous = None
+    if instance.pk:
+        instance._stats_previous = sender.objects.filter(pk=instance.pk).values(
+            *(['course_id', 'is_approved', 'rating'] if sender is Review else ['course_id', 'is_published'])
+        ).first()
+
+
+@receiver(post_save, sender=Lesson)
+def count_saved_lesson(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    if created or previous is None:
+        stats.adjust(instance.course_id, lessons=1)
+    elif previous['course_id'] != instance.course_id:
+        stats.adjust(previous['course_id'], lessons=-1)
+        stats.adjust(instance.course_id, lessons=1)
+
+
+@receiver(post_delete, sender=Lesson)
+def count_deleted_lesson(sender, instance, **kwargs):
+    stats.adjust(instance.course_id, lessons=-1)
+    if instance.is_published:
+        progress.recompute_course(instance.course_id)
+
+
+@receiver(post_save, sender=Lesson)
+def recompute_enrollment_progress(sender, instance, created, **kwargs):
+    """Publier, dépublier ou déplacer une leçon change la progression de tous les inscrits"""
+    previous = getattr(instance, '_stats_previous', None)
+    if created or previous is None:
+        if instance.is_published:
+            progress.recompute_course(instance.course_id)
+        return
+
+    if previous['course_id'] != instance.course_id:
+        progress.recompute_course(previous['course_id'])
+        progress.recompute_course(instance.course_id)
+    elif previous['is_published'] != instance.is_published:
+        progress.recompute_course(instance.course_id)
+
+
+@receiver(post_save, sender=Enrollment)
+def count_new_enrollment(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust(instance.course_id, enrollments=1)
+
+
+@receiver(post_delete, sender=Enrollment)
+def count_deleted_enrollment(sender, instance, **kwargs):
+    stats.adjust(instance.course_id, enrollments=-1)
+
+
+@receiver(post_save, sender=Review)
+def count_saved_review(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    new_count, new_sum = stats.review_contribution(instance.is_approved, instance.rating)
+
+    if created or previous is None:
+        stats.adjust(instance.course_id, reviews=new_count, rating=new_sum)
+        return
+
+    old_count, old_sum = stats.review_contribution(previous['is_approved'], previous['rating'])
+    if previous['course_id'] != instance.course_id:
+        stats.adjust(previous['course_id'], reviews=-old_count, rating=-old_sum)
+        stats.adjust(instance.course_id, reviews=new_count, rating=new_sum)
+    else:
+        stats.adjust(instance.course_id, reviews=new_count - old_count, rating=new_sum - old_sum)
+
+
+@receiver(post_delete, sender=Review)
+def count_deleted_review(sender, instance, **kwargs):
+    count, rating_sum = stats.review_contribution(instance.is_approved, instance.rating)
+    stats.adjust(instance.course_id, reviews=-count, rating=-rating_sum)
+
+
+# --- Instantanés des quiz ---
+
+@receiver(pre_save, sender=Quiz)
+def remember_quiz_lesson(sender, instance, **kwargs):
+    instance._quiz_previous_lesson_id = None
+    if instance.pk:
+        instance._quiz_previous_lesson_id = Quiz.objects.filter(pk=instance.pk).values_list('lesson_id', flat=True).first()
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def invalidate_quiz_snapshot(sender, instance, **kwargs):
+    quiz_cache.invalidate(quiz_id=instance.pk, lesson_id=instance.lesson_id)
+    # La leçon a pu changer : l'ancienne ne doit plus pointer vers ce quiz
+    previous_lesson_id = getattr(instance, '_quiz_previous_lesson_id', None)
+    if previous_lesson_id and previous_lesson_id != instance.lesson_id:
+        quiz_cache.invalidate(lesson_id=previous_lesson_id)
+
+
+@receiver(pre_save, sender=Question)
+def remember_question_quiz(sender, instance, **kwargs):
+    instance._quiz_previous_id = None
+    if instance.pk:
+        instance._quiz_previous_id = Question.objects.filter(pk=instance.pk).values_list('quiz_id', flat=True).first()
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_snapshot(sender, instance, **kwargs):
+    quiz_cache.invalidate(quiz_id=instance.quiz_id)
+    previous_quiz_id = getattr(instance, '_quiz_previous_id', None)
+    if previous_quiz_id and previous_quiz_id != instance.quiz_id:
+        quiz_cache.invalidate(quiz_id=previous_quiz_id)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def invalidate_answer_snapshot(sender, instance, **kwargs):
+    quiz_id = Question.objects.filter(pk=instance.question_id).values_list('quiz_id', flat=True).first()
+    if quiz_id is not None:
+        quiz_cache.invalidate(quiz_id=quiz_id)
+
+
+# --- Catalogue des cours ---
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_catalog(sender, instance, **kwargs):
+    catalog.invalidate()
+
+
+# --- Plan des cours (interface d'apprentissage) ---
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_lesson_outline(sender, instance, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    learning.invalidate(instance.course_id, previous and previous['course_id'])
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def invalidate_quiz_outline(sender, instance, created=False, **kwargs):
+    # Seule la présence d'un quiz figure dans le plan
+    previous_lesson_id = getattr(instance, '_quiz_previous_lesson_id', None)
+    if created or kwargs['signal'] is post_delete or previous_lesson_id != instance.lesson_id:
+        lesson_ids = {instance.lesson_id, previous_lesson_id} - {None}
+        learning.invalidate(*Lesson.objects.filter(pk__in=lesson_ids).values_list('course_id', flat=True))
+
+
+@receiver(post_delete, sender=QuizAttempt)
+def release_deleted_attempt(sender, instance, **kwargs):
+    # Une tentative supprimée (par un administrateur) est rendue à l'élève
+    attempts.release(instance.user_id, instance.quiz_id)
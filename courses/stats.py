@@ -0,0 +1,68 @@
+"""
+Statistiques dénormalisées des cours : leçons, inscriptions, avis approuvés
+et note moyenne.
+
+Les signaux de `courses.signals` les ajustent par incrément (une seule
+requête UPDATE par événement) ; `recompute` recalcule les valeurs exactes
+et sert à `manage.py reconcile_course_stats` après des opérations en masse
+qui n'émettent pas de signaux.
+"""
+from django.db.models import Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from .models import Course, Lesson, Enrollment, Review
+
+
+def review_contribution(is_approved, rating):
+    """(nombre d'avis, somme des notes) apportés par un avis"""
+    return (1, rating) if is_approved else (0, 0)
+
+
+def adjust(course_id, lessons=0, enrollments=0, reviews=0, rating=0):
+    """Applique des variations aux compteurs d'un cours"""
+    updates = {}
+    if lessons:
+        updates['lessons_count'] = F('lessons_count') + lessons
+    if enrollments:
+        updates['enrollments_count'] = F('enrollments_count') + enrollments
+    if reviews or rating:
+        # Les expressions d'un UPDATE lisent les anciennes valeurs de la ligne
+        new_count = F('reviews_count') + reviews
+        new_sum = F('rating_sum') + rating
+        updates['reviews_count'] = new_count
+        updates['rating_sum'] = new_sum
+        updates['rating_average'] = Case(
+            When(Q(reviews_count__gt=-reviews), then=Cast(new_sum, FloatField()) / Cast(new_count, FloatField())),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    if updates:
+        Course.objects.filter(pk=course_id).update(**updates)
+
+
+def _count_subquery(model, **filters):
+    return Coalesce(Subquery(
+        model.objects.filter(course=OuterRef('pk'), **filters)
+        .order_by().values('course').annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def recompute(courses=None):
+    """Recalcule les statistiques exactes des cours donnés (tous par défaut) ; retourne le nombre de cours"""
+    courses = Course.objects.all() if courses is None else courses
+    approved = Review.objects.filter(course=OuterRef('pk'), is_approved=True).order_by().values('course')
+    rating_sum = Coalesce(Subquery(approved.annotate(total=Sum('rating')).values('total')), 0)
+    reviews_count = _count_subquery(Review, is_approved=True)
+
+    updated = courses.update(
+        lessons_count=_count_subquery(Lesson),
+        enrollments_count=_count_subquery(Enrollment),
+        reviews_count=reviews_count,
+        rating_sum=rating_sum,
+        rating_average=Coalesce(Subquery(
+            approved.annotate(
+                average=Cast(Sum('rating'), FloatField()) / Cast(Count('pk'), FloatField())
+            ).values('average')
+        ), Value(0.0), output_field=FloatField()),
+    )
+    return updated
@@ -12,6 +12,7 @@ urlpatterns = [
     path('<slug:slug>/apprendre/', views.learn_course, name='learn'),
     path('<slug:slug>/apprendre/<slug:lesson_slug>/', views.learn_course, name='learn_lesson'),
     path('<slug:slug>/lecon/<slug:lesson_slug>/terminer/', views.complete_lesson, name='complete_lesson'),
+    path('<slug:slug>/lecon/<slug:lesson_slug>/heartbeat/', views.lesson_heartbeat, name='lesson_heartbeat'),
     path('<slug:slug>/avis/', views.add_review, name='add_review'),
     
     # URLs pour les quiz
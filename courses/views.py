@@ -1,74 +1,35 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Count, Avg
-from django.core.paginator import Paginator
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from core.models import SiteSettings
 
-from .models import Course, Category, Enrollment, Lesson, LessonProgress, Review, Quiz, Question, Answer, QuizAttempt, StudentAnswer
+from .models import Course, Enrollment, Lesson, Review, QuizAttempt
 from .forms import ReviewForm
+from . import attempts, catalog, deadlines, grading, heartbeats, learning, progress, quiz_cache
 
 
 def course_list(request):
     """Liste des cours"""
+    return _render_catalog(request, catalog.normalize(request.GET))
+
+
+def _render_catalog(request, query, category=None):
+    """Catalogue filtré : grille et catégories viennent du cache (aucune requête si chaud)"""
     settings = SiteSettings.get_settings()
-    courses = Course.objects.filter(is_published=True).select_related('category', 'instructor')
-    categories = Category.objects.filter(is_active=True)
-    
-    # Filtres
-    category_slug = request.GET.get('category')
-    difficulty = request.GET.get('difficulty')
-    is_free = request.GET.get('free')
-    search = request.GET.get('search')
-    sort_by = request.GET.get('sort', 'newest')
-    
-    if category_slug:
-        courses = courses.filter(category__slug=category_slug)
-    
-    if difficulty:
-        courses = courses.filter(difficulty=difficulty)
-    
-    if is_free == 'true':
-        courses = courses.filter(is_free=True)
-    
-    if search:
-        courses = courses.filter(
-            Q(title__icontains=search) |
-            Q(description__icontains=search) |
-            Q(short_description__icontains=search)
-        )
-    
-    # Tri
-    if sort_by == 'newest':
-        courses = courses.order_by('-created_at')
-    elif sort_by == 'oldest':
-        courses = courses.order_by('created_at')
-    elif sort_by == 'popular':
-        courses = courses.annotate(enrollment_count=Count('enrollments')).order_by('-enrollment_count')
-    elif sort_by == 'rating':
-        courses = courses.annotate(avg_rating=Avg('reviews__rating')).order_by('-avg_rating')
-    elif sort_by == 'price_low':
-        courses = courses.order_by('price')
-    elif sort_by == 'price_high':
-        courses = courses.order_by('-price')
-    
-    # Pagination
-    paginator = Paginator(courses, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
     
     context = {
         'settings': settings,
-        'page_obj': page_obj,
-        'categories': categories,
-        'current_category': category_slug,
-        'current_difficulty': difficulty,
-        'current_free': is_free,
-        'current_search': search,
-        'current_sort': sort_by,
+        'category': category,
+        'catalog_listing': catalog.render_listing(query),
+        'categories': catalog.active_categories(),
+        'current_category': query['category'],
+        'current_difficulty': query['difficulty'],
+        'current_free': query['free'],
+        'current_search': query['search'],
+        'current_sort': query['sort'],
         'difficulty_choices': Course.DIFFICULTY_CHOICES,
     }
     
@@ -149,46 +110,28 @@ def learn_course(request, slug, lesson_slug=None):
         messages.error(request, 'Vous devez être inscrit à ce cours pour y accéder.')
         return redirect('courses:detail', slug=slug)
     
-    lessons = course.lessons.filter(is_published=True).order_by('order')
+    # Plan du cours (en cache) et leçons terminées par l'élève
+    session = learning.LearningSession(enrollment, lesson_slug)
     
     # Vérifier qu'il y a des leçons
-    if not lessons.exists():
+    if not session.lessons:
         messages.warning(request, 'Ce cours ne contient pas encore de leçons.')
         return redirect('courses:detail', slug=slug)
     
     # Leçon actuelle
-    if lesson_slug:
-        current_lesson = get_object_or_404(lessons, slug=lesson_slug)
-    else:
-        # Première leçon non terminée ou première leçon
-        completed_lessons = LessonProgress.objects.filter(
-            enrollment=enrollment,
-            is_completed=True
-        ).values_list('lesson_id', flat=True)
-        
-        next_lesson = lessons.exclude(id__in=completed_lessons).first()
-        current_lesson = next_lesson or lessons.first()
-    
-    # Progression de la leçon actuelle (seulement si current_lesson existe)
-    lesson_progress = None
-    if current_lesson:
-        lesson_progress, created = LessonProgress.objects.get_or_create(
-            enrollment=enrollment,
-            lesson=current_lesson
-        )
-    
-    # Toutes les progressions pour la sidebar
-    all_progress = LessonProgress.objects.filter(enrollment=enrollment)
-    progress_dict = {p.lesson_id: p for p in all_progress}
+    if session.current is None:
+        raise Http404("Leçon introuvable")
     
     context = {
         'settings': settings,
         'course': course,
         'enrollment': enrollment,
-        'lessons': lessons,
-        'current_lesson': current_lesson,
-        'lesson_progress': lesson_progress,
-        'progress_dict': progress_dict,
+        'lessons': session.lessons,
+        'current_lesson': session.load_current_lesson(),
+        'current_entry': session.current,
+        'previous_lesson': session.previous,
+        'next_lesson': session.next,
+        'heartbeat_interval': heartbeats.HEARTBEAT_INTERVAL,
     }
     
     return render(request, 'courses/learn.html', context)
@@ -206,19 +149,8 @@ def complete_lesson(request, slug, lesson_slug):
     except Enrollment.DoesNotExist:
         return JsonResponse({'error': 'Non inscrit'}, status=403)
     
-    progress, created = LessonProgress.objects.get_or_create(
-        enrollment=enrollment,
-        lesson=lesson
-    )
-    
-    if not progress.is_completed:
-        progress.is_completed = True
-        progress.completed_at = timezone.now()
-        progress.save()
-        
-        # Mettre à jour la progression du cours
-        enrollment.update_progress()
-        
+    # Terminer la leçon et mettre à jour la progression du cours (compteurs atomiques)
+    if progress.complete_lesson(enrollment, lesson):
         return JsonResponse({
             'success': True,
             'message': 'Leçon terminée!',
@@ -228,6 +160,23 @@ def complete_lesson(request, slug, lesson_slug):
     return JsonResponse({'success': True, 'message': 'Déjà terminée'})
 
 
+@login_required
+@require_http_methods(["POST"])
+def lesson_heartbeat(request, slug, lesson_slug):
+    """Battement envoyé périodiquement par la page d'apprentissage (temps passé)"""
+    enrollment = Enrollment.objects.filter(user=request.user, course__slug=slug).values('pk', 'course_id').first()
+    if enrollment is None:
+        return JsonResponse({'error': 'Non inscrit'}, status=403)
+    
+    # Leçon retrouvée dans le plan en cache
+    lesson = next((entry for entry in learning.get_outline(enrollment['course_id']) if entry['slug'] == lesson_slug), None)
+    if lesson is None:
+        return JsonResponse({'error': 'Leçon introuvable'}, status=404)
+    
+    counted = heartbeats.record_heartbeat(enrollment['pk'], lesson['id'])
+    return JsonResponse({'success': True, 'counted': counted, 'interval': heartbeats.HEARTBEAT_INTERVAL})
+
+
 @login_required
 def my_courses(request):
     """Mes cours"""
@@ -289,22 +238,11 @@ def add_review(request, slug):
 
 def category_courses(request, slug):
     """Cours par catégorie"""
-    settings = SiteSettings.get_settings()
-    category = get_object_or_404(Category, slug=slug, is_active=True)
-    courses = Course.objects.filter(category=category, is_published=True)
-    
-    # Pagination
-    paginator = Paginator(courses, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    context = {
-        'settings': settings,
-        'category': category,
-        'page_obj': page_obj,
-    }
+    category = next((c for c in catalog.active_categories() if c.slug == slug), None)
+    if category is None:
+        raise Http404("Catégorie introuvable")
     
-    return render(request, 'courses/category_courses.html', context)
+    return _render_catalog(request, catalog.normalize(request.GET, category_slug=slug), category)
 
 
 @login_required
@@ -320,45 +258,28 @@ def start_quiz(request, course_slug, lesson_slug):
     except Enrollment.DoesNotExist:
         return JsonResponse({'error': 'Non inscrit au cours'}, status=403)
     
-    # Vérifier qu'il y a un quiz
-    try:
-        quiz = lesson.quiz
-    except Quiz.DoesNotExist:
+    # Vérifier qu'il y a un quiz (instantané en cache)
+    snapshot = quiz_cache.get_lesson_snapshot(lesson.id)
+    if snapshot is None:
         return JsonResponse({'error': 'Pas de quiz pour cette leçon'}, status=404)
     
-    # Vérifier le nombre de tentatives
-    attempts_count = QuizAttempt.objects.filter(user=request.user, quiz=quiz).count()
-    if attempts_count >= quiz.max_attempts:
-        return JsonResponse({'error': f'Nombre maximum de tentatives atteint ({quiz.max_attempts})'}, status=400)
-    
-    # Créer une nouvelle tentative
-    attempt = QuizAttempt.objects.create(
-        user=request.user,
-        quiz=quiz,
-        enrollment=enrollment,
-        total_points=sum(q.points for q in quiz.questions.all())
-    )
+    user_attempts = QuizAttempt.objects.filter(user=request.user, quiz_id=snapshot['id'])
+    
+    # Clore les tentatives expirées, puis reprendre celle qui est encore en cours
+    deadlines.expire_attempts(user_attempts)
+    attempt = user_attempts.filter(status='in_progress').order_by('-started_at').first()
+    
+    if attempt is None:
+        # Créer une nouvelle tentative (numéro et limite réservés atomiquement)
+        attempt = attempts.start_attempt(enrollment, snapshot, deadlines.deadline_for(snapshot, timezone.now()))
+        if attempt is None:
+            return JsonResponse({'error': f"Nombre maximum de tentatives atteint ({snapshot['max_attempts']})"}, status=400)
     
     return JsonResponse({
         'success': True,
         'attempt_id': attempt.id,
-        'questions': [
-            {
-                'id': q.id,
-                'text': q.question_text,
-                'type': q.question_type,
-                'points': q.points,
-                'order': q.order,
-                'answers': [
-                    {
-                        'id': a.id,
-                        'text': a.answer_text,
-                        'order': a.order
-                    } for a in q.answers.all().order_by('order')
-                ] if q.question_type in ['multiple_choice', 'true_false'] else []
-            } for q in quiz.questions.all().order_by('order')
-        ],
-        'time_limit_seconds': quiz.time_limit_minutes * 60 if quiz.time_limit_minutes else None
+        'questions': quiz_cache.public_questions(snapshot),
+        'time_limit_seconds': deadlines.remaining_seconds(attempt) if snapshot['time_limit_minutes'] else None
     })
 
 
@@ -369,61 +290,39 @@ def submit_answer(request, attempt_id, question_id):
     import json
     
     attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user, status='in_progress')
-    question = get_object_or_404(Question, id=question_id, quiz=attempt.quiz)
+    snapshot = quiz_cache.get_snapshot(attempt.quiz_id)
     
-    data = json.loads(request.body)
+    # Réponse arrivée après la date limite : la tentative est close sans corriger la réponse
+    if deadlines.is_late(attempt):
+        grading.finalize_attempt(attempt, snapshot, status='time_expired', time_spent=deadlines.elapsed_seconds(attempt))
+        return JsonResponse({
+            'success': False,
+            'expired': True,
+            'error': 'Temps écoulé',
+            'results': _quiz_results(attempt, snapshot),
+        }, status=410)
     
-    # Créer ou mettre à jour la réponse de l'étudiant
-    student_answer, created = StudentAnswer.objects.get_or_create(
-        attempt=attempt,
-        question=question,
-        defaults={'time_spent_seconds': data.get('time_spent', 0)}
-    )
+    question = next((q for q in snapshot['questions'] if q['id'] == question_id), None) if snapshot else None
+    if question is None:
+        return JsonResponse({'success': False, 'error': 'Question introuvable'}, status=404)
     
-    if not created:
-        student_answer.time_spent_seconds = data.get('time_spent', 0)
+    data = json.loads(request.body)
     
-    # Traiter la réponse selon le type de question
-    if question.question_type == 'text':
-        student_answer.text_answer = data.get('text_answer', '')
-    else:
-        # Choix multiple ou vrai/faux
-        answer_ids = data.get('answer_ids', [])
-        if not isinstance(answer_ids, list):
-            answer_ids = [answer_ids]
-        
-        # Nettoyer les réponses existantes
-        student_answer.selected_answers.clear()
-        
-        # Ajouter les nouvelles réponses
-        for answer_id in answer_ids:
-            try:
-                answer = Answer.objects.get(id=answer_id, question=question)
-                student_answer.selected_answers.add(answer)
-            except Answer.DoesNotExist:
-                continue
-    
-    # Évaluer la réponse
-    student_answer.evaluate_answer()
+    # Corriger et enregistrer la réponse (sans relire les bonnes réponses)
+    student_answer = grading.record_answers(attempt, snapshot, [{
+        'question_id': question_id,
+        'answer_ids': data.get('answer_ids', []),
+        'text_answer': data.get('text_answer', ''),
+        'time_spent': data.get('time_spent', 0),
+    }])[question_id]
     
     # Préparer la réponse avec correction
     response_data = {
         'success': True,
         'is_correct': student_answer.is_correct,
         'points_earned': student_answer.points_earned,
-        'points_possible': question.points,
-        'explanation': question.explanation
     }
-    
-    # Ajouter les bonnes réponses pour feedback
-    if question.question_type in ['multiple_choice', 'true_false']:
-        correct_answers = question.get_correct_answers()
-        response_data['correct_answers'] = [
-            {
-                'id': a.id,
-                'text': a.answer_text
-            } for a in correct_answers
-        ]
+    response_data.update(grading.correction(question))
     
     return JsonResponse(response_data)
 
@@ -431,51 +330,46 @@ def submit_answer(request, attempt_id, question_id):
 @login_required
 @require_http_methods(["POST"])
 def finish_quiz(request, attempt_id):
-    """Terminer un quiz"""
+    """Terminer un quiz (avec, en option, la feuille de réponses complète)"""
     import json
     
     attempt = get_object_or_404(QuizAttempt, id=attempt_id, user=request.user, status='in_progress')
+    snapshot = quiz_cache.get_snapshot(attempt.quiz_id)
     
     data = json.loads(request.body)
     reason = data.get('reason', 'completed')  # 'completed' ou 'time_expired'
     
-    # Calculer les points totaux obtenus
-    total_earned = sum(sa.points_earned for sa in attempt.student_answers.all())
-    attempt.earned_points = total_earned
-    attempt.time_spent_seconds = data.get('total_time_spent', 0)
-    
-    # Marquer comme terminé
-    attempt.status = 'time_expired' if reason == 'time_expired' else 'completed'
-    attempt.completed_at = timezone.now()
-    attempt.save()  # Le score sera calculé automatiquement
-    
-    # Si réussi, marquer la leçon comme terminée
-    if attempt.is_passed:
-        lesson_progress, created = LessonProgress.objects.get_or_create(
-            enrollment=attempt.enrollment,
-            lesson=attempt.quiz.lesson
-        )
-        if not lesson_progress.is_completed:
-            lesson_progress.is_completed = True
-            lesson_progress.completed_at = timezone.now()
-            lesson_progress.save()
-            
-            # Mettre à jour la progression du cours
-            attempt.enrollment.update_progress()
+    # Le temps passé est mesuré par le serveur ; les réponses envoyées en retard sont ignorées
+    late = deadlines.is_late(attempt)
     
-    return JsonResponse({
-        'success': True,
+    # Corriger les réponses envoyées, additionner les points et clôturer en une transaction
+    finished = grading.finalize_attempt(
+        attempt,
+        snapshot,
+        status='time_expired' if late or reason == 'time_expired' else 'completed',
+        time_spent=deadlines.elapsed_seconds(attempt),
+        sheet=None if late else data.get('answers'),
+    )
+    if not finished:
+        return JsonResponse({'success': False, 'error': 'Tentative déjà terminée'}, status=409)
+    
+    results = _quiz_results(attempt, snapshot)
+    results['success'] = True
+    return JsonResponse(results)
+
+
+def _quiz_results(attempt, snapshot):
+    """Résultats d'une tentative terminée"""
+    return {
         'score': float(attempt.score),
         'is_passed': attempt.is_passed,
-        'passing_score': attempt.quiz.passing_score,
+        'status': attempt.status,
+        'passing_score': snapshot['passing_score'],
         'earned_points': attempt.earned_points,
         'total_points': attempt.total_points,
         'attempt_number': attempt.attempt_number,
-        'can_retake': QuizAttempt.objects.filter(
-            user=request.user, 
-            quiz=attempt.quiz
-        ).count() < attempt.quiz.max_attempts
-    })
+        'can_retake': attempts.attempts_count(attempt.user_id, attempt.quiz_id) < snapshot['max_attempts']
+    }
 
 
 @login_required
@@ -490,25 +384,25 @@ def get_quiz_data(request, course_slug, lesson_slug):
     except Enrollment.DoesNotExist:
         return JsonResponse({'error': 'Non inscrit au cours'}, status=403)
     
-    # Vérifier qu'il y a un quiz
-    try:
-        quiz = lesson.quiz
-    except Quiz.DoesNotExist:
+    # Vérifier qu'il y a un quiz (instantané en cache)
+    snapshot = quiz_cache.get_lesson_snapshot(lesson.id)
+    if snapshot is None:
         return JsonResponse({'error': 'Pas de quiz pour cette leçon'}, status=404)
     
-    # Récupérer les tentatives précédentes
-    attempts = QuizAttempt.objects.filter(user=request.user, quiz=quiz).order_by('-started_at')
+    # Récupérer les tentatives précédentes ; la limite se compte comme dans start_quiz
+    previous_attempts = list(QuizAttempt.objects.filter(user=request.user, quiz_id=snapshot['id']).order_by('-started_at'))
+    used_attempts = attempts.attempts_count(request.user.id, snapshot['id'])
     
     return JsonResponse({
         'quiz': {
-            'id': quiz.id,
-            'title': quiz.title,
-            'description': quiz.description,
-            'passing_score': quiz.passing_score,
-            'max_attempts': quiz.max_attempts,
-            'time_limit_minutes': quiz.time_limit_minutes,
-            'questions_count': quiz.questions.count(),
-            'total_points': sum(q.points for q in quiz.questions.all())
+            'id': snapshot['id'],
+            'title': snapshot['title'],
+            'description': snapshot['description'],
+            'passing_score': snapshot['passing_score'],
+            'max_attempts': snapshot['max_attempts'],
+            'time_limit_minutes': snapshot['time_limit_minutes'],
+            'questions_count': snapshot['questions_count'],
+            'total_points': snapshot['total_points']
         },
         'attempts': [
             {
@@ -519,8 +413,8 @@ def get_quiz_data(request, course_slug, lesson_slug):
                 'is_passed': attempt.is_passed,
                 'started_at': attempt.started_at.isoformat(),
                 'completed_at': attempt.completed_at.isoformat() if attempt.completed_at else None
-            } for attempt in attempts
+            } for attempt in previous_attempts
         ],
-        'can_start_new': attempts.count() < quiz.max_attempts,
-        'remaining_attempts': quiz.max_attempts - attempts.count()
+        'can_start_new': used_attempts < snapshot['max_attempts'],
+        'remaining_attempts': max(0, snapshot['max_attempts'] - used_attempts)
     })
\ No newline at end of file
@@ -0,0 +1,15 @@
+"""
+Dernière activité des sujets (`ForumTopic.derniere_activite`).
+
+Seule la création d'une réponse fait remonter un sujet : modifier une
+réponse ou l'aimer ne le touche plus. La mise à jour est conditionnelle
+(`WHERE derniere_activite < nouvelle date`) : des réponses simultanées sur
+un sujet actif n'écrivent la ligne que si elles l'avancent, et une date
+plus ancienne arrivée en retard ne la fait jamais reculer.
+"""
+from .models import ForumTopic
+
+
+def bump(topic_id, at):
+    """Avance la dernière activité du sujet jusqu'à `at` ; retourne True si la ligne a changé"""
+    return bool(ForumTopic.objects.filter(pk=topic_id, derniere_activite__lt=at).update(derniere_activite=at))
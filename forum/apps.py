@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class ForumConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'forum'
-    verbose_name = 'Forum'
\ No newline at end of file
+    verbose_name = 'Forum'
+
+    def ready(self):
+        import forum.signals
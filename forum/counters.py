@@ -0,0 +1,91 @@
+"""
+Compteurs dénormalisés du forum : réponses et dernière réponse de chaque
+sujet, sujets et messages (sujets + réponses) de chaque catégorie,
+« J'aime » de chaque réponse.
+
+Les signaux de `forum.signals` les ajustent à chaque création ou
+suppression (une requête UPDATE par compteur touché). `recompute_topics`
+et `recompute_categories` recalculent les valeurs exactes et servent à
+`manage.py reconcile_forum_counters` après des opérations en masse qui
+n'émettent pas de signaux.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import ForumCategory, ForumTopic, ForumPost
+
+
+def adjust_category(category_id, topics=0, posts=0):
+    updates = {}
+    if topics:
+        updates['topics_count'] = F('topics_count') + topics
+    if posts:
+        updates['posts_count'] = F('posts_count') + posts
+    if updates:
+        ForumCategory.objects.filter(pk=category_id).update(**updates)
+
+
+def adjust_topic_category(topic_id, topics=0, posts=0):
+    """Comme `adjust_category`, pour la catégorie du sujet donné (sans la charger)"""
+    ForumCategory.objects.filter(pk__in=ForumTopic.objects.filter(pk=topic_id).values('categorie_id')).update(
+        topics_count=F('topics_count') + topics,
+        posts_count=F('posts_count') + posts,
+    )
+
+
+def record_reply(post):
+    """Nouvelle réponse : compteur et dernière réponse du sujet, messages de la catégorie"""
+    ForumTopic.objects.filter(pk=post.sujet_id).update(
+        reply_count=F('reply_count') + 1,
+        last_post=post.pk,
+        last_post_at=post.cree_le,
+    )
+    adjust_topic_category(post.sujet_id, posts=1)
+
+
+def _last_post():
+    return ForumPost.objects.filter(sujet=OuterRef('pk')).order_by('-cree_le', '-pk')
+
+
+def forget_reply(post):
+    """Réponse supprimée : la dernière réponse du sujet est relue dans la même requête"""
+    ForumTopic.objects.filter(pk=post.sujet_id).update(
+        reply_count=F('reply_count') - 1,
+        last_post=Subquery(_last_post().values('pk')[:1]),
+        last_post_at=Subquery(_last_post().values('cree_le')[:1]),
+    )
+    adjust_topic_category(post.sujet_id, posts=-1)
+
+
+def recompute_topics(topics=None):
+    """Recalcule les compteurs exacts des sujets donnés (tous par défaut) ; retourne le nombre de sujets"""
+    topics = ForumTopic.objects.all() if topics is None else topics
+    return topics.update(
+        reply_count=Coalesce(Subquery(
+            ForumPost.objects.filter(sujet=OuterRef('pk')).order_by().values('sujet')
+            .annotate(total=Count('pk')).values('total')
+        ), 0),
+        last_post=Subquery(_last_post().values('pk')[:1]),
+        last_post_at=Subquery(_last_post().values('cree_le')[:1]),
+    )
+
+
+def recompute_categories(categories=None):
+    """Recalcule les compteurs exacts des catégories (d'après `reply_count` des sujets)"""
+    categories = ForumCategory.objects.all() if categories is None else categories
+    topics = ForumTopic.objects.filter(categorie=OuterRef('pk')).order_by().values('categorie')
+    return categories.update(
+        topics_count=Coalesce(Subquery(topics.annotate(total=Count('pk')).values('total')), 0),
+        posts_count=Coalesce(Subquery(
+            topics.annotate(total=Count('pk') + Coalesce(Sum('reply_count'), 0)).values('total')
+        ), 0),
+    )
+
+
+def recompute_likes(posts):
+    """Recalcule `like_count` des réponses données (une requête)"""
+    Like = ForumPost.likes.through
+    return posts.update(like_count=Coalesce(Subquery(
+        Like.objects.filter(forumpost=OuterRef('pk')).order_by().values('forumpost')
+        .annotate(total=Count('pk')).values('total')
+    ), 0))
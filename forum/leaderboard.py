@@ -0,0 +1,127 @@
+"""
+Classement des contributeurs du forum (sujets ouverts + réponses).
+
+`ContributorScore` garde une ligne par membre et par période : depuis
+toujours, par mois et par semaine (commençant le lundi). Les signaux de
+`forum.signals` ajustent les trois lignes concernées à chaque création ou
+suppression, d'après la date du message ; le classement d'une période est
+alors une simple lecture triée sur un index. `rebuild` recalcule toute la
+table (après des opérations en masse, via `manage.py reconcile_forum_counters`).
+"""
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Q, Value
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import ContributorScore, ForumTopic, ForumPost
+
+# Début conventionnel de la période « depuis toujours »
+ALL_TIME = date(1970, 1, 1)
+PERIODS = ('all', 'month', 'week')
+
+
+def period_start(period, day):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return ALL_TIME
+
+
+def current_period_start(period):
+    return period_start(period, timezone.localdate())
+
+
+def _buckets(created_at):
+    day = timezone.localtime(created_at).date() if timezone.is_aware(created_at) else created_at.date()
+    return [(period, period_start(period, day)) for period in PERIODS]
+
+
+def add_contribution(user_id, created_at, topics=0, posts=0):
+    """Ajoute (ou retire, avec des valeurs négatives) des contributions aux trois périodes du message"""
+    buckets = _buckets(created_at)
+    condition = Q()
+    for period, start in buckets:
+        condition |= Q(period=period, period_start=start)
+    updates = {
+        'topics_count': F('topics_count') + topics,
+        'posts_count': F('posts_count') + posts,
+        'contributions': F('contributions') + topics + posts,
+    }
+
+    scores = ContributorScore.objects.filter(condition, user_id=user_id)
+    if scores.update(**updates) == len(buckets):
+        return
+    if topics + posts < 0:
+        # Retrait sans ligne existante (table reconstruite entre-temps) : rien à faire
+        return
+
+    existing = set(scores.values_list('period', 'period_start'))
+    for period, start in buckets:
+        if (period, start) in existing:
+            continue
+        try:
+            with transaction.atomic():
+                ContributorScore.objects.create(
+                    user_id=user_id, period=period, period_start=start,
+                    topics_count=topics, posts_count=posts, contributions=topics + posts,
+                )
+        except IntegrityError:
+            # Créée entre-temps par une autre requête
+            ContributorScore.objects.filter(user_id=user_id, period=period, period_start=start).update(**updates)
+
+
+def top_contributors(period='all', limit=3):
+    """Meilleurs contributeurs de la période en cours (`total_contributions` annoté sur chaque membre)"""
+    scores = ContributorScore.objects.filter(
+        period=period, period_start=current_period_start(period), contributions__gt=0
+    ).select_related('user', 'user__userprofile').order_by('-contributions', 'user_id')[:limit]
+
+    members = []
+    for score in scores:
+        member = score.user
+        member.total_contributions = score.contributions
+        members.append(member)
+    return members
+
+
+def contributions_of(user):
+    """{période: contributions} d'un membre pour les périodes en cours"""
+    condition = Q()
+    for period in PERIODS:
+        condition |= Q(period=period, period_start=current_period_start(period))
+    scores = dict(ContributorScore.objects.filter(condition, user=user).values_list('period', 'contributions'))
+    return {period: scores.get(period, 0) for period in PERIODS}
+
+
+def _grouped(model, period, field):
+    rows = model.objects.order_by()
+    if period == 'week':
+        rows = rows.annotate(start=TruncWeek('cree_le', output_field=DateField()))
+    elif period == 'month':
+        rows = rows.annotate(start=TruncMonth('cree_le', output_field=DateField()))
+    else:
+        rows = rows.annotate(start=Value(ALL_TIME, output_field=DateField()))
+    return rows.values('auteur_id', 'start').annotate(**{field: Count('pk')})
+
+
+def rebuild():
+    """Recalcule tout le classement depuis les sujets et réponses ; retourne le nombre de lignes"""
+    scores = {}
+    for period in PERIODS:
+        for model, field in ((ForumTopic, 'topics_count'), (ForumPost, 'posts_count')):
+            for row in _grouped(model, period, field):
+                key = (row['auteur_id'], period, row['start'])
+                score = scores.setdefault(key, ContributorScore(
+                    user_id=row['auteur_id'], period=period, period_start=row['start']
+                ))
+                setattr(score, field, row[field])
+
+    for score in scores.values():
+        score.contributions = score.topics_count + score.posts_count
+    with transaction.atomic():
+        ContributorScore.objects.all().delete()
+        ContributorScore.objects.bulk_create(scores.values(), batch_size=1000)
+    return len(scores)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from forum.topic_views import flush
+
+
+class Command(BaseCommand):
+    help = "Écrit dans ForumTopic.vues les vues de sujets accumulées dans le tampon"
+
+    def handle(self, *args, **options):
+        updated = flush()
+        self.stdout.write(self.style.SUCCESS(f"Vues mises à jour pour {updated} sujet(s)."))
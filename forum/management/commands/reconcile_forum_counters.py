@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from forum import counters, leaderboard
+from forum.models import ForumCategory, ForumTopic
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les compteurs dénormalisés du forum (réponses et dernière réponse des sujets, "
+        "totaux des catégories) et le classement des contributeurs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Nombre de sujets recalculés par requête")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        cursor = 0
+        total = 0
+        while True:
+            topic_ids = list(ForumTopic.objects.filter(pk__gt=cursor).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not topic_ids:
+                break
+            total += counters.recompute_topics(ForumTopic.objects.filter(pk__in=topic_ids))
+            cursor = topic_ids[-1]
+
+        categories = counters.recompute_categories(ForumCategory.objects.all())
+        scores = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Compteurs de {total} sujet(s) et {categories} catégorie(s) recalculés, "
+            f"{scores} score(s) de contributeurs reconstruits."
+        ))
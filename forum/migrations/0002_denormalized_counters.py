@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:04
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def populate_forum_counters(apps, schema_editor):
+    ForumCategory = apps.get_model('forum', 'ForumCategory')
+    ForumTopic = apps.get_model('forum', 'ForumTopic')
+    ForumPost = apps.get_model('forum', 'ForumPost')
+
+    last_post = ForumPost.objects.filter(sujet=OuterRef('pk')).order_by('-cree_le', '-pk')
+    ForumTopic.objects.update(
+        reply_count=Coalesce(Subquery(
+            ForumPost.objects.filter(sujet=OuterRef('pk')).order_by().values('sujet')
+            .annotate(total=Count('pk')).values('total')
+        ), 0),
+        last_post=Subquery(last_post.values('pk')[:1]),
+        last_post_at=Subquery(last_post.values('cree_le')[:1]),
+    )
+
+    topics = ForumTopic.objects.filter(categorie=OuterRef('pk')).order_by().values('categorie')
+    ForumCategory.objects.update(
+        topics_count=Coalesce(Subquery(topics.annotate(total=Count('pk')).values('total')), 0),
+        posts_count=Coalesce(Subquery(
+            topics.annotate(total=Count('pk') + Coalesce(Sum('reply_count'), 0)).values('total')
+        ), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumcategory',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de messages'),
+        ),
+        migrations.AddField(
+            model_name='forumcategory',
+            name='topics_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de sujets'),
+        ),
+        migrations.AddField(
+            model_name='forumtopic',
+            name='last_post',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='forum.forumpost', verbose_name='Dernière réponse'),
+        ),
+        migrations.AddField(
+            model_name='forumtopic',
+            name='last_post_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Date de la dernière réponse'),
+        ),
+        migrations.AddField(
+            model_name='forumtopic',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de réponses'),
+        ),
+        migrations.RunPython(populate_forum_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:06
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DateField, Value
+from django.db.models.functions import TruncMonth, TruncWeek
+import django.db.models.deletion
+
+
+def populate_contributor_scores(apps, schema_editor):
+    ContributorScore = apps.get_model('forum', 'ContributorScore')
+    starts = {
+        'all': Value(datetime.date(1970, 1, 1), output_field=DateField()),
+        'month': TruncMonth('cree_le', output_field=DateField()),
+        'week': TruncWeek('cree_le', output_field=DateField()),
+    }
+    scores = {}
+    for model_name, field in (('ForumTopic', 'topics_count'), ('ForumPost', 'posts_count')):
+        model = apps.get_model('forum', model_name)
+        for period, start in starts.items():
+            rows = model.objects.order_by().annotate(start=start).values('auteur_id', 'start').annotate(total=Count('pk'))
+            for row in rows:
+                key = (row['auteur_id'], period, row['start'])
+                score = scores.setdefault(key, ContributorScore(
+                    user_id=row['auteur_id'], period=period, period_start=row['start']
+                ))
+                setattr(score, field, row['total'])
+    for score in scores.values():
+        score.contributions = score.topics_count + score.posts_count
+    ContributorScore.objects.bulk_create(scores.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('forum', '0002_denormalized_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContributorScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('all', 'Depuis toujours'), ('month', 'Mois'), ('week', 'Semaine')], max_length=5, verbose_name='Période')),
+                ('period_start', models.DateField(verbose_name='Début de la période')),
+                ('topics_count', models.IntegerField(default=0, verbose_name='Sujets')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='Réponses')),
+                ('contributions', models.IntegerField(default=0, verbose_name='Contributions')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forum_scores', to=settings.AUTH_USER_MODEL, verbose_name='Membre')),
+            ],
+            options={
+                'verbose_name': 'Score de contributeur',
+                'verbose_name_plural': 'Scores des contributeurs',
+                'indexes': [models.Index(fields=['period', 'period_start', '-contributions'], name='forum_score_ranking_idx')],
+                'unique_together': {('user', 'period', 'period_start')},
+            },
+        ),
+        migrations.RunPython(populate_contributor_scores, migrations.RunPython.noop),
+    ]
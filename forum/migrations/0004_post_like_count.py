@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:06
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_like_count(apps, schema_editor):
+    ForumPost = apps.get_model('forum', 'ForumPost')
+    Like = ForumPost.likes.through
+    ForumPost.objects.update(like_count=Coalesce(Subquery(
+        Like.objects.filter(forumpost=OuterRef('pk')).order_by().values('forumpost')
+        .annotate(total=Count('pk')).values('total')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0003_contributor_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumpost',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de J'aime"),
+        ),
+        migrations.RunPython(populate_like_count, migrations.RunPython.noop),
+    ]
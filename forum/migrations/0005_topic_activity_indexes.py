@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0004_post_like_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='forumtopic',
+            index=models.Index(fields=['-est_epingle', '-derniere_activite', '-id'], name='forum_topic_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumtopic',
+            index=models.Index(fields=['categorie', '-est_epingle', '-derniere_activite', '-id'], name='forum_topic_cat_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumtopic',
+            index=models.Index(fields=['-derniere_activite'], name='forum_topic_last_activity_idx'),
+        ),
+    ]
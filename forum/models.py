@@ -3,8 +3,10 @@ from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils.text import slugify
 
+from core.models import CounterFieldsMixin
 
-class ForumCategory(models.Model):
+
+class ForumCategory(CounterFieldsMixin, models.Model):
     """Catégorie de forum"""
     nom = models.CharField(max_length=100, verbose_name="Nom")
     slug = models.SlugField(unique=True, verbose_name="Slug")
@@ -15,6 +17,11 @@ class ForumCategory(models.Model):
     est_actif = models.BooleanField(default=True, verbose_name="Actif")
     cree_le = models.DateTimeField(auto_now_add=True)
 
+    # Compteurs dénormalisés (voir forum.counters)
+    topics_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de sujets")
+    posts_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de messages")
+    counter_fields = ('topics_count', 'posts_count')
+
     class Meta:
         verbose_name = "Catégorie de Forum"
         verbose_name_plural = "Catégories de Forum"
@@ -30,14 +37,15 @@ class ForumCategory(models.Model):
 
     @property
     def nombre_sujets(self):
-        return self.sujets.count()
+        return self.topics_count
 
     @property
     def nombre_messages(self):
-        return sum(sujet.nombre_reponses + 1 for sujet in self.sujets.all())
+        # Sujets et réponses
+        return self.posts_count
 
 
-class ForumTopic(models.Model):
+class ForumTopic(CounterFieldsMixin, models.Model):
     """Sujet de forum"""
     titre = models.CharField(max_length=200, verbose_name="Titre")
     slug = models.SlugField(verbose_name="Slug")
@@ -56,11 +64,28 @@ class ForumTopic(models.Model):
     modifie_le = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
     derniere_activite = models.DateTimeField(auto_now_add=True, verbose_name="Dernière activité")
 
+    # Compteurs dénormalisés (voir forum.counters)
+    reply_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de réponses")
+    last_post = models.ForeignKey(
+        'ForumPost', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='+', verbose_name="Dernière réponse"
+    )
+    last_post_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Date de la dernière réponse")
+    # `vues` est écrit par lots depuis le tampon de forum.topic_views
+    # `derniere_activite` n'avance que par forum.activity.bump (UPDATE conditionnel)
+    counter_fields = ('vues', 'derniere_activite', 'reply_count', 'last_post', 'last_post_at')
+
     class Meta:
         verbose_name = "Sujet de Forum"
         verbose_name_plural = "Sujets de Forum"
         ordering = ['-est_epingle', '-derniere_activite']
         unique_together = ['categorie', 'slug']
+        indexes = [
+            # Listes de sujets : tri par défaut, par catégorie, derniers sujets actifs
+            models.Index(fields=['-est_epingle', '-derniere_activite', '-id'], name='forum_topic_activity_idx'),
+            models.Index(fields=['categorie', '-est_epingle', '-derniere_activite', '-id'], name='forum_topic_cat_activity_idx'),
+            models.Index(fields=['-derniere_activite'], name='forum_topic_last_activity_idx'),
+        ]
 
     def __str__(self):
         return self.titre
@@ -75,18 +100,18 @@ class ForumTopic(models.Model):
 
     @property
     def nombre_reponses(self):
-        return self.reponses.count()
+        return self.reply_count
 
     @property
     def derniere_reponse(self):
-        return self.reponses.order_by('-cree_le').first()
+        return self.last_post
 
     def incrementer_vues(self):
         self.vues += 1
         self.save(update_fields=['vues'])
 
 
-class ForumPost(models.Model):
+class ForumPost(CounterFieldsMixin, models.Model):
     """Réponse de forum"""
     sujet = models.ForeignKey(ForumTopic, on_delete=models.CASCADE, related_name='reponses', verbose_name="Sujet")
     auteur = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Auteur")
@@ -95,6 +120,9 @@ class ForumPost(models.Model):
     # Métadonnées
     est_solution = models.BooleanField(default=False, verbose_name="Solution")
     likes = models.ManyToManyField(User, related_name='posts_likes', blank=True, verbose_name="J'aime")
+    # Nombre de « J'aime », tenu à jour par forum.signals
+    like_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de J'aime")
+    counter_fields = ('like_count',)
     
     # Dates
     cree_le = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
@@ -110,10 +138,31 @@ class ForumPost(models.Model):
 
     @property
     def nombre_likes(self):
-        return self.likes.count()
+        return self.like_count
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Mettre à jour la dernière activité du sujet
-        self.sujet.derniere_activite = self.cree_le
-        self.sujet.save(update_fields=['derniere_activite'])
\ No newline at end of file
+
+class ContributorScore(models.Model):
+    """Contributions d'un membre au forum sur une période (voir forum.leaderboard)"""
+    PERIOD_CHOICES = [
+        ('all', 'Depuis toujours'),
+        ('month', 'Mois'),
+        ('week', 'Semaine'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='forum_scores', verbose_name="Membre")
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES, verbose_name="Période")
+    period_start = models.DateField(verbose_name="Début de la période")
+    topics_count = models.IntegerField(default=0, verbose_name="Sujets")
+    posts_count = models.IntegerField(default=0, verbose_name="Réponses")
+    contributions = models.IntegerField(default=0, verbose_name="Contributions")
+
+    class Meta:
+        verbose_name = "Score de contributeur"
+        verbose_name_plural = "Scores des contributeurs"
+        unique_together = ['user', 'period', 'period_start']
+        indexes = [
+            models.Index(fields=['period', 'period_start', '-contributions'], name='forum_score_ranking_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} ({self.get_period_display()}, {self.period_start})"
@@ -0,0 +1,94 @@
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import ForumTopic, ForumPost
+from . import activity, counters, leaderboard
+
+
+# --- Compteurs dénormalisés du forum ---
+
+@receiver(pre_save, sender=ForumTopic)
+@receiver(pre_save, sender=ForumPost)
+def remember_previous_parent(sender, instance, update_fields=None, **kwargs):
+    """Mémorise la catégorie (ou le sujet) enregistrée pour détecter un déplacement"""
+    field = 'categorie' if sender is ForumTopic else 'sujet'
+    if update_fields is not None and field not in update_fields:
+        # Ex. : ForumTopic.incrementer_vues() ne sauve que `vues`
+        instance._counters_previous = getattr(instance, f'{field}_id')
+        return
+    instance._counters_previous = None
+    if instance.pk:
+        instance._counters_previous = sender.objects.filter(pk=instance.pk).values_list(f'{field}_id', flat=True).first()
+
+
+@receiver(post_save, sender=ForumTopic)
+def count_saved_topic(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_counters_previous', None)
+    if created or previous is None:
+        # Le message d'ouverture compte parmi les messages de la catégorie
+        counters.adjust_category(instance.categorie_id, topics=1, posts=1)
+    elif previous != instance.categorie_id:
+        moved = 1 + instance.reply_count
+        counters.adjust_category(previous, topics=-1, posts=-moved)
+        counters.adjust_category(instance.categorie_id, topics=1, posts=moved)
+
+
+@receiver(post_delete, sender=ForumTopic)
+def count_deleted_topic(sender, instance, **kwargs):
+    # Les réponses supprimées en cascade ont déjà été décomptées une à une
+    counters.adjust_category(instance.categorie_id, topics=-1, posts=-1)
+
+
+@receiver(post_save, sender=ForumPost)
+def count_saved_post(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_counters_previous', None)
+    if created or previous is None:
+        counters.record_reply(instance)
+        activity.bump(instance.sujet_id, instance.cree_le)
+    elif previous != instance.sujet_id:
+        topics = ForumTopic.objects.filter(pk__in=[previous, instance.sujet_id])
+        counters.recompute_topics(topics)
+        counters.adjust_topic_category(previous, posts=-1)
+        counters.adjust_topic_category(instance.sujet_id, posts=1)
+
+
+@receiver(post_delete, sender=ForumPost)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.forget_reply(instance)
+
+
+# --- Classement des contributeurs ---
+
+@receiver(post_save, sender=ForumTopic)
+@receiver(post_save, sender=ForumPost)
+def score_new_contribution(sender, instance, created, **kwargs):
+    if created:
+        kind = 'topics' if sender is ForumTopic else 'posts'
+        leaderboard.add_contribution(instance.auteur_id, instance.cree_le, **{kind: 1})
+
+
+@receiver(post_delete, sender=ForumTopic)
+@receiver(post_delete, sender=ForumPost)
+def score_deleted_contribution(sender, instance, **kwargs):
+    kind = 'topics' if sender is ForumTopic else 'posts'
+    leaderboard.add_contribution(instance.auteur_id, instance.cree_le, **{kind: -1})
+
+
+# --- Nombre de « J'aime » des réponses ---
+
+@receiver(m2m_changed, sender=ForumPost.likes.through)
+def count_likes(sender, instance, action, reverse, pk_set, **kwargs):
+    # Recalcul plutôt qu'incrément : pour `remove`, pk_set contient aussi des liens inexistants
+    if not reverse:
+        # post.likes.add(user) / remove / clear
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            counters.recompute_likes(ForumPost.objects.filter(pk=instance.pk))
+        return
+
+    # user.posts_likes.add(post) / remove / clear
+    if action == 'pre_clear':
+        instance._cleared_post_likes = list(sender.objects.filter(user=instance).values_list('forumpost_id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        counters.recompute_likes(ForumPost.objects.filter(pk__in=pk_set))
+    elif action == 'post_clear':
+        counters.recompute_likes(ForumPost.objects.filter(pk__in=getattr(instance, '_cleared_post_likes', [])))
@@ -0,0 +1,31 @@
+"""
+Chargement d'une page de réponses d'un sujet (`topic_detail`).
+
+La page de réponses est lue en une requête : auteur et profil joints,
+nombre de « J'aime » dénormalisé (`like_count`) et indicateur `liked_by_me`
+pour l'utilisateur connecté, calculé par une sous-requête EXISTS. Le nombre
+total de réponses vient de `ForumTopic.reply_count` : aucun COUNT.
+"""
+from django.db.models import Exists, OuterRef, Value, BooleanField
+
+from core.pagination import KeysetPaginator
+
+from .models import ForumPost
+
+REPLIES_PER_PAGE = 10
+REPLY_ORDERING = ('cree_le', 'id')
+
+
+def replies(topic, user=None):
+    queryset = topic.reponses.select_related('auteur', 'auteur__userprofile')
+    if user is not None and user.is_authenticated:
+        liked = ForumPost.likes.through.objects.filter(forumpost=OuterRef('pk'), user=user)
+        return queryset.annotate(liked_by_me=Exists(liked))
+    return queryset.annotate(liked_by_me=Value(False, output_field=BooleanField()))
+
+
+def load_page(topic, user=None, cursor=None):
+    """Page de réponses (`KeysetPage`) ; `count` est le nombre de réponses du sujet"""
+    page = KeysetPaginator(replies(topic, user), REPLY_ORDERING, REPLIES_PER_PAGE).get_page(cursor)
+    page.count = topic.reply_count
+    return page
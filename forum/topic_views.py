@@ -0,0 +1,48 @@
+"""
+Compteur de vues des sujets, tamponné.
+
+Une vue n'écrit plus dans `ForumTopic.vues` : elle est cumulée dans un
+tampon `core.buffers` (hachage Redis quand REDIS_URL est défini, mémoire du
+processus sinon). Un thread de fond le vide toutes les
+`FORUM_VIEWS_FLUSH_INTERVAL` secondes en une mise à jour par lot ;
+`manage.py flush_topic_views` fait de même à la demande.
+"""
+from django.conf import settings
+from django.db.models import Case, F, Value, When
+
+from core.buffers import BufferedCounter
+
+from .models import ForumTopic
+
+FLUSH_INTERVAL = getattr(settings, 'FORUM_VIEWS_FLUSH_INTERVAL', 60)
+UPDATE_CHUNK_SIZE = 200
+
+
+def record_view(topic_id):
+    """
+    Compte une vue. Retourne le nombre de vues en attente pour ce sujet, à
+    ajouter à `vues` pour afficher un total à jour.
+    """
+    return buffer.add(topic_id)
+
+
+def write_views(views):
+    """Ajoute des vues à `ForumTopic.vues` ({sujet: vues}), par lots ; retourne le nombre de sujets"""
+    pairs = list(views.items())
+    for start in range(0, len(pairs), UPDATE_CHUNK_SIZE):
+        chunk = pairs[start:start + UPDATE_CHUNK_SIZE]
+        # Un sujet supprimé depuis la vue n'est simplement plus trouvé
+        ForumTopic.objects.filter(pk__in=[topic_id for topic_id, _ in chunk]).update(
+            vues=F('vues') + Case(*[When(pk=topic_id, then=Value(count)) for topic_id, count in chunk], default=Value(0))
+        )
+    return len(pairs)
+
+
+buffer = BufferedCounter(
+    'forum:topic_views', write_views, FLUSH_INTERVAL, description="des vues des sujets",
+)
+
+
+def flush():
+    """Écrit les vues accumulées ; retourne le nombre de sujets mis à jour"""
+    return buffer.flush()
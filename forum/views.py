@@ -1,15 +1,21 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q, Count, F
-from django.utils import timezone
-from datetime import timedelta
 from django.contrib.auth.models import User
 from django.http import JsonResponse # Importation pour les réponses JSON
+from django.views.decorators.http import require_http_methods
 
 from core.models import SiteSettings
+from core import stats as platform_stats
+from core.pagination import CURSOR_PARAM, KeysetPaginator
+from accounts import presence
+from search.engine import search_topics
 from .models import ForumCategory, ForumTopic, ForumPost
+from . import leaderboard, topic_page, topic_views
+
+# Épinglés d'abord, puis par activité (l'id départage les égalités)
+TOPIC_ORDERING = ('-est_epingle', '-derniere_activite', '-id')
+
 
 def forum_index(request):
     """Page d'accueil du forum"""
@@ -19,34 +25,18 @@ def forum_index(request):
     # Derniers sujets
     derniers_sujets = ForumTopic.objects.select_related('categorie', 'auteur', 'auteur__userprofile').order_by('-derniere_activite')[:5]
     
-    # Statistiques du forum
-    stats = {
-        'total_topics': ForumTopic.objects.count(),
-        'total_posts': ForumPost.objects.count(),
-        'active_members': User.objects.filter(userprofile__last_activity__gte=timezone.now() - timedelta(days=30)).count(),
-        'resolved_topics': ForumTopic.objects.filter(est_resolu=True).count(),
-    }
-    
-    # Membres en ligne (dernières 5 minutes)
-    online_members = User.objects.filter(userprofile__last_activity__gte=timezone.now() - timedelta(minutes=5)).select_related('userprofile').distinct()
-    
-    # Exclure l'utilisateur connecté de la liste des membres en ligne
-    if request.user.is_authenticated:
-        online_members = online_members.exclude(id=request.user.id)
+    # Statistiques du forum (instantané recalculé périodiquement)
+    stats = platform_stats.global_stats()
     
-    online_members = online_members[:5] # Limiter à 5 après exclusion
+    # Membres en ligne (dernières 5 minutes), sans l'utilisateur connecté
+    online_ids = presence.online_user_ids(5 * 60, exclude=request.user.id)[:5] # Limiter à 5 après exclusion
+    online_members = sorted(
+        User.objects.filter(id__in=online_ids).select_related('userprofile'),
+        key=lambda member: online_ids.index(member.id)
+    )
 
-    # Top contributeurs (sujets + réponses)
-    top_contributors = User.objects.annotate(
-        topic_count=Count('forumtopic', distinct=True),
-        post_count=Count('forumpost', distinct=True)
-    ).annotate(
-        total_contributions=F('topic_count') + F('post_count')
-    ).filter(
-        total_contributions__gt=0
-    ).order_by(
-        '-total_contributions'
-    )[:3]
+    # Top contributeurs (sujets + réponses), lus dans le classement
+    top_contributors = leaderboard.top_contributors('all', limit=3)
 
     context = {
         'settings': settings,
@@ -76,19 +66,18 @@ def category_detail(request, slug):
     """Détail d'une catégorie"""
     settings = SiteSettings.get_settings()
     categorie = get_object_or_404(ForumCategory, slug=slug, est_actif=True)
-    sujets = ForumTopic.objects.filter(categorie=categorie).select_related('auteur', 'auteur__userprofile')
+    sujets = ForumTopic.objects.filter(categorie=categorie).select_related('categorie', 'auteur', 'auteur__userprofile')
     
     # Recherche
     search = request.GET.get('search')
+    ordering = TOPIC_ORDERING
     if search:
-        sujets = sujets.filter(
-            Q(titre__icontains=search) | Q(contenu__icontains=search)
-        )
+        sujets = search_topics(sujets, search, category_id=categorie.id)
+        ordering = ('search_rank', 'id')
     
-    # Pagination
-    paginator = Paginator(sujets, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination par curseur
+    paginator = KeysetPaginator(sujets, ordering, 20, count='approximate')
+    page_obj = paginator.get_page(request.GET.get(CURSOR_PARAM))
     
     context = {
         'settings': settings,
@@ -110,16 +99,11 @@ def topic_detail(request, category_slug, slug):
     categorie = get_object_or_404(ForumCategory, slug=category_slug, est_actif=True)
     sujet = get_object_or_404(ForumTopic, categorie=categorie, slug=slug)
     
-    # Incrémenter les vues
-    sujet.incrementer_vues()
+    # Vue comptée dans le tampon (écrite en base par lots)
+    sujet.vues += topic_views.record_view(sujet.pk)
     
-    # Réponses
-    reponses = sujet.reponses.select_related('auteur', 'auteur__userprofile').order_by('cree_le')
-    
-    # Pagination
-    paginator = Paginator(reponses, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Réponses de la page (J'aime et « aimé par moi » compris), en une requête
+    page_obj = topic_page.load_page(sujet, request.user, request.GET.get(CURSOR_PARAM))
     
     context = {
         'settings': settings,
@@ -192,4 +176,19 @@ def create_post(request, category_slug, topic_slug):
         'sujet': sujet,
     }
     
-    return redirect('forum:topic_detail', category_slug=category_slug, slug=topic_slug)
\ No newline at end of file
+    return redirect('forum:topic_detail', category_slug=category_slug, slug=topic_slug)
+
+
+@login_required
+@require_http_methods(["POST"])
+def toggle_post_like(request, post_id):
+    """Ajoute ou retire le J'aime de l'utilisateur sur une réponse"""
+    reponse = get_object_or_404(ForumPost, pk=post_id)
+    if reponse.likes.filter(pk=request.user.pk).exists():
+        reponse.likes.remove(request.user)
+        liked = False
+    else:
+        reponse.likes.add(request.user)
+        liked = True
+    reponse.refresh_from_db(fields=['like_count'])
+    return JsonResponse({'liked': liked, 'like_count': reponse.like_count})
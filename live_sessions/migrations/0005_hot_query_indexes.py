@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_sessions', '0004_livesession_live_notification_sent_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='livesession',
+            index=models.Index(fields=['status', 'start_time'], name='live_session_status_start_idx'),
+        ),
+    ]
@@ -56,6 +56,9 @@ class LiveSession(models.Model):
         verbose_name = "Session Live"
         verbose_name_plural = "Sessions Live"
         ordering = ['start_time']
+        indexes = [
+            models.Index(fields=['status', 'start_time'], name='live_session_status_start_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.start_time.strftime('%d/%m/%Y %H:%M')}"
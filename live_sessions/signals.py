@@ -1,11 +1,10 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
 
 from .models import LiveSession
-from notifications.models import Notification
+from notifications.fanout import enqueue_broadcast
 
 @receiver(post_save, sender=LiveSession)
 def live_session_notifications(sender, instance, created, **kwargs):
@@ -14,8 +13,6 @@ def live_session_notifications(sender, instance, created, **kwargs):
     - A la création (programmée).
     - Au passage en direct.
     """
-    users = User.objects.all()
-    
     # 1. Notification lors de la programmation de la session
     if created and instance.status == 'scheduled' and not instance.scheduled_notification_sent:
         title = "Nouvelle session live programmée !"
@@ -27,8 +24,7 @@ def live_session_notifications(sender, instance, created, **kwargs):
         except Exception:
             action_url = reverse('live_sessions:list')
 
-        Notification.create_bulk_notification(
-            users=users,
+        enqueue_broadcast(
             title=title,
             message=message,
             notification_type=notification_type,
@@ -48,8 +44,7 @@ def live_session_notifications(sender, instance, created, **kwargs):
         except Exception:
             action_url = reverse('live_sessions:list')
 
-        Notification.create_bulk_notification(
-            users=users,
+        enqueue_broadcast(
             title=title,
             message=message,
             notification_type=notification_type,
@@ -5,8 +5,8 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
-from django.core.paginator import Paginator
 from core.models import SiteSettings
+from core.pagination import CURSOR_PARAM, KeysetPaginator
 
 from .models import LiveSession, SessionParticipant, SessionQuestion
 from .jitsi import generate_jitsi_jwt
@@ -185,12 +185,11 @@ def my_sessions(request):
     past = LiveSession.objects.filter(
         participants=request.user,
         end_time__lt=now
-    ).order_by('-end_time')
+    )
     
-    # Pagination pour les sessions passées
-    paginator = Paginator(past, 10)
-    page_number = request.GET.get('page')
-    past_page = paginator.get_page(page_number)
+    # Pagination par curseur pour les sessions passées
+    paginator = KeysetPaginator(past, ('-end_time', '-id'), 10, count='exact')
+    past_page = paginator.get_page(request.GET.get(CURSOR_PARAM))
     
     context = {
         'settings': settings,
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Notification, NotificationSettings, GlobalAlert
+from django.db import transaction
+from .models import Notification, NotificationSettings, GlobalAlert, NotificationBroadcast
+from .fanout import start_worker
+from . import counters
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -12,15 +15,48 @@ class NotificationAdmin(admin.ModelAdmin):
     actions = ['mark_as_read', 'mark_as_unread']
     
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
-        self.message_user(request, f"{queryset.count()} notifications marquées comme lues.")
+        count = self._update_and_invalidate(queryset, is_read=True)
+        self.message_user(request, f"{count} notifications marquées comme lues.")
     mark_as_read.short_description = "Marquer comme lues"
     
     def mark_as_unread(self, request, queryset):
-        queryset.update(is_read=False, read_at=None)
-        self.message_user(request, f"{queryset.count()} notifications marquées comme non lues.")
+        count = self._update_and_invalidate(queryset, is_read=False, read_at=None)
+        self.message_user(request, f"{count} notifications marquées comme non lues.")
     mark_as_unread.short_description = "Marquer comme non lues"
 
+    def _update_and_invalidate(self, queryset, **values):
+        """
+        Met à jour puis invalide les compteurs des utilisateurs concernés, après
+        le commit : invalidés avant, ils seraient recalculés sur l'ancien état.
+        """
+        user_ids = set(queryset.values_list('user_id', flat=True))
+        count = queryset.update(**values)
+        transaction.on_commit(lambda: counters.invalidate(user_ids))
+        return count
+
+
+@admin.register(NotificationBroadcast)
+class NotificationBroadcastAdmin(admin.ModelAdmin):
+    list_display = ['title', 'notification_type', 'delivery', 'status', 'processed_count', 'total_recipients', 'progress', 'created_at', 'finished_at']
+    list_filter = ['delivery', 'status', 'notification_type', 'created_at']
+    search_fields = ['title', 'message']
+    readonly_fields = ['delivery', 'status', 'last_user_id', 'total_recipients', 'processed_count', 'error',
+                       'created_at', 'started_at', 'heartbeat_at', 'finished_at']
+    date_hierarchy = 'created_at'
+
+    actions = ['resume_broadcasts']
+
+    def progress(self, obj):
+        return f"{obj.progress_percentage}%"
+    progress.short_description = "Progression"
+
+    def resume_broadcasts(self, request, queryset):
+        broadcasts = queryset.filter(delivery='fanout').exclude(status='completed')
+        for broadcast in broadcasts:
+            start_worker(broadcast.pk)
+        self.message_user(request, f"{broadcasts.count()} diffusion(s) relancée(s).")
+    resume_broadcasts.short_description = "Reprendre les diffusions sélectionnées"
+
 
 @admin.register(NotificationSettings)
 class NotificationSettingsAdmin(admin.ModelAdmin):
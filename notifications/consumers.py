@@ -0,0 +1,40 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .push import BROADCAST_GROUP, user_group
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """Canal de notifications d'un utilisateur : nombre de non lues et nouveautés"""
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if self.user is None or not self.user.is_authenticated:
+            await self.close()
+            return
+
+        self.groups_joined = [user_group(self.user.pk), BROADCAST_GROUP]
+        for group in self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+
+        await self.accept()
+        await self.send_unread_count()
+
+    async def disconnect(self, close_code):
+        for group in getattr(self, 'groups_joined', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def notification_changed(self, event):
+        await self.send_unread_count(title=event.get('title', ''))
+
+    async def send_unread_count(self, title=''):
+        await self.send_json({
+            'type': 'unread_count',
+            'unread_count': await self.get_unread_count(),
+            'title': title,
+        })
+
+    @database_sync_to_async
+    def get_unread_count(self):
+        from .counters import get_unread_count
+        return get_unread_count(self.user)
@@ -1,11 +1,16 @@
-from .models import Notification
+from django.utils.functional import SimpleLazyObject
+
+from .feed import notification_feed
+from .counters import get_unread_count
 
 def unread_notifications(request):
     if request.user.is_authenticated:
-        unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
-        recent_notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
+        # Lu depuis le cache : aucune requête SQL dans le cas courant
+        unread_count_value = get_unread_count(request.user)
+        # Évalué seulement si un template l'utilise
+        recent_notifications = SimpleLazyObject(lambda: notification_feed(request.user, 'unread')[:5])
         return {
-            'unread_notification_count': unread_count,
+            'unread_notification_count': unread_count_value,
             'recent_notifications': recent_notifications
         }
     return {}
@@ -0,0 +1,155 @@
+"""
+Compteur de notifications non lues, conservé dans le cache.
+
+Chaque utilisateur a deux entrées :
+- le nombre de notifications personnelles non lues, tenu à jour par
+  incrément / décrément à la création, à la lecture et à la suppression ;
+- le nombre de diffusions partagées non lues, associé à une version globale
+  qui change à chaque nouvelle diffusion (il est alors recalculé une fois).
+
+Une entrée absente est recalculée depuis la base à la lecture suivante,
+ce qui rend toute invalidation sûre. `manage.py rebuild_notification_counters`
+corrige une éventuelle dérive.
+
+Chaque modification renouvelle aussi la version du fil de l'utilisateur,
+qui sert d'ETag à l'API de polling.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+COUNTER_TIMEOUT = getattr(settings, 'NOTIFICATION_COUNTER_TIMEOUT', 60 * 60 * 24)
+
+BROADCAST_VERSION_KEY = 'notifications:broadcast_version'
+
+
+def _personal_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _broadcast_key(user_id):
+    return f'notifications:broadcast_unread:{user_id}'
+
+
+def _feed_version_key(user_id):
+    return f'notifications:feed_version:{user_id}'
+
+
+def _new_token():
+    return int(time.time() * 1000)
+
+
+def feed_version(user_id):
+    """
+    Version du fil de notifications d'un utilisateur (lecture en cache uniquement).
+    Elle change à chaque notification créée, lue ou supprimée et à chaque diffusion.
+    """
+    feed_key = _feed_version_key(user_id)
+    cached = cache.get_many([feed_key, BROADCAST_VERSION_KEY])
+
+    version = cached.get(feed_key)
+    if version is None:
+        version = _new_token()
+        cache.add(feed_key, version, COUNTER_TIMEOUT)
+        version = cache.get(feed_key, version)
+
+    broadcast_version = cached.get(BROADCAST_VERSION_KEY)
+    if broadcast_version is None:
+        broadcast_version = _new_broadcast_version()
+
+    return f'{version}-{broadcast_version}'
+
+
+def touch(user_ids):
+    """Renouvelle la version du fil sans toucher aux compteurs"""
+    cache.delete_many([_feed_version_key(user_id) for user_id in user_ids])
+
+
+def get_unread_count(user):
+    """Nombre total de notifications non lues (aucune requête SQL si le cache est chaud)"""
+    from .feed import personal_notifications, shared_broadcasts
+
+    personal_key = _personal_key(user.pk)
+    broadcast_key = _broadcast_key(user.pk)
+    cached = cache.get_many([personal_key, broadcast_key, BROADCAST_VERSION_KEY])
+
+    version = cached.get(BROADCAST_VERSION_KEY)
+    if version is None:
+        version = _new_broadcast_version()
+
+    personal = cached.get(personal_key)
+    if personal is None:
+        personal = personal_notifications(user).filter(is_read=False).count()
+        # `add` et non `set` : un incrément arrivé pendant le COUNT (sur une
+        # entrée remplie entre-temps par une autre requête) n'est pas écrasé
+        cache.add(personal_key, personal, COUNTER_TIMEOUT)
+
+    broadcast_entry = cached.get(broadcast_key)
+    if broadcast_entry is not None and broadcast_entry[0] == version:
+        broadcast = broadcast_entry[1]
+    else:
+        broadcast = shared_broadcasts(user).filter(is_read=False).count()
+        if broadcast_entry is None:
+            cache.add(broadcast_key, (version, broadcast), COUNTER_TIMEOUT)
+        else:
+            # Entrée d'une version précédente : elle doit être remplacée
+            cache.set(broadcast_key, (version, broadcast), COUNTER_TIMEOUT)
+
+    return max(0, personal) + max(0, broadcast)
+
+
+def increment(user_id, delta=1):
+    """Ajuste le compteur personnel s'il est en cache (sinon il sera recalculé)"""
+    try:
+        cache.incr(_personal_key(user_id), delta)
+    except ValueError:
+        pass
+    touch([user_id])
+
+
+def decrement(user_id, delta=1):
+    increment(user_id, -delta)
+
+
+def reset(user_id):
+    """Toutes les notifications de l'utilisateur viennent d'être lues"""
+    version = cache.get(BROADCAST_VERSION_KEY)
+    values = {_personal_key(user_id): 0}
+    if version is not None:
+        values[_broadcast_key(user_id)] = (version, 0)
+    cache.set_many(values, COUNTER_TIMEOUT)
+    touch([user_id])
+
+
+def invalidate(user_ids):
+    """Oublie les compteurs personnels ; ils seront recalculés à la prochaine lecture"""
+    cache.delete_many([_personal_key(user_id) for user_id in user_ids])
+    touch(user_ids)
+
+
+def invalidate_broadcasts(user_id=None):
+    """
+    Invalide le nombre de diffusions non lues d'un utilisateur,
+    ou de tous les utilisateurs quand une diffusion est publiée.
+    """
+    if user_id is not None:
+        cache.delete(_broadcast_key(user_id))
+        touch([user_id])
+        return
+    try:
+        cache.incr(BROADCAST_VERSION_KEY)
+    except ValueError:
+        _new_broadcast_version()
+
+
+def _new_broadcast_version():
+    # Une version horodatée ne peut pas coïncider avec une entrée antérieure à
+    # une éviction du cache
+    cache.add(BROADCAST_VERSION_KEY, _new_token(), None)
+    return cache.get(BROADCAST_VERSION_KEY)
+
+
+def set_personal_counts(counts):
+    """Écrit des compteurs personnels déjà calculés ({user_id: count})"""
+    cache.set_many({_personal_key(user_id): count for user_id, count in counts.items()}, COUNTER_TIMEOUT)
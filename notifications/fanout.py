@@ -0,0 +1,176 @@
+"""
+Moteur de diffusion (fan-out) des notifications à tous les utilisateurs.
+
+Par défaut une diffusion est partagée : elle est enregistrée une seule fois
+et fusionnée dans le fil de chaque utilisateur (voir `feed.py`).
+
+En mode 'fanout', le signal qui publie un cours, une leçon ou une session
+live se contente d'enregistrer une `NotificationBroadcast`. La création des
+notifications individuelles se fait ensuite hors de la requête, par lots d'identifiants
+d'utilisateurs parcourus dans l'ordre des clés primaires. Chaque lot est
+inséré dans la même transaction que l'avancement du curseur, ce qui permet
+de reprendre une diffusion interrompue sans doublon.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Notification, NotificationBroadcast
+from . import counters, push
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = getattr(settings, 'NOTIFICATION_FANOUT_CHUNK_SIZE', 1000)
+BATCH_SIZE = getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', 500)
+WORKER_MODE = getattr(settings, 'NOTIFICATION_FANOUT_WORKER', 'thread')
+STALE_AFTER_MINUTES = getattr(settings, 'NOTIFICATION_FANOUT_STALE_MINUTES', 10)
+DEFAULT_DELIVERY = getattr(settings, 'NOTIFICATION_BROADCAST_DELIVERY', 'shared')
+
+
+def enqueue_broadcast(title, message, notification_type, action_url='', action_text='', extra_data=None, delivery=None):
+    """
+    Enregistre une diffusion. Une diffusion partagée est immédiatement
+    disponible ; une diffusion copiée est confiée au worker après le commit.
+    """
+    delivery = delivery or DEFAULT_DELIVERY
+    shared = delivery == 'shared'
+    broadcast = NotificationBroadcast.objects.create(
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        action_url=action_url,
+        action_text=action_text,
+        extra_data=extra_data or {},
+        delivery=delivery,
+        status='completed' if shared else 'pending',
+        finished_at=timezone.now() if shared else None,
+    )
+
+    if not shared and WORKER_MODE == 'thread':
+        # Le worker ne doit voir la diffusion qu'une fois la transaction validée
+        transaction.on_commit(lambda: start_worker(broadcast.pk))
+
+    return broadcast
+
+
+def start_worker(broadcast_id):
+    """Lance le traitement d'une diffusion dans un thread local"""
+    worker = threading.Thread(
+        target=_run_worker,
+        args=(broadcast_id,),
+        name=f"notification-fanout-{broadcast_id}",
+        daemon=True,
+    )
+    worker.start()
+    return worker
+
+
+def _run_worker(broadcast_id):
+    try:
+        process_broadcast(broadcast_id)
+    finally:
+        # Chaque thread ouvre sa propre connexion : on la libère explicitement
+        connection.close()
+
+
+def claimable_broadcasts(stale_minutes=STALE_AFTER_MINUTES):
+    """Diffusions en attente, en échec ou abandonnées par un worker interrompu"""
+    stale_before = timezone.now() - timedelta(minutes=stale_minutes)
+    return NotificationBroadcast.objects.filter(delivery='fanout').filter(
+        Q(status__in=['pending', 'failed']) |
+        Q(status='running', heartbeat_at__lt=stale_before) |
+        Q(status='running', heartbeat_at__isnull=True, started_at__lt=stale_before)
+    ).order_by('created_at')
+
+
+def claim_broadcast(broadcast_id, stale_minutes=STALE_AFTER_MINUTES):
+    """
+    Réserve une diffusion pour le worker courant.
+    La mise à jour conditionnelle garantit qu'un seul worker la traite.
+    """
+    now = timezone.now()
+    claimed = claimable_broadcasts(stale_minutes).filter(pk=broadcast_id).update(
+        status='running',
+        heartbeat_at=now,
+        error='',
+    )
+    if not claimed:
+        return None
+
+    broadcast = NotificationBroadcast.objects.get(pk=broadcast_id)
+    if broadcast.started_at is None:
+        broadcast.started_at = now
+        broadcast.save(update_fields=['started_at'])
+    return broadcast
+
+
+def process_broadcast(broadcast_id, chunk_size=None, batch_size=None, stale_minutes=STALE_AFTER_MINUTES):
+    """
+    Crée les notifications d'une diffusion, lot par lot, à partir du curseur enregistré.
+    Retourne la diffusion traitée, ou None si elle est déjà prise en charge ailleurs.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    batch_size = batch_size or BATCH_SIZE
+
+    broadcast = claim_broadcast(broadcast_id, stale_minutes)
+    if broadcast is None:
+        return None
+
+    recipients = get_user_model().objects.all()
+
+    try:
+        if not broadcast.total_recipients:
+            broadcast.total_recipients = broadcast.processed_count + recipients.filter(pk__gt=broadcast.last_user_id).count()
+            broadcast.save(update_fields=['total_recipients'])
+
+        cursor = broadcast.last_user_id
+        while True:
+            user_ids = list(
+                recipients.filter(pk__gt=cursor)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                break
+
+            with transaction.atomic():
+                Notification.objects.bulk_create([
+                    Notification(
+                        user_id=user_id,
+                        title=broadcast.title,
+                        message=broadcast.message,
+                        notification_type=broadcast.notification_type,
+                        action_url=broadcast.action_url,
+                        action_text=broadcast.action_text,
+                        extra_data=broadcast.extra_data,
+                    ) for user_id in user_ids
+                ], batch_size=batch_size)
+
+                cursor = user_ids[-1]
+                NotificationBroadcast.objects.filter(pk=broadcast.pk).update(
+                    last_user_id=cursor,
+                    processed_count=F('processed_count') + len(user_ids),
+                    heartbeat_at=timezone.now(),
+                )
+
+            # bulk_create n'émet pas post_save : les compteurs seront recalculés
+            counters.invalidate(user_ids)
+
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(
+            status='completed',
+            finished_at=timezone.now(),
+        )
+        # Un seul message pour tous les onglets ouverts, chacun relit son compteur
+        push.push_broadcast(broadcast.title)
+    except Exception as e:
+        logger.exception("Échec de la diffusion %s", broadcast.pk)
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(status='failed', error=str(e))
+
+    broadcast.refresh_from_db()
+    return broadcast
@@ -0,0 +1,181 @@
+"""
+Fil de notifications d'un utilisateur : notifications personnelles et
+diffusions partagées (un seul enregistrement pour tous, plus un marqueur
+de lecture par utilisateur) fusionnées par date de création.
+
+La liste est paginée par curseur (`MergedFeed.get_page`) : la position est
+(date de création, source, id), et chaque source ne lit que la page suivante
+à partir de cette position.
+"""
+import heapq
+from operator import attrgetter
+
+from django.core.exceptions import ValidationError
+from django.db.models import DateTimeField, Exists, OuterRef, Q
+from django.utils import timezone
+
+from core.pagination import InvalidCursor, KeysetPage, decode_cursor, encode_cursor
+
+from .models import Notification, NotificationBroadcast, BroadcastReceipt
+from . import counters
+
+
+def personal_notifications(user):
+    return Notification.objects.filter(user=user)
+
+
+def shared_broadcasts(user):
+    """Diffusions partagées visibles par l'utilisateur, annotées avec `is_read`"""
+    receipts = BroadcastReceipt.objects.filter(broadcast=OuterRef('pk'), user=user)
+    return NotificationBroadcast.objects.filter(
+        delivery='shared',
+        created_at__gte=user.date_joined,
+    ).exclude(
+        Exists(receipts.filter(dismissed_at__isnull=False))
+    ).annotate(
+        is_read=Exists(receipts.filter(read_at__isnull=False))
+    ).order_by('-created_at')
+
+
+class MergedFeed:
+    """
+    Séquence qui fusionne plusieurs querysets triés par `-created_at` sans
+    les charger entièrement ; `get_page` la pagine par curseur.
+    """
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+
+    def count(self):
+        return sum(qs.count() for qs in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = key.stop
+        # Chaque source ne peut pas fournir plus de `stop` éléments utiles
+        sources = [qs[:stop] if stop is not None else qs for qs in self.querysets]
+        merged = heapq.merge(*sources, key=attrgetter('created_at'), reverse=True)
+        items = list(merged)
+        return items[start:stop]
+
+    @staticmethod
+    def _after(source, position, backwards=False):
+        """Condition « après `position` » (ou « avant ») pour la source d'indice `source`"""
+        created_at, position_source, pk = position
+        older, newer = ('gt', 'lt') if backwards else ('lt', 'gt')
+        if source == position_source:
+            return Q(**{f'created_at__{older}': created_at}) | Q(created_at=created_at, **{f'pk__{older}': pk})
+        # À date égale, les sources sont rangées dans l'ordre de `querysets`
+        if (source > position_source) != backwards:
+            return Q(**{f'created_at__{older}e': created_at})
+        return Q(**{f'created_at__{older}': created_at})
+
+    @staticmethod
+    def _position(cursor):
+        direction, values = decode_cursor(cursor)
+        try:
+            created_at, source, pk = values
+            return direction, (DateTimeField().to_python(created_at), int(source), int(pk))
+        except (ValueError, TypeError, ValidationError):
+            raise InvalidCursor(cursor)
+
+    def get_page(self, cursor=None, per_page=20):
+        """Page de `per_page` éléments après (ou avant) le curseur, sans OFFSET"""
+        direction, position = 'n', None
+        if cursor:
+            try:
+                direction, position = self._position(cursor)
+            except InvalidCursor:
+                direction, position = 'n', None
+        backwards = direction == 'p'
+
+        sources = []
+        for index, queryset in enumerate(self.querysets):
+            if position is not None:
+                queryset = queryset.filter(self._after(index, position, backwards))
+            ordering = ('created_at', 'pk') if backwards else ('-created_at', '-pk')
+            rows = list(queryset.order_by(*ordering)[:per_page + 1])
+            for row in rows:
+                row.feed_source = index
+            sources.append(rows)
+
+        key = lambda item: (item.created_at, -item.feed_source, -item.pk)
+        if backwards:
+            key = lambda item: (item.created_at, -item.feed_source, item.pk)
+        items = list(heapq.merge(*sources, key=key, reverse=not backwards))
+        if backwards and not items:
+            return self.get_page(per_page=per_page)
+        has_more = len(items) > per_page
+        items = items[:per_page]
+        if backwards:
+            items.reverse()
+
+        has_next = has_more if not backwards else True
+        has_previous = position is not None if not backwards else has_more
+
+        def token(direction, item):
+            return encode_cursor(direction, [item.created_at, item.feed_source, item.pk])
+
+        return KeysetPage(
+            items,
+            next_cursor=token('n', items[-1]) if items and has_next else None,
+            previous_cursor=token('p', items[0]) if items and has_previous else None,
+        )
+
+
+def notification_feed(user, filter_type='all'):
+    personal = personal_notifications(user)
+    broadcasts = shared_broadcasts(user)
+
+    if filter_type == 'unread':
+        personal = personal.filter(is_read=False)
+        broadcasts = broadcasts.filter(is_read=False)
+    elif filter_type != 'all':
+        personal = personal.filter(notification_type=filter_type)
+        broadcasts = broadcasts.filter(notification_type=filter_type)
+
+    return MergedFeed(personal.order_by('-created_at', '-id'), broadcasts.order_by('-created_at', '-id'))
+
+
+def mark_broadcast(user, broadcast, dismiss=False):
+    """Enregistre la lecture (ou le masquage) d'une diffusion partagée"""
+    now = timezone.now()
+    receipt, created = BroadcastReceipt.objects.get_or_create(
+        broadcast=broadcast,
+        user=user,
+        defaults={'read_at': now, 'dismissed_at': now if dismiss else None}
+    )
+    changed = created
+    if not created:
+        update_fields = []
+        if receipt.read_at is None:
+            receipt.read_at = now
+            update_fields.append('read_at')
+        if dismiss and receipt.dismissed_at is None:
+            receipt.dismissed_at = now
+            update_fields.append('dismissed_at')
+        if update_fields:
+            receipt.save(update_fields=update_fields)
+            changed = True
+    if changed:
+        counters.invalidate_broadcasts(user.pk)
+    return receipt
+
+
+def mark_all_broadcasts_as_read(user):
+    now = timezone.now()
+    unread_ids = list(shared_broadcasts(user).filter(is_read=False).values_list('pk', flat=True))
+    BroadcastReceipt.objects.filter(user=user, broadcast_id__in=unread_ids).update(read_at=now)
+    BroadcastReceipt.objects.bulk_create([
+        BroadcastReceipt(broadcast_id=broadcast_id, user=user, read_at=now)
+        for broadcast_id in unread_ids
+    ], ignore_conflicts=True)
+    return len(unread_ids)
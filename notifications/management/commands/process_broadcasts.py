@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.fanout import (
+    BATCH_SIZE, CHUNK_SIZE, STALE_AFTER_MINUTES, claimable_broadcasts, process_broadcast,
+)
+
+
+class Command(BaseCommand):
+    help = "Traite les diffusions de notifications en attente et reprend celles qui ont été interrompues"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Nombre d'utilisateurs lus par lot")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Taille des insertions groupées")
+        parser.add_argument('--stale-minutes', type=int, default=STALE_AFTER_MINUTES,
+                            help="Délai après lequel une diffusion en cours sans progression est reprise")
+        parser.add_argument('--loop', action='store_true', help="Continuer à surveiller la file")
+        parser.add_argument('--interval', type=int, default=5, help="Pause entre deux passages en mode --loop (secondes)")
+
+    def handle(self, *args, **options):
+        while True:
+            pending_ids = list(claimable_broadcasts(options['stale_minutes']).values_list('pk', flat=True))
+            for broadcast_id in pending_ids:
+                broadcast = process_broadcast(
+                    broadcast_id,
+                    chunk_size=options['chunk_size'],
+                    batch_size=options['batch_size'],
+                    stale_minutes=options['stale_minutes'],
+                )
+                if broadcast is None:
+                    continue
+                self.stdout.write(
+                    f"Diffusion #{broadcast.pk} « {broadcast.title} » : {broadcast.get_status_display()} "
+                    f"({broadcast.processed_count}/{broadcast.total_recipients}, {broadcast.progress_percentage}%)"
+                )
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
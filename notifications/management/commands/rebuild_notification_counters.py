@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from notifications import counters
+from notifications.models import Notification
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de notifications non lues conservés dans le cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help="Limiter à cet utilisateur (répétable)")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Nombre d'utilisateurs traités par lot")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by('pk')
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+
+        chunk_size = options['chunk_size']
+        cursor = 0
+        total = 0
+        while True:
+            user_ids = list(users.filter(pk__gt=cursor).values_list('pk', flat=True)[:chunk_size])
+            if not user_ids:
+                break
+
+            unread = dict(
+                Notification.objects.filter(user_id__in=user_ids, is_read=False)
+                .values('user_id').annotate(count=Count('id'))
+                .values_list('user_id', 'count')
+            )
+            counters.set_personal_counts({user_id: unread.get(user_id, 0) for user_id in user_ids})
+            for user_id in user_ids:
+                counters.invalidate_broadcasts(user_id)
+
+            total += len(user_ids)
+            cursor = user_ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"{total} compteur(s) de notifications recalculé(s)."))
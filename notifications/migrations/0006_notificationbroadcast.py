@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_globalalert'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationBroadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='Titre')),
+                ('message', models.TextField(verbose_name='Message')),
+                ('notification_type', models.CharField(choices=[('course_new', 'Nouveau cours'), ('course_update', 'Mise à jour de cours'), ('lesson_new', 'Nouvelle leçon'), ('message', 'Nouveau message'), ('forum_reply', 'Réponse au forum'), ('live_session_scheduled', 'Session live programmée'), ('live_session_starting', 'Session live imminente'), ('live_session_live', 'Session en direct'), ('certificate', 'Certificat disponible'), ('payment', 'Paiement'), ('system', 'Système')], max_length=30, verbose_name='Type')),
+                ('action_url', models.URLField(blank=True, verbose_name="URL d'action")),
+                ('action_text', models.CharField(blank=True, max_length=50, verbose_name='Texte du bouton')),
+                ('extra_data', models.JSONField(blank=True, default=dict, verbose_name='Données supplémentaires')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('completed', 'Terminée'), ('failed', 'Échouée')], default='pending', max_length=20, verbose_name='Statut')),
+                ('last_user_id', models.PositiveBigIntegerField(default=0, verbose_name='Dernier utilisateur traité')),
+                ('total_recipients', models.PositiveIntegerField(default=0, verbose_name='Destinataires')),
+                ('processed_count', models.PositiveIntegerField(default=0, verbose_name='Notifications créées')),
+                ('error', models.TextField(blank=True, verbose_name='Erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créée le')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Démarrée le')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Dernière progression')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminée le')),
+            ],
+            options={
+                'verbose_name': 'Diffusion de notification',
+                'verbose_name_plural': 'Diffusions de notifications',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
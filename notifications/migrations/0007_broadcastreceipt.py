@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0006_notificationbroadcast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField(blank=True, null=True, verbose_name='Lu le')),
+                ('dismissed_at', models.DateTimeField(blank=True, null=True, verbose_name='Masqué le')),
+            ],
+            options={
+                'verbose_name': 'Lecture de diffusion',
+                'verbose_name_plural': 'Lectures de diffusions',
+            },
+        ),
+        # Les diffusions existantes ont déjà été copiées pour chaque utilisateur
+        migrations.AddField(
+            model_name='notificationbroadcast',
+            name='delivery',
+            field=models.CharField(choices=[('shared', 'Partagée (un seul enregistrement)'), ('fanout', 'Copiée pour chaque utilisateur')], default='fanout', max_length=10, verbose_name='Mode de diffusion'),
+        ),
+        migrations.AlterField(
+            model_name='notificationbroadcast',
+            name='delivery',
+            field=models.CharField(choices=[('shared', 'Partagée (un seul enregistrement)'), ('fanout', 'Copiée pour chaque utilisateur')], default='shared', max_length=10, verbose_name='Mode de diffusion'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationbroadcast',
+            index=models.Index(fields=['delivery', '-created_at'], name='notif_broadcast_feed_idx'),
+        ),
+        migrations.AddField(
+            model_name='broadcastreceipt',
+            name='broadcast',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='notifications.notificationbroadcast', verbose_name='Diffusion'),
+        ),
+        migrations.AddField(
+            model_name='broadcastreceipt',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='broadcastreceipt',
+            unique_together={('broadcast', 'user')},
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
+from django.urls import reverse
 from django.utils import timezone
 
 
@@ -36,20 +38,42 @@ class Notification(models.Model):
     # Données supplémentaires (JSON)
     extra_data = models.JSONField(default=dict, blank=True, verbose_name="Données supplémentaires")
 
+    is_broadcast = False
+
     class Meta:
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
         ordering = ['-created_at']
+        indexes = [
+            # Fil d'un utilisateur (pagination par curseur) et non lues
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_feed_idx'),
+            models.Index(fields=['user', '-created_at'], condition=Q(is_read=False), name='notif_user_unread_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
 
+    @property
+    def mark_read_url(self):
+        return reverse('notifications:mark_as_read', kwargs={'notification_id': self.id})
+
+    @property
+    def delete_url(self):
+        return reverse('notifications:delete', kwargs={'notification_id': self.id})
+
     def mark_as_read(self):
         """Marquer comme lu"""
         if not self.is_read:
             self.is_read = True
             self.read_at = timezone.now()
-            self.save()
+            # Mise à jour conditionnelle : le compteur n'est décrémenté qu'une fois
+            updated = Notification.objects.filter(pk=self.pk, is_read=False).update(
+                is_read=True,
+                read_at=self.read_at
+            )
+            if updated:
+                from .counters import decrement
+                decrement(self.user_id)
 
     @classmethod
     def create_notification(cls, user, title, message, notification_type, action_url='', action_text='', extra_data=None):
@@ -81,6 +105,90 @@ class Notification(models.Model):
         return cls.objects.bulk_create(notifications)
 
 
+class NotificationBroadcast(models.Model):
+    """
+    Diffusion d'une notification à tous les utilisateurs.
+    Une diffusion partagée est stockée une seule fois ; une diffusion copiée
+    crée une notification par utilisateur, hors requête et par lots.
+    """
+    DELIVERY_CHOICES = [
+        ('shared', 'Partagée (un seul enregistrement)'),
+        ('fanout', 'Copiée pour chaque utilisateur'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('completed', 'Terminée'),
+        ('failed', 'Échouée'),
+    ]
+
+    title = models.CharField(max_length=200, verbose_name="Titre")
+    message = models.TextField(verbose_name="Message")
+    notification_type = models.CharField(max_length=30, choices=Notification.NOTIFICATION_TYPES, verbose_name="Type")
+    action_url = models.URLField(blank=True, verbose_name="URL d'action")
+    action_text = models.CharField(max_length=50, blank=True, verbose_name="Texte du bouton")
+    extra_data = models.JSONField(default=dict, blank=True, verbose_name="Données supplémentaires")
+    delivery = models.CharField(max_length=10, choices=DELIVERY_CHOICES, default='shared', verbose_name="Mode de diffusion")
+
+    # Suivi du traitement (reprise possible à partir du dernier utilisateur traité)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    last_user_id = models.PositiveBigIntegerField(default=0, verbose_name="Dernier utilisateur traité")
+    total_recipients = models.PositiveIntegerField(default=0, verbose_name="Destinataires")
+    processed_count = models.PositiveIntegerField(default=0, verbose_name="Notifications créées")
+    error = models.TextField(blank=True, verbose_name="Erreur")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créée le")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Démarrée le")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Dernière progression")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Terminée le")
+
+    is_broadcast = True
+
+    class Meta:
+        verbose_name = "Diffusion de notification"
+        verbose_name_plural = "Diffusions de notifications"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['delivery', '-created_at'], name='notif_broadcast_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.get_status_display()})"
+
+    @property
+    def mark_read_url(self):
+        return reverse('notifications:mark_broadcast_as_read', kwargs={'broadcast_id': self.id})
+
+    @property
+    def delete_url(self):
+        return reverse('notifications:dismiss_broadcast', kwargs={'broadcast_id': self.id})
+
+    @property
+    def progress_percentage(self):
+        if self.status == 'completed':
+            return 100
+        if not self.total_recipients:
+            return 0
+        return min(100, int((self.processed_count / self.total_recipients) * 100))
+
+
+class BroadcastReceipt(models.Model):
+    """Marqueur de lecture / masquage d'une diffusion partagée par un utilisateur"""
+    broadcast = models.ForeignKey(NotificationBroadcast, on_delete=models.CASCADE, related_name='receipts', verbose_name="Diffusion")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Utilisateur")
+    read_at = models.DateTimeField(null=True, blank=True, verbose_name="Lu le")
+    dismissed_at = models.DateTimeField(null=True, blank=True, verbose_name="Masqué le")
+
+    class Meta:
+        verbose_name = "Lecture de diffusion"
+        verbose_name_plural = "Lectures de diffusions"
+        unique_together = ['broadcast', 'user']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.broadcast.title}"
+
+
 class NotificationSettings(models.Model):
     """Paramètres de notification par utilisateur"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, verbose_name="Utilisateur")
@@ -0,0 +1,47 @@
+"""
+Diffusion en temps réel des notifications vers les onglets ouverts (Channels).
+
+Chaque utilisateur connecté au WebSocket `ws/notifications/` rejoint un groupe
+personnel et le groupe des diffusions partagées. L'envoi est fait après le
+commit et n'échoue jamais bruyamment : sans couche de canaux disponible,
+le polling (avec ETag) reste le mécanisme de repli.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_GROUP = 'notifications_broadcast'
+
+
+def user_group(user_id):
+    return f'notifications_user_{user_id}'
+
+
+def _group_send(group, event):
+    try:
+        from channels.layers import get_channel_layer
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(channel_layer.group_send)(group, event)
+    except Exception:
+        logger.exception("Impossible de pousser l'événement %s au groupe %s", event.get('type'), group)
+
+
+def push_to_user(user_id, title=''):
+    """Signale aux onglets de l'utilisateur que son fil a changé"""
+    transaction.on_commit(lambda: _group_send(user_group(user_id), {
+        'type': 'notification.changed',
+        'title': title,
+    }))
+
+
+def push_broadcast(title=''):
+    """Signale une nouvelle diffusion partagée à tous les utilisateurs connectés"""
+    transaction.on_commit(lambda: _group_send(BROADCAST_GROUP, {
+        'type': 'notification.changed',
+        'title': title,
+    }))
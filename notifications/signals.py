@@ -0,0 +1,29 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Notification, NotificationBroadcast
+from . import counters, push
+
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    """Incrémente le compteur de non lues à la création d'une notification"""
+    if created and not instance.is_read:
+        counters.increment(instance.user_id)
+        push.push_to_user(instance.user_id, instance.title)
+
+
+@receiver(post_delete, sender=Notification)
+def count_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        counters.decrement(instance.user_id)
+    else:
+        counters.touch([instance.user_id])
+
+
+@receiver(post_save, sender=NotificationBroadcast)
+def count_new_broadcast(sender, instance, created, **kwargs):
+    """Une nouvelle diffusion partagée change le nombre de non lues de tout le monde"""
+    if created and instance.delivery == 'shared':
+        counters.invalidate_broadcasts()
+        push.push_broadcast(instance.title)
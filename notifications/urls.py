@@ -9,6 +9,8 @@ urlpatterns = [
     path('marquer-lu/<int:notification_id>/', views.mark_as_read, name='mark_as_read'),
     path('marquer-tout-lu/', views.mark_all_as_read, name='mark_all_as_read'),
     path('supprimer/<int:notification_id>/', views.delete_notification, name='delete'),
+    path('diffusions/marquer-lu/<int:broadcast_id>/', views.mark_broadcast_as_read, name='mark_broadcast_as_read'),
+    path('diffusions/masquer/<int:broadcast_id>/', views.dismiss_broadcast, name='dismiss_broadcast'),
     path('api/non-lues/', views.get_unread_count, name='unread_count'),
     path('api/latest/', views.get_latest_notifications, name='latest_notifications'),
     path('api/check-alert/', views.check_global_alert, name='check_global_alert'),
@@ -1,34 +1,30 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
-from django.core.paginator import Paginator
+from django.views.decorators.http import require_http_methods, condition
+from django.views.decorators.cache import cache_control
 from django.contrib import messages
 from django.contrib.humanize.templatetags.humanize import naturaltime
 from django.utils import timezone
 
-from .models import Notification, NotificationSettings, GlobalAlert
+from core.pagination import CURSOR_PARAM
+from .models import Notification, NotificationSettings, GlobalAlert, NotificationBroadcast
+from .feed import notification_feed, mark_broadcast, mark_all_broadcasts_as_read
+from . import counters, push
 
 
 @login_required
 def notification_list(request):
-    """Liste des notifications"""
-    notifications = Notification.objects.filter(user=request.user)
-    
+    """Liste des notifications (personnelles et diffusions partagées)"""
     # Filtres
     filter_type = request.GET.get('type', 'all')
-    if filter_type == 'unread':
-        notifications = notifications.filter(is_read=False)
-    elif filter_type != 'all':
-        notifications = notifications.filter(notification_type=filter_type)
+    notifications = notification_feed(request.user, filter_type)
     
-    # Pagination
-    paginator = Paginator(notifications, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination par curseur
+    page_obj = notifications.get_page(request.GET.get(CURSOR_PARAM), per_page=20)
     
     # Compter les non lues
-    unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
+    unread_count = counters.get_unread_count(request.user)
     
     context = {
         'page_obj': page_obj,
@@ -46,6 +42,7 @@ def mark_as_read(request, notification_id):
     """Marquer une notification comme lue"""
     notification = get_object_or_404(Notification, id=notification_id, user=request.user)
     notification.mark_as_read()
+    push.push_to_user(request.user.id)
     
     return JsonResponse({'success': True})
 
@@ -58,6 +55,9 @@ def mark_all_as_read(request):
         is_read=True,
         read_at=timezone.now()
     )
+    mark_all_broadcasts_as_read(request.user)
+    counters.reset(request.user.id)
+    push.push_to_user(request.user.id)
     
     return JsonResponse({'success': True})
 
@@ -68,6 +68,29 @@ def delete_notification(request, notification_id):
     """Supprimer une notification"""
     notification = get_object_or_404(Notification, id=notification_id, user=request.user)
     notification.delete()
+    push.push_to_user(request.user.id)
+    
+    return JsonResponse({'success': True})
+
+
+@login_required
+@require_http_methods(["POST"])
+def mark_broadcast_as_read(request, broadcast_id):
+    """Marquer une diffusion partagée comme lue"""
+    broadcast = get_object_or_404(NotificationBroadcast, id=broadcast_id, delivery='shared')
+    mark_broadcast(request.user, broadcast)
+    push.push_to_user(request.user.id)
+    
+    return JsonResponse({'success': True})
+
+
+@login_required
+@require_http_methods(["POST"])
+def dismiss_broadcast(request, broadcast_id):
+    """Masquer une diffusion partagée (équivalent de la suppression)"""
+    broadcast = get_object_or_404(NotificationBroadcast, id=broadcast_id, delivery='shared')
+    mark_broadcast(request.user, broadcast, dismiss=True)
+    push.push_to_user(request.user.id)
     
     return JsonResponse({'success': True})
 
@@ -99,15 +122,24 @@ def notification_settings(request):
 @login_required
 def get_unread_count(request):
     """API pour récupérer le nombre de notifications non lues"""
-    count = Notification.objects.filter(user=request.user, is_read=False).count()
+    count = counters.get_unread_count(request.user)
     return JsonResponse({'count': count})
 
 
+def latest_notifications_etag(request):
+    return counters.feed_version(request.user.pk)
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=latest_notifications_etag)
 def get_latest_notifications(request):
-    """API pour le polling AJAX des notifications"""
-    unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
-    recent_notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
+    """
+    API pour le polling AJAX des notifications.
+    Répond 304 sans requête SQL tant que la version du fil n'a pas changé.
+    """
+    unread_count = counters.get_unread_count(request.user)
+    recent_notifications = notification_feed(request.user)[:5]
 
     notification_data = []
     for notif in recent_notifications:
@@ -131,6 +163,8 @@ def get_latest_notifications(request):
 
         notification_data.append({
             'id': notif.id,
+            'is_broadcast': notif.is_broadcast,
+            'mark_read_url': notif.mark_read_url,
             'title': notif.title,
             'message': notif.message,
             'action_url': notif.action_url,
@@ -92,6 +92,10 @@ class Payment(models.Model):
         verbose_name = "Paiement"
         verbose_name_plural = "Paiements"
         ordering = ['-created_at']
+        indexes = [
+            # Historique des paiements (pagination par curseur)
+            models.Index(fields=['user', '-created_at', '-id'], name='payments_user_history_idx'),
+        ]
 
     def __str__(self):
         return f"Paiement {self.payment_id} - {self.user.username} - {self.amount} {self.currency}"
@@ -11,6 +11,7 @@ from paypal.standard.forms import PayPalPaymentsForm
 from .models import Payment, PaymentMethod, Invoice, Refund
 from courses.models import Course
 from core.models import SiteSettings
+from core.pagination import CURSOR_PARAM, KeysetPaginator
 from . import orange_money
 from . import mpesa
 
@@ -184,9 +185,10 @@ def payment_cancelled(request, payment_id):
 
 @login_required
 def payment_history(request):
-    payments = Payment.objects.filter(user=request.user).order_by('-created_at')
+    payments = Payment.objects.filter(user=request.user).select_related('course')
+    paginator = KeysetPaginator(payments, ('-created_at', '-id'), 20)
     context = {
-        'payments': payments,
+        'payments': paginator.get_page(request.GET.get(CURSOR_PARAM)),
     }
     return render(request, 'payments/history.html', context)
 
@@ -0,0 +1,151 @@
+"""
+Index plein texte propre à chaque base de données.
+
+- SQLite : table virtuelle FTS5 en « contenu externe » sur search_searchdocument,
+  synchronisée par triggers, classement bm25 ;
+- PostgreSQL : colonne tsvector générée (titre pondéré A, contenu B) avec index GIN,
+  classement ts_rank ;
+- autre base, ou SQLite sans FTS5 : recherche des termes par LIKE, sans classement fin.
+
+Les termes sont déjà normalisés par search.text ; les deux moteurs utilisent donc
+une tokenisation simple.
+"""
+from django.db import connection
+
+TABLE = 'search_searchdocument'
+FTS_TABLE = 'search_fts'
+
+SQLITE_INSTALL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, body, content='{TABLE}', content_rowid='id', tokenize='unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_fts_insert AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_fts_delete AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_fts_update AFTER UPDATE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS search_fts_insert",
+    "DROP TRIGGER IF EXISTS search_fts_delete",
+    "DROP TRIGGER IF EXISTS search_fts_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_INSTALL = [
+    f"""ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(body, '')), 'B')
+    ) STORED""",
+    f"CREATE INDEX IF NOT EXISTS search_doc_vector_idx ON {TABLE} USING GIN (search_vector)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS search_doc_vector_idx",
+    f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _sqlite_has_fts5(cursor):
+    cursor.execute("PRAGMA compile_options")
+    return any(option == 'ENABLE_FTS5' for option, in cursor.fetchall())
+
+
+def install(conn=None):
+    """Crée (ou répare) l'index plein texte ; idempotent"""
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            if not _sqlite_has_fts5(cursor):
+                return False
+            statements = SQLITE_INSTALL
+        elif conn.vendor == 'postgresql':
+            statements = POSTGRES_INSTALL
+        else:
+            return False
+        for statement in statements:
+            cursor.execute(statement)
+    _available.pop(conn.alias, None)
+    return True
+
+
+def uninstall(conn=None):
+    conn = conn or connection
+    statements = {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}.get(conn.vendor, [])
+    with conn.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    _available.pop(conn.alias, None)
+
+
+_available = {}
+
+
+def fulltext_available(conn=None):
+    conn = conn or connection
+    if conn.alias not in _available:
+        if conn.vendor == 'sqlite':
+            tables = conn.introspection.table_names()
+            _available[conn.alias] = FTS_TABLE in tables
+        elif conn.vendor == 'postgresql':
+            with conn.cursor() as cursor:
+                columns = conn.introspection.get_table_description(cursor, TABLE)
+            _available[conn.alias] = any(column.name == 'search_vector' for column in columns)
+        else:
+            _available[conn.alias] = False
+    return _available[conn.alias]
+
+
+def _filters(kinds, scope_id):
+    clauses = [f"d.kind IN ({', '.join(['%s'] * len(kinds))})", "d.is_public"]
+    params = list(kinds)
+    if scope_id is not None:
+        clauses.append("d.scope_id = %s")
+        params.append(scope_id)
+    return ' AND '.join(clauses), params
+
+
+def query(terms, kinds, scope_id=None, limit=500):
+    """
+    Documents correspondant à tous les termes (préfixes), du plus pertinent au moins pertinent.
+    Retourne une liste de (target_id, kind, score) avec score > 0.
+    """
+    where, params = _filters(kinds, scope_id)
+
+    if connection.vendor == 'sqlite' and fulltext_available():
+        match = ' '.join(f'"{term}"*' for term in terms)
+        sql = (
+            f"SELECT d.target_id, d.kind, -bm25({FTS_TABLE}, 4.0, 1.0) AS score "
+            f"FROM {FTS_TABLE} JOIN {TABLE} d ON d.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND {where} ORDER BY score DESC LIMIT %s"
+        )
+        params = [match] + params + [limit]
+    elif connection.vendor == 'postgresql' and fulltext_available():
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        sql = (
+            f"SELECT d.target_id, d.kind, ts_rank(d.search_vector, q) AS score "
+            f"FROM {TABLE} d, to_tsquery('simple', %s) q "
+            f"WHERE d.search_vector @@ q AND {where} ORDER BY score DESC LIMIT %s"
+        )
+        params = [tsquery] + params + [limit]
+    else:
+        like = ' AND '.join(["(d.title LIKE %s OR d.body LIKE %s)"] * len(terms))
+        sql = (
+            f"SELECT d.target_id, d.kind, 1.0 AS score FROM {TABLE} d "
+            f"WHERE {like} AND {where} ORDER BY d.updated_at DESC LIMIT %s"
+        )
+        like_params = []
+        for term in terms:
+            like_params += [f'%{term}%', f'%{term}%']
+        params = like_params + params + [limit]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
@@ -0,0 +1,54 @@
+"""
+Point d'entrée de la recherche : requête utilisateur → identifiants classés.
+"""
+from django.conf import settings
+from django.db.models import Case, IntegerField, Value, When
+
+from . import backends
+from .text import terms as query_terms
+
+MAX_RESULTS = getattr(settings, 'SEARCH_MAX_RESULTS', 500)
+
+# Une correspondance dans une leçon (ou une réponse) compte moins que dans le cours (ou le sujet)
+KIND_WEIGHTS = {
+    'course': 1.0,
+    'lesson': 0.5,
+    'topic': 1.0,
+    'post': 0.5,
+}
+
+
+def search(query, kinds, scope_id=None, limit=MAX_RESULTS):
+    """Identifiants des résultats (cours ou sujets), du plus pertinent au moins pertinent"""
+    terms = list(dict.fromkeys(query_terms(query)))
+    if not terms:
+        return []
+
+    scores = {}
+    for target_id, kind, score in backends.query(terms, kinds, scope_id, limit):
+        scores[target_id] = scores.get(target_id, 0) + score * KIND_WEIGHTS.get(kind, 1.0)
+
+    return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+
+def filter_ranked(queryset, ranked_ids, order=True):
+    """
+    Restreint un queryset aux résultats de `search`, trié par pertinence si `order`.
+    Le rang est disponible dans l'annotation `search_rank` (0 = plus pertinent).
+    """
+    queryset = queryset.filter(pk__in=ranked_ids)
+    if order:
+        rank = Case(
+            *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ranked_ids)],
+            output_field=IntegerField(),
+        ) if ranked_ids else Value(0, output_field=IntegerField())
+        queryset = queryset.annotate(search_rank=rank).order_by('search_rank')
+    return queryset
+
+
+def search_courses(queryset, query, order=True):
+    return filter_ranked(queryset, search(query, ['course', 'lesson']), order)
+
+
+def search_topics(queryset, query, category_id=None, order=True):
+    return filter_ranked(queryset, search(query, ['topic', 'post'], scope_id=category_id), order)
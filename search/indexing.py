@@ -0,0 +1,97 @@
+"""
+Construction des documents de recherche à partir des cours, leçons, sujets
+et réponses du forum.
+"""
+from .models import SearchDocument
+from .text import html_to_text, normalize
+
+
+def course_document(course):
+    # Texte brut assemblé puis normalisé une seule fois
+    body = ' '.join([
+        course.short_description,
+        html_to_text(course.description),
+        course.learning_objectives,
+        course.prerequisites,
+    ])
+    return {
+        'target_id': course.pk,
+        'scope_id': course.category_id,
+        'is_public': course.is_published,
+        'title': normalize(course.title),
+        'body': normalize(body),
+    }
+
+
+def lesson_document(lesson):
+    return {
+        'target_id': lesson.course_id,
+        'scope_id': lesson.course.category_id,
+        'is_public': lesson.is_published and lesson.course.is_published,
+        'title': normalize(lesson.title),
+        'body': normalize(lesson.content, is_html=True),
+    }
+
+
+def topic_document(topic):
+    return {
+        'target_id': topic.pk,
+        'scope_id': topic.categorie_id,
+        'is_public': True,
+        'title': normalize(topic.titre),
+        'body': normalize(topic.contenu, is_html=True),
+    }
+
+
+def post_document(post):
+    return {
+        'target_id': post.sujet_id,
+        'scope_id': post.sujet.categorie_id,
+        'is_public': True,
+        'title': '',
+        'body': normalize(post.contenu, is_html=True),
+    }
+
+
+BUILDERS = {
+    'course': course_document,
+    'lesson': lesson_document,
+    'topic': topic_document,
+    'post': post_document,
+}
+
+
+def index_object(kind, obj):
+    SearchDocument.objects.update_or_create(
+        kind=kind,
+        object_id=obj.pk,
+        defaults=BUILDERS[kind](obj),
+    )
+
+
+def update_course_lessons(course):
+    """
+    Reporte la publication et la catégorie d'un cours sur les documents de
+    ses leçons (seuls champs qui en dépendent), en deux UPDATE.
+    """
+    from courses.models import Lesson
+    documents = SearchDocument.objects.filter(kind='lesson', target_id=course.pk)
+    published = Lesson.objects.filter(course_id=course.pk, is_published=True).values('pk')
+    documents.filter(object_id__in=published).update(scope_id=course.category_id, is_public=course.is_published)
+    documents.exclude(object_id__in=published).update(scope_id=course.category_id, is_public=False)
+
+
+def remove_object(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def querysets():
+    """Sources indexées, dans l'ordre de reconstruction"""
+    from courses.models import Course, Lesson
+    from forum.models import ForumTopic, ForumPost
+    return {
+        'course': Course.objects.all(),
+        'lesson': Lesson.objects.select_related('course'),
+        'topic': ForumTopic.objects.all(),
+        'post': ForumPost.objects.select_related('sujet'),
+    }
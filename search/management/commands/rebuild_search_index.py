@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search import backends
+from search.indexing import BUILDERS, querysets
+from search.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche (cours, leçons, sujets et réponses du forum)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', dest='kinds', choices=list(BUILDERS), help="Limiter à ce type de document (répétable)")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Nombre d'objets indexés par transaction")
+
+    def handle(self, *args, **options):
+        if backends.install():
+            self.stdout.write("Index plein texte vérifié.")
+        else:
+            self.stdout.write(self.style.WARNING("Index plein texte indisponible : recherche par LIKE."))
+
+        kinds = options['kinds'] or list(BUILDERS)
+        chunk_size = options['chunk_size']
+
+        for kind, queryset in querysets().items():
+            if kind not in kinds:
+                continue
+
+            SearchDocument.objects.filter(kind=kind).exclude(object_id__in=queryset.values('pk')).delete()
+
+            cursor = 0
+            total = 0
+            while True:
+                objects = list(queryset.filter(pk__gt=cursor).order_by('pk')[:chunk_size])
+                if not objects:
+                    break
+                with transaction.atomic():
+                    for obj in objects:
+                        SearchDocument.objects.update_or_create(
+                            kind=kind, object_id=obj.pk, defaults=BUILDERS[kind](obj)
+                        )
+                total += len(objects)
+                cursor = objects[-1].pk
+
+            self.stdout.write(f"{kind} : {total} document(s) indexé(s).")
+
+        self.stdout.write(self.style.SUCCESS("Index de recherche reconstruit."))
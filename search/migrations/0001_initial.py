@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('course', 'Cours'), ('lesson', 'Leçon'), ('topic', 'Sujet de forum'), ('post', 'Réponse de forum')], max_length=10, verbose_name='Type')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Objet indexé')),
+                ('target_id', models.PositiveBigIntegerField(verbose_name='Résultat')),
+                ('scope_id', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Catégorie')),
+                ('is_public', models.BooleanField(default=True, verbose_name='Public')),
+                ('title', models.TextField(blank=True, verbose_name='Termes du titre')),
+                ('body', models.TextField(blank=True, verbose_name='Termes du contenu')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Indexé le')),
+            ],
+            options={
+                'verbose_name': 'Document de recherche',
+                'verbose_name_plural': 'Documents de recherche',
+                'indexes': [models.Index(fields=['kind', 'target_id'], name='search_doc_target_idx')],
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+    ]
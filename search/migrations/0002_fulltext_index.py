@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+def install_fulltext_index(apps, schema_editor):
+    from search import backends
+    backends.install(schema_editor.connection)
+
+
+def uninstall_fulltext_index(apps, schema_editor):
+    from search import backends
+    backends.uninstall(schema_editor.connection)
+
+
+def index_existing_content(apps, schema_editor):
+    from search.indexing import BUILDERS
+
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    sources = {
+        'course': apps.get_model('courses', 'Course').objects.all(),
+        'lesson': apps.get_model('courses', 'Lesson').objects.select_related('course'),
+        'topic': apps.get_model('forum', 'ForumTopic').objects.all(),
+        'post': apps.get_model('forum', 'ForumPost').objects.select_related('sujet'),
+    }
+    for kind, queryset in sources.items():
+        SearchDocument.objects.bulk_create([
+            SearchDocument(kind=kind, object_id=obj.pk, **BUILDERS[kind](obj))
+            for obj in queryset.iterator()
+        ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('courses', '0007_course_denormalized_stats'),
+        ('forum', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_fulltext_index, uninstall_fulltext_index),
+        migrations.RunPython(index_existing_content, migrations.RunPython.noop),
+    ]
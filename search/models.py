@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Entrée de l'index de recherche : termes normalisés d'un cours, d'une leçon,
+    d'un sujet ou d'une réponse du forum (voir search.text).
+    L'index plein texte (FTS5 ou tsvector) est construit sur cette table.
+    """
+    KIND_CHOICES = [
+        ('course', 'Cours'),
+        ('lesson', 'Leçon'),
+        ('topic', 'Sujet de forum'),
+        ('post', 'Réponse de forum'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Type")
+    object_id = models.PositiveBigIntegerField(verbose_name="Objet indexé")
+    # Résultat présenté à l'utilisateur : le cours d'une leçon, le sujet d'une réponse
+    target_id = models.PositiveBigIntegerField(verbose_name="Résultat")
+    # Catégorie du cours ou du forum, pour filtrer sans jointure
+    scope_id = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="Catégorie")
+    is_public = models.BooleanField(default=True, verbose_name="Public")
+    title = models.TextField(blank=True, verbose_name="Termes du titre")
+    body = models.TextField(blank=True, verbose_name="Termes du contenu")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Indexé le")
+
+    class Meta:
+        verbose_name = "Document de recherche"
+        verbose_name_plural = "Documents de recherche"
+        unique_together = ['kind', 'object_id']
+        indexes = [
+            models.Index(fields=['kind', 'target_id'], name='search_doc_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id}"
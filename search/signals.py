@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from courses.models import Course, Lesson
+from forum.models import ForumTopic, ForumPost
+
+from .indexing import index_object, remove_object, update_course_lessons
+
+# Champs dont la modification change le document indexé
+INDEXED_FIELDS = {
+    Course: {'title', 'short_description', 'description', 'learning_objectives', 'prerequisites', 'category', 'is_published'},
+    Lesson: {'title', 'content', 'course', 'is_published'},
+    ForumTopic: {'titre', 'contenu', 'categorie'},
+    ForumPost: {'contenu', 'sujet'},
+}
+
+KINDS = {
+    Course: 'course',
+    Lesson: 'lesson',
+    ForumTopic: 'topic',
+    ForumPost: 'post',
+}
+
+
+# Champs du cours recopiés dans les documents de ses leçons
+LESSON_DEPENDENT_FIELDS = ('is_published', 'category_id')
+
+
+def _touches_index(sender, update_fields):
+    # Ex. : ForumTopic.incrementer_vues() ne sauve que `vues`
+    return update_fields is None or bool(INDEXED_FIELDS[sender] & set(update_fields))
+
+
+@receiver(pre_save, sender=Course)
+def remember_lesson_dependent_fields(sender, instance, update_fields=None, **kwargs):
+    """Mémorise la publication et la catégorie enregistrées du cours"""
+    instance._search_previous = None
+    if update_fields is not None and not {'is_published', 'category', 'category_id'} & set(update_fields):
+        return
+    if instance.pk and not instance._state.adding:
+        instance._search_previous = sender.objects.filter(pk=instance.pk).values(*LESSON_DEPENDENT_FIELDS).first()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=ForumTopic)
+@receiver(post_save, sender=ForumPost)
+def index_saved_object(sender, instance, update_fields=None, **kwargs):
+    if not _touches_index(sender, update_fields):
+        return
+    transaction.on_commit(lambda: index_object(KINDS[sender], instance))
+
+    if sender is Course and _lessons_affected(instance):
+        # La visibilité des leçons dépend de la publication du cours
+        transaction.on_commit(lambda: update_course_lessons(instance))
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=ForumTopic)
+@receiver(post_delete, sender=ForumPost)
+def remove_deleted_object(sender, instance, **kwargs):
+    remove_object(KINDS[sender], instance.pk)
+
+
+def _lessons_affected(course):
+    previous = getattr(course, '_search_previous', None)
+    if previous is None:
+        # Cours créé : il n'a pas encore de leçons
+        return False
+    return any(previous[field] != getattr(course, field) for field in LESSON_DEPENDENT_FIELDS)
@@ -0,0 +1,47 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from courses.models import Category, Course
+
+from .engine import search
+from .text import normalize
+
+
+class NormalizeTests(SimpleTestCase):
+    SAMPLES = [
+        "Gestion des entreprises et des réseaux",
+        "<p>Programmation orientée objet : classes, héritage, méthodes</p>",
+        "Les développeurs créent des applications professionnelles",
+        "Chevaux, bureaux, journaux et animaux",
+    ]
+
+    def test_normalize_is_idempotent(self):
+        for sample in self.SAMPLES:
+            with self.subTest(sample=sample):
+                once = normalize(sample, is_html=True)
+                self.assertEqual(normalize(once), once)
+
+    def test_inflections_share_a_term(self):
+        self.assertEqual(normalize("entreprise"), normalize("entreprises"))
+        self.assertEqual(normalize("programme"), normalize("programmation"))
+
+
+class CourseSearchTests(TestCase):
+    def setUp(self):
+        # L'indexation est faite après le commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course = self._create_course()
+
+    def _create_course(self):
+        return Course.objects.create(
+            title="Introduction", slug="introduction", short_description="Cours court",
+            description="<p>Gestion des entreprises</p>", learning_objectives="",
+            category=Category.objects.create(name="Business", slug="business"),
+            instructor=User.objects.create(username="formateur"),
+            duration_hours=1, is_published=True, thumbnail="courses/thumbnails/x.png",
+        )
+
+    def test_words_of_the_description_are_found(self):
+        for query in ("entreprises", "entreprise", "gestion"):
+            with self.subTest(query=query):
+                self.assertEqual(search(query, ['course']), [self.course.pk])
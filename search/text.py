@@ -0,0 +1,84 @@
+"""
+Normalisation du texte indexé et des requêtes : suppression du HTML et des
+accents, mots vides français, racinisation légère.
+
+Le même traitement est appliqué aux documents et aux requêtes, ce qui rend
+l'index indépendant de la base (FTS5 ou tsvector n'ont plus qu'à comparer
+des termes déjà normalisés).
+"""
+import html
+import re
+import unicodedata
+
+from django.utils.html import strip_tags
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+STOP_WORDS = frozenset("""
+a au aux avec ce ces cet cette dans de des du elle en et eux il ils je la le les leur leurs
+lui ma mais me meme mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses
+son sur ta te tes toi ton tu un une vos votre vous c d j l m n s t y est sont ete etre avoir
+the and or of to in is for on with
+""".split())
+
+# Suffixes retirés du plus long au plus court (racinisation légère, inspirée de Savoy)
+SUFFIXES = (
+    'issements', 'issement', 'atrices', 'atrice', 'ateurs', 'ateur', 'ations', 'ation',
+    'ements', 'ement', 'ances', 'ance', 'ences', 'ence', 'ables', 'able',
+    'ismes', 'isme', 'istes', 'iste', 'euses', 'euse', 'eurs', 'eur', 'ites', 'ite',
+    'ives', 'ive', 'ifs', 'if', 'ees', 'ee', 'ers', 'er', 'ez', 'es', 'e', 's', 'x',
+)
+
+MIN_STEM_LENGTH = 3
+
+
+def strip_accents(value):
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def html_to_text(value):
+    """Texte brut d'un contenu CKEditor"""
+    return html.unescape(strip_tags(value or ''))
+
+
+def stem(word):
+    """
+    Racine d'un mot. Les règles sont appliquées jusqu'à ce qu'elles ne changent
+    plus rien, de sorte qu'une racine est sa propre racine : un texte déjà
+    normalisé ne change plus, et une requête retrouve les termes indexés.
+    """
+    while True:
+        stemmed = _stem_once(word)
+        if stemmed == word:
+            return word
+        word = stemmed
+
+
+def _stem_once(word):
+    if word.isdigit():
+        return word
+    if word.endswith('eaux'):
+        return word[:-1]
+    if word.endswith('aux') and len(word) > 4:
+        return word[:-3] + 'al'
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            word = word[:-len(suffix)]
+            break
+    # programm(e) / programm(ation) / program : les consonnes doublées finales sont réduites
+    if len(word) > MIN_STEM_LENGTH and word[-1] == word[-2] and word[-1] not in 'aeiou':
+        word = word[:-1]
+    return word
+
+
+def terms(value, is_html=False):
+    """Liste des termes normalisés d'un texte"""
+    if is_html:
+        value = html_to_text(value)
+    value = strip_accents((value or '').lower())
+    return [stem(token) for token in TOKEN_RE.findall(value) if token not in STOP_WORDS and len(token) > 1]
+
+
+def normalize(value, is_html=False):
+    return ' '.join(terms(value, is_html))
@@ -35,12 +35,14 @@ def get_asgi_application_full():
     from channels.auth import AuthMiddlewareStack
     from django.core.asgi import get_asgi_application
     import chat.routing
+    import notifications.routing
     
     return ProtocolTypeRouter({
         "http": get_asgi_application(),
         "websocket": AuthMiddlewareStack(
             URLRouter(
-                chat.routing.websocket_urlpatterns
+                chat.routing.websocket_urlpatterns +
+                notifications.routing.websocket_urlpatterns
             )
         ),
     })
@@ -61,6 +61,7 @@ INSTALLED_APPS = [
     'notifications',
     'payments',
     'live_sessions',
+    'search',
 ]
 
 # ------------------------------
@@ -93,6 +94,7 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware', # Added for allauth
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.SiteSettingsMiddleware',
     'accounts.middleware.UpdateLastActivityMiddleware',
     'accounts.middleware.TimezoneMiddleware',
 ]
@@ -144,6 +146,103 @@ DATABASES = {
     }
 }
 
+# ------------------------------
+# CACHE
+# ------------------------------
+# Redis partagé entre les processus en production ; cache mémoire local sinon.
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'techlearnjess',
+        }
+    }
+
+# Durée maximale de mise en cache des pages du catalogue de cours (secondes)
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=5 * 60, cast=int)
+
+# ------------------------------
+# CHANNELS (WEBSOCKETS)
+# ------------------------------
+# La couche Redis permet aux processus WSGI de pousser vers les clients
+# connectés au serveur ASGI ; la couche mémoire ne sert qu'en développement.
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# ------------------------------
+# RECHERCHE
+# ------------------------------
+# Nombre maximal de résultats classés retournés par une recherche.
+SEARCH_MAX_RESULTS = config('SEARCH_MAX_RESULTS', default=500, cast=int)
+
+# ------------------------------
+# PRÉSENCE
+# ------------------------------
+# Durée pendant laquelle un utilisateur reste « en ligne » après sa dernière
+# requête, et intervalle minimal entre deux écritures de last_activity.
+PRESENCE_TTL = config('PRESENCE_TTL', default=5 * 60, cast=int)
+PRESENCE_FLUSH_INTERVAL = config('PRESENCE_FLUSH_INTERVAL', default=5 * 60, cast=int)
+
+# ------------------------------
+# CHAT
+# ------------------------------
+# Messages WebSocket insérés par lots : au plus CHAT_WRITE_BATCH_SIZE messages
+# ou CHAT_WRITE_BATCH_DELAY secondes d'attente avant l'écriture.
+CHAT_WRITE_BATCH_SIZE = config('CHAT_WRITE_BATCH_SIZE', default=50, cast=int)
+CHAT_WRITE_BATCH_DELAY = config('CHAT_WRITE_BATCH_DELAY', default=0.05, cast=float)
+CHAT_MAX_MESSAGE_LENGTH = config('CHAT_MAX_MESSAGE_LENGTH', default=5000, cast=int)
+
+# ------------------------------
+# QUIZ
+# ------------------------------
+# Tolérance (secondes) accordée après la date limite d'une tentative chronométrée,
+# et durée après laquelle une tentative sans limite de temps est considérée abandonnée.
+QUIZ_DEADLINE_GRACE_SECONDS = config('QUIZ_DEADLINE_GRACE_SECONDS', default=15, cast=int)
+QUIZ_ABANDON_AFTER_HOURS = config('QUIZ_ABANDON_AFTER_HOURS', default=24, cast=int)
+
+# ------------------------------
+# SUIVI DU TEMPS DE LECTURE
+# ------------------------------
+# La page d'apprentissage envoie un battement toutes les LEARNING_HEARTBEAT_INTERVAL
+# secondes ; les temps cumulés sont écrits en base toutes les
+# LEARNING_HEARTBEAT_FLUSH_INTERVAL secondes.
+LEARNING_HEARTBEAT_INTERVAL = config('LEARNING_HEARTBEAT_INTERVAL', default=30, cast=int)
+LEARNING_HEARTBEAT_FLUSH_INTERVAL = config('LEARNING_HEARTBEAT_FLUSH_INTERVAL', default=60, cast=int)
+
+# ------------------------------
+# STATISTIQUES
+# ------------------------------
+# Fréquence de recalcul des compteurs de l'accueil, du forum et des tableaux
+# de bord (`manage.py refresh_stats --loop`), en secondes
+STATS_REFRESH_INTERVAL = config('STATS_REFRESH_INTERVAL', default=5 * 60, cast=int)
+
+# ------------------------------
+# FORUM
+# ------------------------------
+# Les vues des sujets sont cumulées en mémoire (ou dans Redis) puis écrites
+# par lots toutes les FORUM_VIEWS_FLUSH_INTERVAL secondes
+FORUM_VIEWS_FLUSH_INTERVAL = config('FORUM_VIEWS_FLUSH_INTERVAL', default=60, cast=int)
+
 # ------------------------------
 # AUTH PASSWORD VALIDATORS
 # ------------------------------
@@ -313,6 +412,22 @@ JAAS_API_KEY = config('JAAS_API_KEY', default='vpaas-magic-cookie-d45a7fec84d447
 JAAS_DOMAIN = config('JAAS_DOMAIN', default='8x8.vc')
 JAAS_PRIVATE_KEY_PATH = config('JAAS_PRIVATE_KEY_PATH', default=os.path.join(BASE_DIR, 'jaas_private_key.pk'))
 
+# ------------------------------
+# NOTIFICATIONS
+# ------------------------------
+# 'shared' : une diffusion est stockée une seule fois avec un marqueur de lecture
+# par utilisateur ; 'fanout' : une notification est copiée pour chaque utilisateur.
+NOTIFICATION_BROADCAST_DELIVERY = config('NOTIFICATION_BROADCAST_DELIVERY', default='shared')
+
+# Diffusion des notifications à tous les utilisateurs : 'thread' lance un worker
+# local après le commit, 'queue' laisse la file à `manage.py process_broadcasts`.
+NOTIFICATION_FANOUT_WORKER = config('NOTIFICATION_FANOUT_WORKER', default='thread')
+NOTIFICATION_FANOUT_CHUNK_SIZE = config('NOTIFICATION_FANOUT_CHUNK_SIZE', default=1000, cast=int)
+NOTIFICATION_FANOUT_BATCH_SIZE = config('NOTIFICATION_FANOUT_BATCH_SIZE', default=500, cast=int)
+NOTIFICATION_FANOUT_STALE_MINUTES = config('NOTIFICATION_FANOUT_STALE_MINUTES', default=10, cast=int)
+# Durée de vie des compteurs de non lues en cache (secondes)
+NOTIFICATION_COUNTER_TIMEOUT = config('NOTIFICATION_COUNTER_TIMEOUT', default=60 * 60 * 24, cast=int)
+
 # ------------------------------
 # SECURITY
 # ------------------------------